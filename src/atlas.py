@@ -0,0 +1,96 @@
+"""Build step that packs sprite images into texture atlases.
+
+Run with `python -m src.atlas` (or `gnudash-atlas`). Every directory under
+assets/sprites becomes one atlas: its PNG images, named after their file names, are
+packed into assets/atlases/<directory>.png with a <directory>.json manifest of where
+each sprite is. The game loads atlases with src.components.atlas, so adding art costs
+one image load per atlas rather than one per sprite.
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import hashlib
+import json
+from pathlib import Path
+from typing import Optional
+
+import pygame
+from src.logging import get_logger, setup_logging
+from src.components.atlas import ATLASES_DIR
+
+logger = get_logger()
+
+SPRITES_DIR = ATLASES_DIR.parent / "sprites"
+# Transparent pixels between packed sprites, so filtering when scaling never picks up a neighbour.
+PADDING = 1
+
+def pack(sizes: dict[str, tuple[int, int]], max_width: int = 2048) -> tuple[tuple[int, int], dict[str, pygame.Rect]]:
+    """Place rects of the given sizes in rows, tallest first, returning the atlas size and each rect.
+
+    Rows are as wide as the widest sprite or the square root of the total area,
+    whichever is wider, up to max_width.
+    """
+    area = sum((w + PADDING) * (h + PADDING) for w, h in sizes.values())
+    widest = max((w for w, _ in sizes.values()), default=0) + PADDING
+    width = min(max(widest, int(area ** 0.5) + 1), max(max_width, widest))
+    regions = {}
+    x = y = row_height = 0
+    for name in sorted(sizes, key=lambda name: (-sizes[name][1], -sizes[name][0], name)):
+        w, h = sizes[name]
+        if x + w + PADDING > width:
+            x = 0
+            y += row_height
+            row_height = 0
+        regions[name] = pygame.Rect(x + PADDING, y + PADDING, w, h)
+        x += w + PADDING
+        row_height = max(row_height, h + PADDING)
+    return (width + PADDING, y + row_height + PADDING), regions
+
+def build_atlas(source: Path, output: Path) -> Optional[Path]:
+    """Pack the PNG images in the source directory into an atlas, returning its manifest path.
+
+    Returns None if the directory has no images.
+    """
+    images = {path.stem: pygame.image.load(path) for path in sorted(source.glob("*.png"))}
+    if not images:
+        return None
+    size, regions = pack({name: image.get_size() for name, image in images.items()})
+    atlas = pygame.Surface(size, pygame.SRCALPHA, 32)
+    atlas.fill((0, 0, 0, 0))
+    for name, image in images.items():
+        atlas.blit(image, regions[name])
+
+    output.mkdir(parents=True, exist_ok=True)
+    image_path = output / f"{source.name}.png"
+    pygame.image.save(atlas, str(image_path))
+    manifest = {
+        "image": image_path.name,
+        # The runtime cache of converted pixels is keyed by this, so it never has to read the PNG to check it.
+        "sha256": hashlib.sha256(image_path.read_bytes()).hexdigest(),
+        "size": list(size),
+        "sprites": {name: [rect.x, rect.y, rect.w, rect.h] for name, rect in sorted(regions.items())},
+    }
+    manifest_path = output / f"{source.name}.json"
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    logger.info("Packed %d sprites from %s into a %dx%d atlas", len(images), source, *size)
+    return manifest_path
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Pack every sprite directory into an atlas."""
+    parser = argparse.ArgumentParser(prog="gnudash-atlas", description="Pack GNU Dash sprites into atlases")
+    parser.add_argument("--sprites", type=Path, default=SPRITES_DIR,
+                        help="directory holding one directory of PNG images per atlas")
+    parser.add_argument("--output", type=Path, default=ATLASES_DIR, help="directory the atlases are written to")
+    args = parser.parse_args(argv)
+    setup_logging()
+
+    sources = sorted(path for path in args.sprites.iterdir() if path.is_dir()) if args.sprites.is_dir() else []
+    built = [build_atlas(source, args.output) for source in sources]
+    print(f"Built {sum(path is not None for path in built)} atlases in {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Micro benchmarks for the simulation and rendering hot paths.
+
+Run with `python -m src.benchmark`. Results are compared with a baseline file and the
+run fails if any benchmark is slower than its baseline by more than the threshold.
+No display is needed; the SDL dummy video driver is used unless one is already set.
+"""
+
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+import pygame
+from src.logging import get_logger, setup_logging
+from src.config import current_config
+from src.core.blocks import Block
+from src.core.enemies import EnemyParams, spawn_enemy
+from src.core.entity_store import ENEMIES, PLAYER
+from src.core.player import Player
+from src.core.source_code import SourceCode
+from src.core.level_generator import LevelGenerator
+from src.core.level_generator.chunks import ChunkParams, LevelChunk, _generate_floor
+from src.core.level_generator.platform_generator import generate_platform, generate_stepping_stones
+from src.core.systems import ai_system, collision_system, movement_system, pickup_system
+from src.core.world import World
+
+logger = get_logger()
+
+SEED = 1234
+DEFAULT_BASELINE = Path(".benchmark_baseline.json")
+WIDTH, HEIGHT = 800, 600
+
+# A setup function takes an entity count and returns the operation to time.
+Setup = Callable[[int], Callable[[], object]]
+
+# Each timing round runs the operation for about this many seconds.
+ROUND_TIME = 0.05
+
+class Benchmark(NamedTuple):
+    """An operation timed once for each of a set of entity counts."""
+
+    name: str
+    setup: Setup
+    counts: tuple[int, ...]
+
+def _populate(level: LevelGenerator, extra_blocks: int = 0, extra_source_codes: int = 0) -> LevelGenerator:
+    """Add entities to a level over the two screens ahead of its camera."""
+    rng = random.Random(SEED)
+    left = int(level.camera_x)
+    for _ in range(extra_blocks):
+        level.add_block(Block(left + rng.randrange(0, WIDTH * 2), rng.randrange(50, HEIGHT - 100),
+                              rng.randint(30, 200), rng.randint(10, 30), level.world))
+    for _ in range(extra_source_codes):
+        level.source_codes.add(SourceCode(left + rng.randrange(WIDTH // 2, WIDTH * 2),
+                                          rng.randrange(50, HEIGHT - 100), level.world))
+    return level
+
+def _level(extra_blocks: int = 0, extra_source_codes: int = 0) -> LevelGenerator:
+    """A seeded level without its chunk worker, so no other thread competes for the GIL."""
+    return _populate(LevelGenerator(WIDTH, HEIGHT, seed=SEED, use_worker=False), extra_blocks, extra_source_codes)
+
+def _blocks_around_player(count: int) -> list[Block]:
+    rng = random.Random(SEED)
+    config = current_config()
+    x, y = config.player.initial_x, config.player.initial_y
+    # In one world, as the level's blocks are, so their geometry is read from one store.
+    world = World()
+    blocks = [Block(0, HEIGHT - 50, WIDTH, 50, world)]
+    for _ in range(count):
+        blocks.append(Block(x + rng.randint(-200, 200), y + rng.randint(-200, 200), rng.randint(20, 100), 10, world))
+    return blocks
+
+def bench_player_update(count: int) -> Callable[[], object]:
+    player = Player()
+    blocks = _blocks_around_player(count)
+    gravity = current_config().game.gravity
+    return lambda: player.update(gravity, blocks)
+
+def bench_player_move_and_collide(count: int) -> Callable[[], object]:
+    player = Player()
+    blocks = _blocks_around_player(count)
+    start = (player.x, player.y)
+
+    def run() -> object:
+        # A fast diagonal fall from the same place every time, so each run sweeps through the blocks.
+        player.x, player.y = start
+        player.velocity_x, player.velocity_y = player.speed, 20
+        return player.move_and_collide(blocks, 0.0)
+    return run
+
+def bench_level_update(count: int) -> Callable[[], object]:
+    level = _level(extra_blocks=count)
+    # Held still, so the extra blocks stay ahead of the camera for the whole round
+    # instead of scrolling out of view and being culled partway through it.
+    level.scroll_speed = 0
+    return level.update
+
+def bench_generate_floor(count: int) -> Callable[[], object]:
+    # Floor blocks average 200 pixels, so this span holds about count of them.
+    params = ChunkParams.from_config(current_config(), WIDTH, HEIGHT)._replace(hole_chance=0.0)
+    rng = random.Random(SEED)
+
+    def run() -> object:
+        chunk = LevelChunk(0, 0, count * 200)
+        return _generate_floor(chunk, rng, params, 0, chunk.end_x)
+    return run
+
+def bench_generate_platform(count: int) -> Callable[[], object]:
+    rng = random.Random(SEED)
+    level = current_config().level
+    ranges = (level.block_min_width, level.block_max_width), (level.block_min_height, level.block_max_height)
+
+    def run() -> object:
+        end = 0
+        for _ in range(count):
+            x, _, width, _ = generate_platform(WIDTH, end, level.min_platform_height, level.max_platform_height,
+                                               level.max_jump_distance, rng, *ranges)
+            end = x + width
+        return end
+    return run
+
+def bench_generate_stepping_stones(count: int) -> Callable[[], object]:
+    rng = random.Random(SEED)
+    max_jump = current_config().level.max_jump_distance
+    return lambda: [generate_stepping_stones(i * 400, 300, 150, max_jump, rng) for i in range(count)]
+
+def _game(extra_source_codes: int = 0):
+    """A seeded Game scene without a chunk worker, its level built with the scene as in play."""
+    from src.headless import HeadlessGNUDash
+
+    random.seed(SEED)
+    scene = HeadlessGNUDash(WIDTH, HEIGHT, seed=SEED, level_worker=False).current_scene
+    _populate(scene.level_generator, extra_source_codes=extra_source_codes)
+    return scene
+
+def bench_find_safe_y_position(count: int) -> Callable[[], object]:
+    # Blocks stacked over the respawn column, so the search has to look past them.
+    scene = _game()
+    level = scene.level_generator
+    x = level.camera_x + current_config().player.initial_x
+    rng = random.Random(SEED)
+    for _ in range(count):
+        level.add_block(Block(x + rng.randint(-20, 20), rng.randrange(0, HEIGHT - 100), 40, 10, level.world))
+    return scene.find_safe_y_position
+
+def bench_check_collisions(count: int) -> Callable[[], object]:
+    scene = _game(extra_source_codes=count)
+    return scene.check_collisions
+
+def bench_level_draw(count: int) -> Callable[[], object]:
+    level = _level(extra_blocks=count)
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    return lambda: level.draw(surface)
+
+def bench_level_component_draw(count: int) -> Callable[[], object]:
+    from src.components.level import LevelComponent
+
+    # Blocks come from the cached chunk surfaces; only source codes are drawn one by one.
+    level = _level(extra_source_codes=count)
+    component = LevelComponent(level)
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    return lambda: component.draw(surface)
+
+def bench_entity_systems(count: int) -> Callable[[], object]:
+    # count enemies spread over two screens, split evenly between the kinds.
+    config = current_config()
+    params = EnemyParams.from_config(config)
+    world = World()
+    rng = random.Random(SEED)
+    for i in range(count):
+        spawn_enemy(world, ENEMIES[i % len(ENEMIES)], rng.randrange(0, WIDTH * 2), rng.randrange(50, HEIGHT - 100),
+                    params)
+    world.spawn(PLAYER, config.player.initial_x, config.player.initial_y, config.player.width, config.player.height)
+    player_rect = pygame.Rect(config.player.initial_x, config.player.initial_y, config.player.width,
+                              config.player.height)
+
+    def run() -> object:
+        ai_system(world)
+        movement_system(world)
+        return collision_system(world, player_rect), pickup_system(world, player_rect)
+    return run
+
+BENCHMARKS = [
+    Benchmark("player_update", bench_player_update, (8, 64, 512)),
+    Benchmark("player_move_and_collide", bench_player_move_and_collide, (8, 64, 512)),
+    Benchmark("level_update", bench_level_update, (0, 256, 2048)),
+    Benchmark("generate_floor", bench_generate_floor, (10, 100, 1000)),
+    Benchmark("generate_platform", bench_generate_platform, (10, 100, 1000)),
+    Benchmark("generate_stepping_stones", bench_generate_stepping_stones, (10, 100, 1000)),
+    Benchmark("find_safe_y_position", bench_find_safe_y_position, (0, 64, 512)),
+    Benchmark("check_collisions", bench_check_collisions, (8, 64, 512)),
+    Benchmark("level_draw", bench_level_draw, (0, 256, 2048)),
+    Benchmark("level_component_draw", bench_level_component_draw, (0, 64, 512)),
+    Benchmark("entity_systems", bench_entity_systems, (64, 512, 4096)),
+]
+
+def time_benchmark(benchmark: Benchmark, count: int, repeat: int) -> float:
+    """Median seconds per call over `repeat` rounds of about ROUND_TIME, each with a fresh setup."""
+    operation = benchmark.setup(count)
+    start = time.perf_counter()
+    operation()
+    number = max(1, int(ROUND_TIME / max(time.perf_counter() - start, 1e-7)))
+    rounds = []
+    for _ in range(repeat):
+        operation = benchmark.setup(count)
+        operation()
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        rounds.append((time.perf_counter() - start) / number)
+    return statistics.median(rounds)
+
+def run_benchmarks(pattern: str = "", repeat: int = 5) -> dict[str, float]:
+    """Time every benchmark whose name contains pattern, keyed by name and entity count."""
+    pygame.display.init()
+    results = {}
+    for benchmark in BENCHMARKS:
+        if pattern not in benchmark.name:
+            continue
+        for count in benchmark.counts:
+            key = f"{benchmark.name}[n={count}]"
+            results[key] = time_benchmark(benchmark, count, repeat)
+            print(f"{key:<42} {results[key] * 1e6:12.2f} us", flush=True)
+    return results
+
+def compare(results: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+    """Names of the benchmarks more than threshold slower than their baseline, after printing a table."""
+    regressions = []
+    print(f"\n{'benchmark':<42} {'baseline us':>12} {'now us':>12} {'change':>8}")
+    for key, seconds in results.items():
+        before = baseline.get(key)
+        if before is None:
+            print(f"{key:<42} {'-':>12} {seconds * 1e6:12.2f} {'new':>8}")
+            continue
+        change = seconds / before - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{key:<42} {before * 1e6:12.2f} {seconds * 1e6:12.2f} {change * 100:+7.1f}%{flag}")
+        if change > threshold:
+            regressions.append(key)
+    return regressions
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run the benchmarks and check them against the baseline."""
+    parser = argparse.ArgumentParser(prog="gnudash-benchmark", description="GNU Dash hot path benchmarks")
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline results file")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="write the results to the baseline file instead of comparing with it")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="fail when a benchmark is this fraction slower than its baseline")
+    parser.add_argument("--repeat", type=int, default=5, help="rounds per benchmark, the median is kept")
+    args = parser.parse_args(argv)
+    setup_logging()
+
+    results = run_benchmarks(args.filter, args.repeat)
+    if args.save_baseline or not args.baseline.is_file():
+        baseline = {}
+        if args.baseline.is_file():
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} benchmarks regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Iterable, Optional
+
+import pygame
+from appdirs import user_cache_dir
+from src.logging import get_logger
+
+logger = get_logger()
+
+ATLASES_DIR = Path(__file__).parent.parent.parent / "assets" / "atlases"
+CACHE_DIR = Path(user_cache_dir("GNUDash")) / "atlases"
+
+# Pixel layouts pygame can both write out and wrap a buffer in, named by byte order in memory.
+RAW_FORMATS = ("RGBA", "ARGB", "BGRA")
+
+def converted_format() -> str:
+    """The byte order of surfaces made by convert_alpha for the current display, or RGBA if unusual."""
+    surface = pygame.Surface((1, 1), pygame.SRCALPHA, 32).convert_alpha()
+    if surface.get_bytesize() != 4:
+        return "RGBA"
+    order = [""] * 4
+    for channel, shift in zip("RGBA", surface.get_shifts()):
+        byte = shift // 8 if sys.byteorder == "little" else 3 - shift // 8
+        order[byte] = channel
+    layout = "".join(order)
+    return layout if layout in RAW_FORMATS else "RGBA"
+
+class Atlas:
+    """One atlas image and the region of each sprite packed into it.
+
+    Drawing sprites is a blit of a region of the one surface, and blits draws a whole
+    batch of them in a single call.
+    """
+
+    def __init__(self, surface: pygame.Surface, regions: dict[str, pygame.Rect]):
+        """Initialize the atlas from its surface and the sprite regions within it."""
+        self.surface = surface
+        self.regions = regions
+        self.scaled: dict[float, "Atlas"] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.regions
+
+    def blit(self, target: pygame.Surface, name: str, position: tuple[float, float]) -> pygame.Rect:
+        """Draw a sprite with its top left corner at position, returning the area drawn to."""
+        return target.blit(self.surface, position, self.regions[name])
+
+    def blits(self, target: pygame.Surface, draws: Iterable[tuple[str, tuple[float, float]]]) -> list[pygame.Rect]:
+        """Draw (sprite name, position) pairs in one batch, returning the areas drawn to."""
+        surface = self.surface
+        regions = self.regions
+        return target.blits([(surface, position, regions[name]) for name, position in draws])
+
+    def at_scale(self, scale: float) -> "Atlas":
+        """This atlas with its image and regions scaled, made the first time each scale is asked for."""
+        if scale == 1.0:
+            return self
+        atlas = self.scaled.get(scale)
+        if atlas is None:
+            width, height = self.surface.get_size()
+            surface = pygame.transform.scale(self.surface, (max(round(width * scale), 1), max(round(height * scale), 1)))
+            regions = {name: pygame.Rect(round(r.x * scale), round(r.y * scale), max(round(r.w * scale), 1),
+                                         max(round(r.h * scale), 1)) for name, r in self.regions.items()}
+            atlas = self.scaled[scale] = Atlas(surface, regions)
+        return atlas
+
+def load_atlas(manifest_path: Path, cache_dir: Path = CACHE_DIR) -> Atlas:
+    """Load an atlas built by src.atlas, converted to the display's pixel format.
+
+    Converted pixels are cached in cache_dir under the hash of the atlas image, so
+    later loads skip decoding the PNG and only copy the pixels. Without a display
+    nothing can be converted and the image is loaded as it is.
+    """
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    regions = {name: pygame.Rect(rect) for name, rect in manifest["sprites"].items()}
+    image_path = manifest_path.parent / manifest["image"]
+    if pygame.display.get_surface() is None:
+        return Atlas(pygame.image.load(image_path), regions)
+
+    size = tuple(manifest["size"])
+    layout = converted_format()
+    cache_path = cache_dir / f"{manifest['sha256']}-{layout}.raw"
+    try:
+        pixels = cache_path.read_bytes()
+    except OSError:
+        pixels = None
+    if pixels is not None and len(pixels) == size[0] * size[1] * 4:
+        surface = pygame.image.frombuffer(pixels, size, layout).convert_alpha()
+        logger.debug("Loaded atlas %s from the cache", manifest_path.name)
+        return Atlas(surface, regions)
+
+    data = image_path.read_bytes()
+    if hashlib.sha256(data).hexdigest() != manifest["sha256"]:
+        logger.warning("Atlas image %s does not match its manifest, rebuild the atlases", image_path)
+    surface = pygame.image.load(image_path).convert_alpha()
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        partial = cache_path.with_suffix(".tmp")
+        partial.write_bytes(pygame.image.tobytes(surface, layout))
+        os.replace(partial, cache_path)
+    except OSError as e:
+        logger.warning("Could not cache atlas %s: %s", manifest_path.name, e)
+    logger.debug("Loaded atlas %s from %s", manifest_path.name, image_path.name)
+    return Atlas(surface, regions)
+
+class AtlasSet:
+    """Every atlas in a directory, with each sprite found by name."""
+
+    def __init__(self, directory: Path = ATLASES_DIR, cache_dir: Path = CACHE_DIR):
+        """Load the atlases of every manifest in directory."""
+        self.atlases: list[Atlas] = []
+        self.sprites: dict[str, Atlas] = {}
+        manifests = sorted(directory.glob("*.json")) if directory.is_dir() else []
+        for manifest_path in manifests:
+            try:
+                atlas = load_atlas(manifest_path, cache_dir)
+            except (OSError, ValueError, KeyError, pygame.error) as e:
+                logger.warning("Could not load atlas %s: %s", manifest_path, e)
+                continue
+            self.atlases.append(atlas)
+            for name in atlas.regions:
+                self.sprites.setdefault(name, atlas)
+        if self.atlases:
+            logger.info("Loaded %d sprites from %d atlases", len(self.sprites), len(self.atlases))
+
+    def find(self, name: str) -> Optional[Atlas]:
+        """The atlas holding the named sprite, or None if there is no such sprite."""
+        return self.sprites.get(name)
+
+# Global atlas set instance
+atlases: Optional[AtlasSet] = None
+
+def get_atlases() -> AtlasSet:
+    global atlases
+    if atlases is None:
+        atlases = AtlasSet()
+    return atlases
@@ -0,0 +1,102 @@
+from typing import Sequence
+
+import pygame
+from src.config import current_config
+from src.components.atlas import get_atlases
+from src.core.entity_store import DRM_DRONE, PATENT_TROLL, SOURCE_CODE, SPYWARE_SPIDER
+from src.core.level_generator import LevelGenerator
+from src.core.level_generator.chunks import LevelChunk
+
+# Fill colour for the transparent parts of cached chunk surfaces.
+COLORKEY = (255, 0, 255)
+# The [colors] key for each kind drawn every frame, which is also the name of its sprite.
+DYNAMIC_COLORS = {
+    SOURCE_CODE: "source_code",
+    DRM_DRONE: "drm_drone",
+    SPYWARE_SPIDER: "spyware_spider",
+    PATENT_TROLL: "patent_troll",
+}
+
+class LevelComponent:
+    """Pygame component for rendering the level.
+
+    The blocks of a chunk never change once it is spliced in, so each chunk is
+    rasterized to a colour-keyed surface the first time it comes into view and blitted
+    at its scrolled position after that. Only source codes, which can be collected,
+    and enemies, which move, are drawn every frame: in one batch of blits from the
+    atlas holding their sprite if there is one, rect by rect in their colour if not.
+    """
+
+    def __init__(self, level: LevelGenerator):
+        """Initialize the level component."""
+        self.level = level
+        self.chunk_surfaces: dict[int, tuple[pygame.Surface, int, int]] = {}
+        self.colors = current_config().colors
+        self.scale = 1.0
+        atlases = get_atlases()
+        self.sprites = {kind: atlas for kind, name in DYNAMIC_COLORS.items() if (atlas := atlases.find(name))}
+
+    def render_chunk(self, chunk: LevelChunk) -> tuple[pygame.Surface, int, int]:
+        """Rasterize a chunk's blocks at the current scale, returning the surface and its world position."""
+        left, top, right, bottom = chunk.bounds()
+        scale = self.scale
+        surface = pygame.Surface((round((right - left) * scale), round((bottom - top) * scale)))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        surface.fill(COLORKEY)
+        for x, y, width, height in chunk.blocks:
+            color = self.colors.block if y + height < self.level.screen_height else self.colors.floor
+            pygame.draw.rect(surface, color, _scaled((x - left, y - top, width, height), scale))
+        surface.set_colorkey(COLORKEY, pygame.RLEACCEL)
+        return surface, left, top
+
+    def draw(self, screen: pygame.Surface, alpha: float = 1.0, cull_margin: int = 0,
+             scale: float = 1.0) -> list[pygame.Rect]:
+        """Draw the level alpha of the way between its last two updates.
+
+        Nothing within cull_margin pixels of either side of the view is drawn, and with
+        a scale below 1 the level is drawn smaller, for a surface that is scaled up to
+        the screen afterwards. Returns the areas drawn to.
+        """
+        level = self.level
+        colors = current_config().colors
+        if colors is not self.colors or scale != self.scale:
+            # The colours were reloaded or the scale changed, so the cached chunks are stale.
+            self.colors = colors
+            self.scale = scale
+            self.chunk_surfaces.clear()
+        camera_x = level.camera_at(alpha)
+        offset = int(camera_x)
+        view_left = camera_x + cull_margin
+        view_right = camera_x + level.screen_width - cull_margin
+        live = set()
+        dirty = []
+        for chunk in level.chunks:
+            live.add(chunk.index)
+            bounds = chunk.bounds()
+            if bounds is None or bounds[2] <= view_left or bounds[0] >= view_right:
+                continue
+            cached = self.chunk_surfaces.get(chunk.index)
+            if cached is None:
+                cached = self.chunk_surfaces[chunk.index] = self.render_chunk(chunk)
+            surface, x, y = cached
+            dirty.append(screen.blit(surface, (round((x - offset) * scale), round(y * scale))))
+        for index in [index for index in self.chunk_surfaces if index not in live]:
+            del self.chunk_surfaces[index]
+
+        for kind, color in DYNAMIC_COLORS.items():
+            rects = level.visible_rects(kind, camera_x, cull_margin)
+            atlas = self.sprites.get(kind)
+            if atlas is not None:
+                atlas = atlas.at_scale(scale)
+                dirty.extend(atlas.blits(screen, [(color, (round(x * scale), round(y * scale)))
+                                                  for x, y, _, _ in rects]))
+                continue
+            for rect in rects:
+                dirty.append(pygame.draw.rect(screen, colors[color], _scaled(rect, scale) if scale != 1.0 else rect))
+        return dirty
+
+def _scaled(rect: Sequence[float], scale: float) -> pygame.Rect:
+    """A rect with its position and size multiplied by scale."""
+    x, y, width, height = rect
+    return pygame.Rect(round(x * scale), round(y * scale), max(round(width * scale), 1), max(round(height * scale), 1))
@@ -1,6 +1,9 @@
+from typing import Optional
+
 import pygame
 from src.core.player import Player
-from src.config import get_config
+from src.config import current_config
+from src.components.atlas import get_atlases
 
 class PlayerComponent:
     """Pygame component for rendering the player."""
@@ -8,12 +11,23 @@ class PlayerComponent:
     def __init__(self, player: Player):
         """Initialize the player component."""
         self.player = player
+        self.atlas = get_atlases().find("player")
+
+    def draw(self, screen: pygame.Surface, alpha: float = 1.0, scale: float = 1.0) -> Optional[pygame.Rect]:
+        """Draw the player alpha of the way between its last two updates, returning the area drawn to.
 
-    def draw(self, screen: pygame.Surface) -> None:
-        """Draw the player on the screen."""
-        rect = pygame.Rect(self.player.x, self.player.y, self.player.width, self.player.height)
-        if self.player.visible:
-            pygame.draw.rect(screen, get_config("colors", "player"), rect)
+        Positions and sizes are multiplied by scale, for drawing to a smaller surface.
+        The player sprite is drawn if an atlas has one, a rect in the player colour if not.
+        """
+        player = self.player
+        x = player.prev_x + (player.x - player.prev_x) * alpha
+        y = player.prev_y + (player.y - player.prev_y) * alpha
+        if not player.visible:
+            return None
+        if self.atlas is not None:
+            return self.atlas.at_scale(scale).blit(screen, "player", (round(x * scale), round(y * scale)))
+        rect = pygame.Rect(x * scale, y * scale, player.width * scale, player.height * scale)
+        return pygame.draw.rect(screen, current_config().colors.player, rect)
 
     def update_position(self) -> None:
         """Update the player's position based on the core player object."""
@@ -0,0 +1,75 @@
+from typing import Optional
+
+import pygame
+from src.components.resources import get_resources
+from src.profiler import PHASES, FrameProfiler
+from src.quality import QualityGovernor
+
+# One colour per profiler phase, in PHASES order.
+PHASE_COLORS = [
+    (200, 200, 200), (80, 160, 255), (60, 220, 120), (240, 200, 60),
+    (240, 120, 40), (220, 80, 220), (120, 120, 255), (90, 90, 90),
+]
+BACKGROUND = (16, 16, 16)
+TEXT = (230, 230, 230)
+
+class ProfilerOverlay:
+    """Pygame component drawing a stacked graph of recent frame phase timings."""
+
+    def __init__(self, profiler: FrameProfiler, width: int = 300, graph_height: int = 80, budget: float = 1 / 60,
+                 quality: Optional[QualityGovernor] = None):
+        """Initialize the overlay. A frame of `budget` seconds fills the graph's height.
+
+        Given the game's quality governor, the overlay also shows the quality level.
+        """
+        self.profiler = profiler
+        self.quality = quality
+        self.width = width
+        self.graph_height = graph_height
+        self.budget = budget
+        self.resources = get_resources()
+
+    def draw(self, screen: pygame.Surface) -> pygame.Rect:
+        """Draw the overlay in the top right corner, returning the area drawn to."""
+        font = self.resources.font(18)
+        lines = []
+        summary = self.profiler.summary()
+        if summary:
+            total = summary["total"]
+            lines.append(f"frame p50 {total['p50']:.2f}  p95 {total['p95']:.2f}  p99 {total['p99']:.2f} ms")
+        timings, counts = self.profiler.recent()
+        if len(counts):
+            lines.append(f"blocks {counts[-1, 0]}  source codes {counts[-1, 1]}  allocated {counts[-1, 2]}")
+        if self.quality is not None:
+            lines.append(f"quality {self.quality.index} {self.quality.level.name}")
+        legend_height = 14 * ((len(PHASES) + 3) // 4)
+        height = self.graph_height + legend_height + 16 * len(lines) + 12
+        panel = pygame.Rect(screen.get_width() - self.width - 10, 10, self.width, height)
+        screen.fill(BACKGROUND, panel)
+
+        # One column per frame, newest on the right, each split into its phases.
+        columns = timings[-(self.width - 8) // 2:]
+        scale = self.graph_height / self.budget
+        bottom = panel.top + 4 + self.graph_height
+        x = panel.right - 4 - 2 * len(columns)
+        for row in columns:
+            y = bottom
+            for phase, seconds in enumerate(row):
+                h = min(int(seconds * scale), y - panel.top - 4)
+                if h > 0:
+                    y -= h
+                    screen.fill(PHASE_COLORS[phase], (x, y, 2, h))
+            x += 2
+        pygame.draw.line(screen, TEXT, (panel.left + 4, panel.top + 4), (panel.right - 4, panel.top + 4))
+
+        y = bottom + 4
+        for i, name in enumerate(PHASES):
+            lx = panel.left + 4 + (i % 4) * (self.width // 4)
+            ly = y + (i // 4) * 14
+            screen.fill(PHASE_COLORS[i], (lx, ly + 3, 8, 8))
+            screen.blit(self.resources.text(18, name, TEXT), (lx + 11, ly))
+        y += legend_height + 2
+        for line in lines:
+            screen.blit(font.render(line, True, TEXT), (panel.left + 4, y))
+            y += 16
+        return panel
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+import pygame
+from src.config import current_config
+
+class ResourceCache:
+    """Shared cache of fonts, rendered text and translucent overlays.
+
+    Fonts are kept by size and overlays by size and colour, neither of which has many
+    distinct values. Rendered text surfaces are keyed by font size, text and colour
+    and evicted least recently used first once max_texts is reached.
+    """
+
+    def __init__(self, max_texts: int = 256):
+        """Initialize an empty cache."""
+        self.max_texts = max_texts
+        self.fonts: dict[int, pygame.font.Font] = {}
+        self.texts: OrderedDict[tuple[int, str, tuple[int, ...]], pygame.Surface] = OrderedDict()
+        self.overlays: dict[tuple[tuple[int, int], tuple[int, ...]], pygame.Surface] = {}
+        self.hits = {"font": 0, "text": 0, "overlay": 0}
+        self.misses = {"font": 0, "text": 0, "overlay": 0}
+
+    def font(self, size: int) -> pygame.font.Font:
+        """The default font at the given size."""
+        font = self.fonts.get(size)
+        if font is None:
+            self.misses["font"] += 1
+            font = self.fonts[size] = pygame.font.Font(None, size)
+        else:
+            self.hits["font"] += 1
+        return font
+
+    def text(self, size: int, text: str, color: Sequence[int]) -> pygame.Surface:
+        """Antialiased text rendered in the default font at the given size."""
+        key = (size, text, tuple(color))
+        surface = self.texts.get(key)
+        if surface is not None:
+            self.hits["text"] += 1
+            self.texts.move_to_end(key)
+            return surface
+        self.misses["text"] += 1
+        surface = self.texts[key] = self.font(size).render(text, True, color)
+        if len(self.texts) > self.max_texts:
+            self.texts.popitem(last=False)
+        return surface
+
+    def overlay(self, size: tuple[int, int], color: Sequence[int]) -> pygame.Surface:
+        """A surface of the given size filled with a translucent RGBA colour."""
+        key = (tuple(size), tuple(color))
+        surface = self.overlays.get(key)
+        if surface is None:
+            self.misses["overlay"] += 1
+            surface = self.overlays[key] = pygame.Surface(size, pygame.SRCALPHA)
+            surface.fill(color)
+        else:
+            self.hits["overlay"] += 1
+        return surface
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Hit and miss counts for each kind of resource."""
+        return {kind: {"hits": self.hits[kind], "misses": self.misses[kind]} for kind in self.hits}
+
+    def clear(self) -> None:
+        """Drop every cached resource, for example after the display is reinitialised."""
+        self.fonts.clear()
+        self.texts.clear()
+        self.overlays.clear()
+
+# Global resource cache instance
+resources: Optional[ResourceCache] = None
+
+def get_resources() -> ResourceCache:
+    global resources
+    if resources is None:
+        resources = ResourceCache(current_config().fonts.text_cache_size)
+    return resources
@@ -1,15 +1,295 @@
-import tomllib
+import os
+import threading
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterable, Optional
 
-def load_config() -> Dict[str, Any]:
-    """Load the configuration from the .default_config.toml file."""
-    config_path = Path(__file__).parent.parent / ".default_config.toml"
-    with open(config_path, "rb") as f:
-        return tomllib.load(f)
+from appdirs import user_config_dir
 
-CONFIG = load_config()
+DEFAULT_CONFIG_PATH = Path(__file__).parent.parent / ".default_config.toml"
+USER_CONFIG_PATH = Path(user_config_dir("GNUDash")) / "config.toml"
+
+class ConfigError(ValueError):
+    """Raised when a configuration file is missing a value or has one of the wrong type."""
+
+def _color(value: Any) -> tuple[int, ...]:
+    if (not isinstance(value, (list, tuple)) or len(value) not in (3, 4)
+            or not all(isinstance(c, int) and not isinstance(c, bool) and 0 <= c <= 255 for c in value)):
+        raise ConfigError(f"expected an RGB colour, got {value!r}")
+    return tuple(value)
+
+def _int(value: Any) -> int:
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ConfigError(f"expected an integer, got {value!r}")
+    return value
+
+def _float(value: Any) -> float:
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        raise ConfigError(f"expected a number, got {value!r}")
+    return float(value)
+
+def _str(value: Any) -> str:
+    if not isinstance(value, str):
+        raise ConfigError(f"expected a string, got {value!r}")
+    return value
+
+def _bool(value: Any) -> bool:
+    if not isinstance(value, bool):
+        raise ConfigError(f"expected true or false, got {value!r}")
+    return value
+
+# Every section and key the game reads, with the converter that validates its value.
+SCHEMA: Dict[str, Dict[str, Callable[[Any], Any]]] = {
+    "game": {
+        "screen_width": _int, "screen_height": _int, "gravity": _float, "fps": _int,
+        "tick_rate": _float, "max_catch_up_steps": _int, "dirty_rects": _bool, "hot_reload": _bool,
+        "rewind_seconds": _float,
+    },
+    "player": {
+        "initial_x": _int, "initial_y": _int, "width": _int, "height": _int, "move_speed": _float,
+        "jump_strength": _float, "double_jump_strength": _float, "initial_liberty_shields": _int,
+        "invincible_duration": _int, "flash_interval": _int,
+    },
+    "level": {
+        "scroll_speed": _float, "floor_height": _int, "hole_chance": _float, "hole_min_width": _int,
+        "hole_max_width": _int, "platform_chance": _float, "min_platform_height": _int,
+        "max_platform_height": _int, "block_min_width": _int, "block_max_width": _int,
+        "block_min_height": _int, "block_max_height": _int, "min_blocks": _int, "min_source_codes": _int,
+        "max_jump_distance": _int, "chunk_width": _int, "pregenerate_chunks": _int,
+    },
+    "source_code": {"width": _int, "height": _int},
+    "enemies": {
+        "per_chunk": _int, "width": _int, "height": _int, "damage": _int, "drone_speed": _float,
+        "drone_amplitude": _float, "drone_period": _float, "spider_speed": _float, "spider_patrol": _float,
+        "troll_speed": _float,
+    },
+    "colors": {
+        "background": _color, "player": _color, "block": _color, "floor": _color,
+        "source_code": _color, "drm_drone": _color, "spyware_spider": _color, "patent_troll": _color,
+        "text": _color,
+    },
+    "fonts": {"hud_size": _int, "main_size": _int, "game_over_size": _int, "text_cache_size": _int},
+    "spectator": {"enabled": _bool, "address": _str, "keyframe_interval": _int},
+    "quality": {
+        "adaptive": _bool, "level": _int, "target_fps": _float, "window": _int, "degrade_at": _float,
+        "restore_at": _float, "cull_margin": _int, "hud_interval": _int, "render_scale": _float,
+    },
+}
+
+# (section, smaller key, larger key) pairs that must be ordered.
+RANGES = [
+    ("level", "hole_min_width", "hole_max_width"),
+    ("level", "min_platform_height", "max_platform_height"),
+    ("level", "block_min_width", "block_max_width"),
+    ("level", "block_min_height", "block_max_height"),
+    ("quality", "restore_at", "degrade_at"),
+]
+
+# (section, key, test, requirement) for values that only make sense in part of their type's
+# range. The test is given the whole section, so a limit can depend on other keys.
+LIMITS: list[tuple[str, str, Callable[[Any], bool], str]] = [
+    ("game", "tick_rate", lambda game: game.tick_rate > 0, "must be greater than 0"),
+    ("game", "max_catch_up_steps", lambda game: game.max_catch_up_steps >= 1, "must be at least 1"),
+    ("game", "gravity", lambda game: game.gravity > 0, "must be greater than 0"),
+    ("player", "flash_interval", lambda player: player.flash_interval >= 1, "must be at least 1"),
+    ("level", "scroll_speed", lambda level: level.scroll_speed >= 0, "must not be negative"),
+    ("level", "chunk_width", lambda level: level.chunk_width > 0, "must be greater than 0"),
+    ("level", "hole_min_width", lambda level: level.hole_min_width <= level.max_jump_distance // 2,
+     "must not be greater than half of max_jump_distance"),
+    ("enemies", "drone_period", lambda enemies: enemies.drone_period > 0, "must be greater than 0"),
+    ("quality", "target_fps", lambda quality: quality.target_fps > 0, "must be greater than 0"),
+    ("quality", "window", lambda quality: quality.window >= 1, "must be at least 1"),
+    ("quality", "render_scale", lambda quality: 0 < quality.render_scale <= 1,
+     "must be greater than 0 and at most 1"),
+]
+
+class Section:
+    """Read-only group of configuration values with attribute access."""
+
+    __slots__ = ()
+
+    def __init__(self, values: Dict[str, Any]):
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{key}={getattr(self, key)!r}" for key in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+SECTION_TYPES: Dict[str, type] = {
+    name: type(f"{name.title().replace('_', '')}Config", (Section,), {"__slots__": tuple(keys)})
+    for name, keys in SCHEMA.items()
+}
+
+class Config:
+    """A validated, immutable version of the game configuration."""
+
+    __slots__ = ("version", "sources", "game", "player", "level", "source_code", "enemies", "colors", "fonts",
+                 "spectator", "quality")
+
+    def __init__(self, sections: Dict[str, Section], version: int, sources: list[Path]):
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "sources", sources)
+        for name, section in sections.items():
+            object.__setattr__(self, name, section)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Config is read-only")
+
+    def __getitem__(self, section: str) -> Section:
+        return getattr(self, section)
+
+def compile_config(raw: Dict[str, Any], version: int = 0, sources: Optional[list[Path]] = None) -> Config:
+    """Validate parsed TOML against the schema and build a Config from it."""
+    unknown = set(raw) - set(SCHEMA)
+    if unknown:
+        raise ConfigError(f"unknown config sections: {', '.join(sorted(unknown))}")
+    sections = {}
+    for name, converters in SCHEMA.items():
+        table = raw.get(name, {})
+        unknown = set(table) - set(converters)
+        if unknown:
+            raise ConfigError(f"unknown keys in [{name}]: {', '.join(sorted(unknown))}")
+        values = {}
+        for key, convert in converters.items():
+            if key not in table:
+                raise ConfigError(f"missing value [{name}] {key}")
+            try:
+                values[key] = convert(table[key])
+            except ConfigError as e:
+                raise ConfigError(f"[{name}] {key}: {e}") from None
+        sections[name] = SECTION_TYPES[name](values)
+    for name, low, high in RANGES:
+        if getattr(sections[name], low) > getattr(sections[name], high):
+            raise ConfigError(f"[{name}] {low} must not be greater than {high}")
+    for name, key, test, requirement in LIMITS:
+        if not test(sections[name]):
+            raise ConfigError(f"[{name}] {key} {requirement}")
+    return Config(sections, version, sources or [])
+
+def config_paths(extra: Iterable[Path] = ()) -> list[Path]:
+    """The default config file followed by any override files that exist, lowest priority first."""
+    paths = [DEFAULT_CONFIG_PATH]
+    if USER_CONFIG_PATH.is_file():
+        paths.append(USER_CONFIG_PATH)
+    for path in os.getenv("GNUDASH_CONFIG", "").split(os.pathsep):
+        if path:
+            paths.append(Path(path))
+    paths.extend(Path(path) for path in extra)
+    return paths
+
+def read_config(paths: list[Path]) -> Dict[str, Dict[str, Any]]:
+    """Parse the config files and merge them, later files overriding earlier ones, without validating."""
+    import tomllib
+
+    raw: Dict[str, Dict[str, Any]] = {}
+    for path in paths:
+        with open(path, "rb") as f:
+            try:
+                data = tomllib.load(f)
+            except tomllib.TOMLDecodeError as e:
+                raise ConfigError(f"{path}: {e}") from None
+        for section, table in data.items():
+            if not isinstance(table, dict):
+                raise ConfigError(f"{path}: {section} must be a table")
+            raw.setdefault(section, {}).update(table)
+    return raw
+
+def load_config(paths: Optional[list[Path]] = None, version: int = 0) -> Config:
+    """Load the default config, merge the override files over it and compile the result."""
+    paths = paths if paths is not None else config_paths()
+    return compile_config(read_config(paths), version, paths)
+
+# Loaded on first use rather than at import, so importing the game stays cheap.
+CONFIG: Optional[Config] = None
+_pending: Optional[Config] = None
+_extra_paths: list[Path] = []
+# Called with each reloaded config before it is queued, off the game thread, for slow preparation.
+_reload_hooks: list[Callable[[Config], None]] = []
+
+def current_config() -> Config:
+    """The configuration in effect for the current frame."""
+    global CONFIG
+    if CONFIG is None:
+        CONFIG = load_config(config_paths(_extra_paths))
+    return CONFIG
 
 def get_config(section: str, key: str) -> Any:
     """Get a configuration value from the specified section and key."""
-    return CONFIG[section][key]
\ No newline at end of file
+    return getattr(getattr(current_config(), section), key)
+
+def add_config_files(paths: Iterable[Path]) -> None:
+    """Apply extra override files, such as ones given on the command line, immediately."""
+    global CONFIG
+    _extra_paths.extend(Path(path) for path in paths)
+    CONFIG = load_config(config_paths(_extra_paths), CONFIG.version + 1 if CONFIG is not None else 0)
+
+def use_config(config: Config) -> None:
+    """Put a config in effect immediately, for tools that run the game with settings of their own."""
+    global CONFIG
+    CONFIG = config
+
+def reload_config() -> None:
+    """Load the config files again and queue the result for the next frame boundary."""
+    global _pending
+    config = load_config(config_paths(_extra_paths), current_config().version + 1)
+    for hook in _reload_hooks:
+        hook(config)
+    _pending = config
+
+def on_reload(hook: Callable[[Config], None]) -> None:
+    """Have reload_config call hook with each reloaded config before the game switches to it."""
+    _reload_hooks.append(hook)
+
+def apply_pending_config() -> bool:
+    """Swap in a reloaded config, if there is one. Call once per frame from the game loop."""
+    global CONFIG, _pending
+    pending, _pending = _pending, None
+    if pending is None:
+        return False
+    CONFIG = pending
+    return True
+
+class ConfigWatcher:
+    """Background thread that polls the config files and reloads them when they change.
+
+    A file that fails to parse or validate is reported and ignored, so a half-saved
+    edit never replaces a working config.
+    """
+
+    def __init__(self, interval: float = 0.5, on_error: Optional[Callable[[Exception], None]] = None):
+        self.interval = interval
+        self.on_error = on_error
+        self.stopped = threading.Event()
+        self.mtimes = self._mtimes()
+        self.thread = threading.Thread(target=self._run, name="GNUDash-config", daemon=True)
+        self.thread.start()
+
+    def _mtimes(self) -> Dict[Path, float]:
+        mtimes = {}
+        for path in config_paths(_extra_paths):
+            try:
+                mtimes[path] = path.stat().st_mtime
+            except OSError:
+                mtimes[path] = 0.0
+        return mtimes
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            mtimes = self._mtimes()
+            if mtimes == self.mtimes:
+                continue
+            self.mtimes = mtimes
+            try:
+                reload_config()
+            except (ConfigError, OSError) as e:
+                if self.on_error is not None:
+                    self.on_error(e)
+
+    def stop(self) -> None:
+        self.stopped.set()
@@ -1,8 +1,12 @@
-import pygame
+from typing import Optional
 
-class Block:
-    def __init__(self, x: int, y: int, width: int, height: int):
-        self.rect = pygame.Rect(x, y, width, height)
+from src.core.entity_store import BLOCK, EntityView
+from src.core.world import World
 
-    def collide(self, player_rect: pygame.Rect) -> bool:
-        return self.rect.colliderect(player_rect)
+class Block(EntityView):
+    __slots__ = ()
+
+    KIND = BLOCK
+
+    def __init__(self, x: int, y: int, width: int, height: int, world: Optional[World] = None):
+        super().__init__(x, y, width, height, world)
@@ -0,0 +1,47 @@
+from typing import NamedTuple
+
+from src.config import Config
+from src.core.entity_store import DRM_DRONE, PATENT_TROLL, SPYWARE_SPIDER
+from src.core.world import World
+
+class EnemyParams(NamedTuple):
+    """Enemy settings, snapshotted from the config."""
+
+    width: int
+    height: int
+    damage: int
+    drone_speed: float
+    drone_amplitude: float
+    drone_period: float
+    spider_speed: float
+    spider_patrol: float
+    troll_speed: float
+
+    @classmethod
+    def from_config(cls, config: Config) -> "EnemyParams":
+        enemies = config.enemies
+        return cls(
+            width=enemies.width,
+            height=enemies.height,
+            damage=enemies.damage,
+            drone_speed=enemies.drone_speed,
+            drone_amplitude=enemies.drone_amplitude,
+            drone_period=enemies.drone_period,
+            spider_speed=enemies.spider_speed,
+            spider_patrol=enemies.spider_patrol,
+            troll_speed=enemies.troll_speed,
+        )
+
+def spawn_enemy(world: World, kind: int, x: float, y: float, params: EnemyParams) -> int:
+    """Add an enemy of the given kind with its top left corner at (x, y), returning its row."""
+    size = (params.width, params.height)
+    if kind == DRM_DRONE:
+        # Drones fly against the scroll, bobbing up and down around where they started.
+        return world.spawn(kind, x, y, *size, velocity=(-params.drone_speed, 0.0), anchor=(x, y),
+                           hover=(params.drone_amplitude, params.drone_period, 0.0), hazard=params.damage)
+    if kind == SPYWARE_SPIDER:
+        return world.spawn(kind, x, y, *size, velocity=(params.spider_speed, 0.0), anchor=(x, y),
+                           patrol=params.spider_patrol, hazard=params.damage)
+    if kind == PATENT_TROLL:
+        return world.spawn(kind, x, y, *size, chase=params.troll_speed, hazard=params.damage)
+    raise ValueError(f"not an enemy kind: {kind}")
@@ -0,0 +1,292 @@
+from typing import TYPE_CHECKING, Any, Generic, Iterable, Optional, Sequence, TypeVar
+
+import numpy as np
+import pygame
+
+if TYPE_CHECKING:
+    from src.core.world import World
+
+# Entity kinds. Each kind is an archetype with its own store.
+BLOCK = 0
+SOURCE_CODE = 1
+PLAYER = 2
+DRM_DRONE = 3
+SPYWARE_SPIDER = 4
+PATENT_TROLL = 5
+ENEMIES = (DRM_DRONE, SPYWARE_SPIDER, PATENT_TROLL)
+
+# Components and the number of float64 fields each stores per entity. Tags have none.
+COMPONENTS = {
+    "geometry": 4,  # x, y, width, height in world coordinates
+    "velocity": 2,  # x, y in pixels per tick
+    "anchor": 2,  # x, y of the home position hovering and patrolling entities move around
+    "hover": 3,  # amplitude in pixels, period in ticks, phase in ticks
+    "patrol": 1,  # width of the patrol to the right of the anchor, in pixels
+    "chase": 1,  # top speed towards the player, in pixels per tick
+    "pickup": 1,  # freedom awarded when collected
+    "hazard": 1,  # shields taken on contact
+    "solid": 0,  # stops the player
+    "player": 0,  # the player's position, mirrored for other systems to read
+}
+
+# The components of each kind of entity.
+ARCHETYPES = {
+    BLOCK: ("geometry", "solid"),
+    SOURCE_CODE: ("geometry", "pickup"),
+    PLAYER: ("geometry", "player"),
+    DRM_DRONE: ("geometry", "velocity", "anchor", "hover", "hazard"),
+    SPYWARE_SPIDER: ("geometry", "velocity", "anchor", "patrol", "hazard"),
+    PATENT_TROLL: ("geometry", "velocity", "chase", "hazard"),
+}
+
+class EntityStore:
+    """Archetype storage: struct-of-arrays columns for every entity of one kind.
+
+    Each component with fields is a contiguous (fields, capacity) NumPy array, so
+    systems, overlap tests, culling and drawing run over every entity of the kind in
+    one batch. Rows are recycled through a free list, so an entity keeps its row for
+    its whole lifetime and views over it stay valid until it is released. Rows not in
+    use are masked out by alive.
+    """
+
+    def __init__(self, kind: int, capacity: int = 256):
+        """Initialize an empty store for entities of kind, with room for capacity of them."""
+        self.kind = kind
+        self.components = frozenset(ARCHETYPES[kind])
+        self.columns = {name: np.zeros((COMPONENTS[name], capacity), dtype=np.float64)
+                        for name in ARCHETYPES[kind] if COMPONENTS[name]}
+        self.geometry = self.columns["geometry"]
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.views: list[Any] = [None] * capacity
+        self.grows = 0
+        self._free: list[int] = []
+        self._size = 0
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.geometry[0]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.geometry[1]
+
+    @property
+    def w(self) -> np.ndarray:
+        return self.geometry[2]
+
+    @property
+    def h(self) -> np.ndarray:
+        return self.geometry[3]
+
+    @property
+    def capacity(self) -> int:
+        return self.alive.shape[0]
+
+    @property
+    def size(self) -> int:
+        """One past the highest row ever used. Columns sliced to this cover every live entity."""
+        return self._size
+
+    def __len__(self) -> int:
+        return self._size - len(self._free)
+
+    def _grow(self) -> None:
+        capacity = self.capacity * 2
+        for name, column in self.columns.items():
+            grown = np.zeros((column.shape[0], capacity), dtype=np.float64)
+            grown[:, :self._size] = column[:, :self._size]
+            self.columns[name] = grown
+        self.geometry = self.columns["geometry"]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._size] = self.alive[:self._size]
+        self.alive = alive
+        self.grows += 1
+        self.views.extend([None] * (capacity - len(self.views)))
+
+    def add(self, x: float, y: float, width: float, height: float, view: Any = None, **values: Any) -> int:
+        """Store an entity and return its row. Components not given in values are zeroed."""
+        if self._free:
+            row = self._free.pop()
+        else:
+            if self._size == self.capacity:
+                self._grow()
+            row = self._size
+            self._size += 1
+        for name, column in self.columns.items():
+            column[:, row] = values.get(name, 0.0)
+        self.geometry[:, row] = (x, y, width, height)
+        self.alive[row] = True
+        self.views[row] = view
+        return row
+
+    def release(self, rows: Any) -> None:
+        """Free one row or a sequence of rows in a single batch."""
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.intp))
+        if rows.size == 0:
+            return
+        self.alive[rows] = False
+        for row in rows.tolist():
+            self.views[row] = None
+            self._free.append(row)
+
+    def free_rows(self) -> list[int]:
+        """The released rows, in the order add will reuse them from the end."""
+        return self._free
+
+    def load(self, size: int, alive: np.ndarray, columns: dict[str, np.ndarray], free: list[int]) -> None:
+        """Replace the whole contents of the store, as saved from another with the same kind.
+
+        Every view is dropped; the caller binds new ones to the live rows that need them.
+        """
+        while self.capacity < size:
+            self._grow()
+        for name, column in self.columns.items():
+            column[:, :size] = columns[name]
+        self.alive[:size] = alive
+        self.alive[size:] = False
+        self.views[:] = [None] * len(self.views)
+        self._free = free
+        self._size = size
+
+    def rect(self, row: int) -> pygame.Rect:
+        """A read-only pygame.Rect copy of the entity in the given row."""
+        return FrozenRect(self.geometry[:, row].tolist())
+
+    def overlapping(self, rect: pygame.Rect) -> np.ndarray:
+        """Rows of live entities whose rects overlap the given rect, like Rect.colliderect."""
+        x, y, w, h = self.geometry[:, :self._size]
+        mask = (x < rect.right) & (x + w > rect.left) & (y < rect.bottom) & (y + h > rect.top)
+        return np.flatnonzero(mask & self.alive[:self._size])
+
+    def in_range(self, left: float, right: float) -> np.ndarray:
+        """Rows of live entities overlapping the x interval (left, right)."""
+        x, _, w, _ = self.geometry[:, :self._size]
+        return np.flatnonzero((x < right) & (x + w > left) & self.alive[:self._size])
+
+    def views_of(self, rows: np.ndarray) -> list[Any]:
+        """The views for a batch of rows."""
+        views = self.views
+        return [views[row] for row in rows.tolist()]
+
+class FrozenRect(pygame.Rect):
+    """A Rect copy whose attributes cannot be assigned, so a write that would be lost fails instead."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("entity rects are read-only copies; move the entity with move_to")
+
+def geometry_of(views: Sequence["EntityView"]) -> list[list[float]]:
+    """The [x, y, w, h] of a batch of views, read straight from their stores."""
+    if not views:
+        return []
+    store = views[0].store
+    if all(view.store is store for view in views):
+        return store.geometry[:, [view.row for view in views]].T.tolist()
+    return [view.store.geometry[:, view.row].tolist() for view in views]
+
+class EntityView:
+    """Thin object view over one row of an EntityStore.
+
+    Entities created without a world get a private single-row store, so they can still
+    be used on their own. Views are slotted and can be recycled through an EntityPool
+    once released.
+    """
+
+    __slots__ = ("store", "row")
+
+    KIND = BLOCK
+    # Values for the kind's components other than geometry.
+    DEFAULTS: dict[str, Any] = {}
+
+    def __init__(self, x: float, y: float, width: float, height: float, world: Optional["World"] = None):
+        """Store the entity in its kind's store and keep a reference to its row."""
+        self.store = world.store(self.KIND) if world is not None else EntityStore(self.KIND, capacity=1)
+        self.place(x, y, width, height)
+
+    def place(self, x: float, y: float, width: float, height: float) -> None:
+        """Take a new row in the store for the given geometry."""
+        self.row = self.store.add(x, y, width, height, self, **self.DEFAULTS)
+
+    @property
+    def rect(self) -> pygame.Rect:
+        """A read-only copy of the entity's rect; assigning to it raises, use move_to to move the entity."""
+        return self.store.rect(self.row)
+
+    def move_to(self, x: float, y: float) -> None:
+        """Move the entity's top left corner to (x, y)."""
+        geometry = self.store.geometry
+        geometry[0, self.row] = x
+        geometry[1, self.row] = y
+
+    @property
+    def left(self) -> float:
+        """World x coordinate of the left edge, read without building a rect."""
+        return float(self.store.geometry[0, self.row])
+
+    @property
+    def right(self) -> float:
+        """World x coordinate of the right edge, read without building a rect."""
+        geometry = self.store.geometry
+        return float(geometry[0, self.row] + geometry[2, self.row])
+
+    def collide(self, player_rect: pygame.Rect) -> bool:
+        return self.rect.colliderect(player_rect)
+
+    def release(self) -> None:
+        """Free the entity's row in its store."""
+        self.store.release(self.row)
+
+View = TypeVar("View", bound=EntityView)
+
+class EntityPool(Generic[View]):
+    """Free list of released views of one entity class, all over its kind's store in a world.
+
+    acquire hands back a recycled view placed at the new geometry when one is free and
+    only constructs a new object otherwise, so a level that culls entities about as
+    fast as it adds them stops allocating once the pool has warmed up.
+    """
+
+    def __init__(self, cls: type[View], world: "World"):
+        """Initialize an empty pool of cls views over world."""
+        self.cls = cls
+        self.store = world.store(cls.KIND)
+        self.free: list[View] = []
+        self.allocated = 0
+        self.reused = 0
+
+    def acquire(self, x: float, y: float, width: float, height: float) -> View:
+        """A view of a new entity with the given geometry."""
+        if self.free:
+            view = self.free.pop()
+            view.place(x, y, width, height)
+            self.reused += 1
+            return view
+        view = self.cls.__new__(self.cls)
+        view.store = self.store
+        view.place(x, y, width, height)
+        self.allocated += 1
+        return view
+
+    def bind(self, row: int) -> View:
+        """A view of an entity already in the given row of the store."""
+        if self.free:
+            view = self.free.pop()
+            self.reused += 1
+        else:
+            view = self.cls.__new__(self.cls)
+            view.store = self.store
+            self.allocated += 1
+        view.row = row
+        self.store.views[row] = view
+        return view
+
+    def reclaim(self, views: Iterable[View]) -> None:
+        """Keep views for reuse whose rows have been overwritten rather than released."""
+        self.free.extend(views)
+
+    def recycle(self, views: list[View]) -> None:
+        """Release the rows of views in one batch and keep the views for reuse."""
+        if views:
+            self.store.release([view.row for view in views])
+            self.free.extend(views)
@@ -0,0 +1,273 @@
+import queue
+import random
+import threading
+from typing import NamedTuple, Optional
+
+from src.logging import get_logger
+from src.config import Config, on_reload
+from src.core.entity_store import DRM_DRONE, ENEMIES
+from .platform_generator import generate_platform, generate_stepping_stones
+from .reachability import JumpEnvelope, JumpPhysics, jump_envelope
+
+logger = get_logger()
+
+# Draws of a platform and its stepping stones before unreachable ones are moved instead.
+PLACEMENT_ATTEMPTS = 4
+
+# The right edge and top of the surface the player last stood on, in world coordinates.
+Surface = tuple[int, int]
+
+class ChunkParams(NamedTuple):
+    """Level generation settings, snapshotted so chunks can be built off the game thread."""
+
+    screen_width: int
+    screen_height: int
+    chunk_width: int
+    lead_in: int
+    floor_height: int
+    hole_chance: float
+    hole_min_width: int
+    hole_max_width: int
+    platform_chance: float
+    min_platform_height: int
+    max_platform_height: int
+    max_jump_distance: int
+    block_width_range: tuple[int, int]
+    block_height_range: tuple[int, int]
+    min_blocks: int
+    source_code_width: int
+    source_code_height: int
+    enemies_per_chunk: int
+    enemy_height: int
+    envelope: JumpEnvelope
+
+    @classmethod
+    def from_config(cls, config: Config, screen_width: int, screen_height: int) -> "ChunkParams":
+        level = config.level
+        return cls(
+            screen_width=screen_width,
+            screen_height=screen_height,
+            chunk_width=level.chunk_width,
+            lead_in=screen_width * 2,
+            floor_height=level.floor_height,
+            hole_chance=level.hole_chance,
+            hole_min_width=level.hole_min_width,
+            hole_max_width=level.hole_max_width,
+            platform_chance=level.platform_chance,
+            min_platform_height=level.min_platform_height,
+            max_platform_height=level.max_platform_height,
+            max_jump_distance=level.max_jump_distance,
+            block_width_range=(level.block_min_width, level.block_max_width),
+            block_height_range=(level.block_min_height, level.block_max_height),
+            min_blocks=level.min_blocks,
+            source_code_width=config.source_code.width,
+            source_code_height=config.source_code.height,
+            enemies_per_chunk=config.enemies.per_chunk,
+            enemy_height=config.enemies.height,
+            envelope=jump_envelope(JumpPhysics.from_config(config, screen_height)),
+        )
+
+def _prepare_envelope(config: Config) -> None:
+    # Reloads run on the config watcher thread, so a new envelope is built there rather
+    # than on the game thread when the level switches to the config.
+    jump_envelope(JumpPhysics.from_config(config, config.game.screen_height))
+
+on_reload(_prepare_envelope)
+
+class LevelChunk:
+    """The blocks and source codes generated for one chunk of the level, as plain geometry."""
+
+    def __init__(self, index: int, start_x: int, end_x: int):
+        self.index = index
+        self.start_x = start_x
+        self.end_x = end_x
+        self.blocks: list[tuple[int, int, int, int]] = []
+        self.source_codes: list[tuple[int, int]] = []
+        self.enemies: list[tuple[int, int, int]] = []
+        self._bounds: Optional[tuple[int, int, int, int]] = None
+
+    def bounds(self) -> Optional[tuple[int, int, int, int]]:
+        """The (left, top, right, bottom) box around the chunk's blocks, or None if it has none.
+
+        Blocks may overhang the chunk's own start_x and end_x.
+        """
+        if self._bounds is None and self.blocks:
+            self._bounds = (min(x for x, _, _, _ in self.blocks), min(y for _, y, _, _ in self.blocks),
+                            max(x + w for x, _, w, _ in self.blocks), max(y + h for _, y, _, h in self.blocks))
+        return self._bounds
+
+    @property
+    def right(self) -> int:
+        """World x coordinate past which nothing in the chunk is drawn."""
+        bounds = self.bounds()
+        return max(bounds[2], self.end_x) if bounds else self.end_x
+
+def chunk_rng(seed: int, index: int) -> random.Random:
+    """The random stream for a chunk, derived only from the level seed and chunk index."""
+    return random.Random(f"{seed}/{index}")
+
+def build_chunk(seed: int, index: int, params: ChunkParams) -> LevelChunk:
+    """Generate a chunk of the level. The result depends only on its arguments."""
+    rng = chunk_rng(seed, index)
+    start_x = index * params.chunk_width
+    chunk = LevelChunk(index, start_x, start_x + params.chunk_width)
+
+    # The start of the level is floor only, so the player has somewhere to land.
+    if start_x < params.lead_in:
+        _generate_floor(chunk, rng, params, start_x, chunk.end_x)
+        return chunk
+
+    # The first chunk after the lead-in opens with a run of platforms.
+    forced_platforms = params.min_blocks if start_x - params.chunk_width < params.lead_in else 0
+    cursor = start_x
+    # Chunks are built independently, so each one is checked as if the player enters it on the floor.
+    surface = (start_x, params.screen_height - params.floor_height)
+    while cursor < chunk.end_x:
+        if forced_platforms > 0 or rng.random() < params.platform_chance:
+            forced_platforms -= 1
+            cursor, surface = _generate_platform(chunk, rng, params, cursor, surface)
+        else:
+            count = len(chunk.blocks)
+            cursor = _generate_floor(chunk, rng, params, cursor, min(cursor + params.screen_width, chunk.end_x))
+            if len(chunk.blocks) > count:
+                x, y, width, _ = chunk.blocks[-1]
+                surface = (x + width, y)
+    _place_enemies(chunk, rng, params)
+    return chunk
+
+def _generate_floor(chunk: LevelChunk, rng: random.Random, params: ChunkParams, start_x: int, end_x: int) -> int:
+    x = start_x
+    while x < end_x:
+        if rng.random() < params.hole_chance:
+            hole_width = rng.randint(params.hole_min_width, min(params.hole_max_width, params.max_jump_distance // 2))
+            x += hole_width
+        else:
+            # Floor blocks are clipped to the chunk so neighbouring chunks never overlap.
+            block_width = min(rng.randint(100, 300), chunk.end_x - x)
+            chunk.blocks.append((x, params.screen_height - params.floor_height, block_width, params.floor_height))
+            x += block_width
+    return end_x
+
+def _generate_platform(chunk: LevelChunk, rng: random.Random, params: ChunkParams, cursor: int,
+                       surface: Surface) -> tuple[int, Surface]:
+    """Add a platform and its stepping stones, returning the new cursor and last surface.
+
+    The platform is drawn again if the player could not reach every block in turn from
+    surface, and after PLACEMENT_ATTEMPTS draws the unreachable blocks are lowered.
+    """
+    for _ in range(PLACEMENT_ATTEMPTS):
+        platform = generate_platform(chunk.start_x, cursor, params.min_platform_height, params.max_platform_height,
+                                     params.max_jump_distance, rng, params.block_width_range,
+                                     params.block_height_range)
+        if platform[0] >= chunk.end_x:
+            return chunk.end_x, surface
+        blocks = [platform] + generate_stepping_stones(platform[0], platform[1], platform[2],
+                                                       params.max_jump_distance, rng)
+        if _reachable(blocks, surface, params.envelope):
+            break
+    else:
+        logger.debug("Lowering unreachable blocks of a platform at x=%d in chunk %d", platform[0], chunk.index)
+        blocks = _make_reachable(blocks, surface, params.envelope)
+
+    chunk.blocks.extend(blocks)
+    x, y, width, _ = blocks[0]
+    end = max(bx + bw for bx, _, bw, _ in blocks)
+    last = max(blocks, key=lambda block: block[0] + block[2])
+
+    # Add source code near the platform
+    if rng.random() < 0.5:
+        _place_source_code(chunk, rng, params, x, y, width)
+    return end, (last[0] + last[2], last[1])
+
+def _reachable(blocks: list[tuple[int, int, int, int]], surface: Surface, envelope: JumpEnvelope) -> bool:
+    """Whether the player can hop from surface onto each of the blocks in order of x."""
+    end, top = surface
+    for x, y, width, _ in sorted(blocks):
+        if not envelope.reachable(x - end, top - y):
+            return False
+        end, top = x + width, y
+    return True
+
+def _make_reachable(blocks: list[tuple[int, int, int, int]], surface: Surface,
+                    envelope: JumpEnvelope) -> list[tuple[int, int, int, int]]:
+    """Lower, or failing that pull back, each block the player cannot hop onto from the one before."""
+    end, top = surface
+    patched = list(blocks)
+    for i in sorted(range(len(blocks)), key=lambda i: blocks[i]):
+        x, y, width, height = patched[i]
+        if not envelope.reachable(x - end, top - y):
+            rise = envelope.highest_rise(x - end)
+            if rise is None:
+                x = end
+                rise = envelope.highest_rise(0)
+            y = max(y, top - rise)
+            patched[i] = (x, y, width, height)
+        end, top = x + width, y
+    return patched
+
+def _place_source_code(chunk: LevelChunk, rng: random.Random, params: ChunkParams,
+                       platform_x: int, platform_y: int, platform_width: int) -> None:
+    x = platform_x + rng.randint(0, platform_width)
+    y = platform_y - rng.randint(50, 100)
+
+    if not any(bx <= x < bx + bw and by <= y < by + bh for bx, by, bw, bh in chunk.blocks):
+        chunk.source_codes.append((x, y))
+        return
+
+    # If the position is occupied, try to place it above the highest nearby platform
+    nearby_tops = [by for bx, by, bw, _ in chunk.blocks if abs(bx + bw // 2 - x) < params.max_jump_distance]
+    if nearby_tops:
+        chunk.source_codes.append((x, min(nearby_tops) - params.source_code_height - 10))
+
+def _place_enemies(chunk: LevelChunk, rng: random.Random, params: ChunkParams) -> None:
+    """Add (kind, x, y) enemy placements. Drones fly above the floor and the others start on it."""
+    floor_y = params.screen_height - params.floor_height - params.enemy_height
+    for _ in range(params.enemies_per_chunk):
+        kind = rng.choice(ENEMIES)
+        x = rng.randrange(chunk.start_x, chunk.end_x)
+        y = rng.randint(params.min_platform_height - 100, floor_y - 100) if kind == DRM_DRONE else floor_y
+        chunk.enemies.append((kind, x, y))
+
+class ChunkWorker:
+    """Background thread that keeps a bounded queue of upcoming chunks ready.
+
+    Chunks are built in order starting from first_index. The game thread takes them
+    with next_chunk and builds a chunk itself when the worker has fallen behind, in
+    which case the worker's stale copies are discarded.
+    """
+
+    def __init__(self, seed: int, params: ChunkParams, first_index: int, size: int):
+        self.seed = seed
+        self.params = params
+        self.ready: queue.Queue[LevelChunk] = queue.Queue(maxsize=size)
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(first_index,), name="GNUDash-chunks", daemon=True)
+        self.thread.start()
+
+    def _run(self, index: int) -> None:
+        while not self.stopped.is_set():
+            chunk = build_chunk(self.seed, index, self.params)
+            while not self.stopped.is_set():
+                try:
+                    self.ready.put(chunk, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            index += 1
+
+    def next_chunk(self, index: int) -> LevelChunk:
+        """Return the chunk with the given index, building it here if it is not ready yet."""
+        while True:
+            try:
+                chunk = self.ready.get_nowait()
+            except queue.Empty:
+                logger.debug("Chunk %d was not pregenerated in time, building it on the game thread", index)
+                return build_chunk(self.seed, index, self.params)
+            if chunk.index == index:
+                return chunk
+            if chunk.index > index:
+                # Only possible if chunks were requested out of order.
+                return build_chunk(self.seed, index, self.params)
+
+    def stop(self) -> None:
+        self.stopped.set()
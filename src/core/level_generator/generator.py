@@ -1,114 +1,244 @@
+import math
 import random
+import weakref
+from collections import deque
+from typing import Optional
+
 import pygame
 from src.logging import get_logger
-from src.config import get_config
+from src.config import Config, current_config
 from src.core.blocks import Block
+from src.core.enemies import EnemyParams, spawn_enemy
+from src.core.entity_store import BLOCK, ENEMIES, SOURCE_CODE, EntityPool
 from src.core.source_code import SourceCode
-from .platform_generator import generate_platform, generate_stepping_stones
+from src.core.systems import ai_system, movement_system
+from src.core.world import World
+from .chunks import ChunkParams, ChunkWorker, LevelChunk, build_chunk
+from .spatial_index import SpatialIndex
+from .track import EntityTrack
 
 logger = get_logger()
 
 class LevelGenerator:
-    def __init__(self, screen_width: int, screen_height: int):
+    """Procedurally generated, endlessly scrolling level.
+
+    Blocks and source codes are placed in world coordinates and never move. Scrolling
+    advances camera_x, and screen coordinates are world coordinates minus camera_x.
+    Every entity lives in an archetype store in world, and the Block and SourceCode
+    objects held by the tracks and the spatial index are views over it. Culled and
+    collected views go back to a pool per class and are reused for the next entities
+    added. Enemies have no views; the systems move them in batch each update.
+
+    The level is generated in fixed-width chunks, each from its own random stream
+    derived from the level seed, so a level is reproducible from its seed. A worker
+    thread builds upcoming chunks ahead of time and the game thread only splices them in.
+    """
+
+    def __init__(self, screen_width: int, screen_height: int, seed: Optional[int] = None, use_worker: bool = True):
         self.screen_width = screen_width
         self.screen_height = screen_height
-        self.blocks = []
-        self.source_codes = []
-        self.scroll_speed = get_config("level", "scroll_speed")
-        self.floor_height = get_config("level", "floor_height")
-        self.hole_chance = get_config("level", "hole_chance")
-        self.hole_min_width = get_config("level", "hole_min_width")
-        self.hole_max_width = get_config("level", "hole_max_width")
-        self.platform_chance = get_config("level", "platform_chance")
-        self.min_platform_height = get_config("level", "min_platform_height")
-        self.max_platform_height = get_config("level", "max_platform_height")
-        self.max_jump_distance = get_config("level", "max_jump_distance")
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        if not -2**63 <= self.seed < 2**63:
+            # Snapshots store the seed in 64 bits; seeds that fit are kept as they are, so their levels stay the same.
+            self.seed %= 2**63
+        self.rng = random.Random(f"{self.seed}/level")
+        self.world = World()
+        self.block_pool = EntityPool(Block, self.world)
+        self.source_code_pool = EntityPool(SourceCode, self.world)
+        self.blocks = EntityTrack()
+        self.source_codes = EntityTrack()
+        self.index = SpatialIndex()
+        self.chunks: deque[LevelChunk] = deque()
+        self.camera_x = 0.0
+        self.prev_camera_x = 0.0
+        self.next_chunk = 0
         self.last_platform_end = 0
+        self.worker: Optional[ChunkWorker] = None
+        self.use_worker = use_worker
+        self.read_config(current_config())
+        logger.info("Generating level with seed %d", self.seed)
         self.generate_initial_level()
+        self.start_worker()
+
+    def read_config(self, config: Config) -> None:
+        self.config_version = config.version
+        self.params = ChunkParams.from_config(config, self.screen_width, self.screen_height)
+        self.enemy_params = EnemyParams.from_config(config)
+        self.scroll_speed = config.level.scroll_speed
+        self.floor_height = self.params.floor_height
+        self.max_jump_distance = self.params.max_jump_distance
+        self.min_source_codes = config.level.min_source_codes
+        self.pregenerate_chunks = config.level.pregenerate_chunks
+
+    def apply_config(self, config: Config) -> None:
+        """Use a new config for scrolling and for every chunk not spliced in yet.
+
+        The worker is only restarted if the chunks it builds would come out differently.
+        """
+        params, pregenerate_chunks = self.params, self.pregenerate_chunks
+        self.read_config(config)
+        if self.params != params or self.pregenerate_chunks != pregenerate_chunks:
+            self.close()
+            self.start_worker()
+
+    def start_worker(self) -> None:
+        self.worker = None
+        if self.use_worker and self.pregenerate_chunks > 0:
+            self.worker = ChunkWorker(self.seed, self.params, self.next_chunk, self.pregenerate_chunks)
+            self.worker_finalizer = weakref.finalize(self, self.worker.stop)
 
     def generate_initial_level(self) -> None:
-        self.generate_floor(0, self.screen_width * 2)
-        for _ in range(get_config("level", "min_blocks")):
-            self.add_new_platform()
-        for _ in range(get_config("level", "min_source_codes")):
-            self.add_new_source_code()
+        self.add_new_objects()
 
-    def generate_floor(self, start_x: int, end_x: int) -> None:
-        x = start_x
-        while x < end_x:
-            if random.random() < self.hole_chance:
-                hole_width = random.randint(self.hole_min_width, min(self.hole_max_width, self.max_jump_distance // 2))
-                x += hole_width
-            else:
-                block_width = random.randint(100, 300)
-                self.blocks.append(Block(x, self.screen_height - self.floor_height, block_width, self.floor_height))
-                x += block_width
-        self.last_platform_end = max(self.last_platform_end, end_x)
-
-    def add_new_platform(self) -> None:
-        x, y, width, height = generate_platform(self.screen_width, self.last_platform_end, self.min_platform_height, self.max_platform_height, self.max_jump_distance)
-        self.blocks.append(Block(x, y, width, height))
-        self.last_platform_end = x + width
-
-        # Add stepping stones
-        new_stones = generate_stepping_stones(x, y, width, self.max_jump_distance)
-        self.blocks.extend(new_stones)
-        if new_stones:
-            self.last_platform_end = max(self.last_platform_end, new_stones[-1].rect.right)
-
-        # Add source code near the platform
-        if random.random() < 0.5:
-            self.add_new_source_code(x, y, width)
-
-    def add_new_source_code(self, platform_x: int = None, platform_y: int = None, platform_width: int = None) -> None:
-        if platform_x is None:
-            x = max(self.screen_width, self.last_platform_end + random.randint(50, 100))
-            y = random.randint(50, self.screen_height - self.floor_height - 50)
-        else:
-            x = platform_x + random.randint(0, platform_width)
-            y = platform_y - random.randint(50, 100)
+    def splice_chunk(self, chunk: LevelChunk) -> None:
+        """Add a generated chunk's blocks and source codes to the level."""
+        if chunk.end_x <= self.last_platform_end:
+            # add_new_objects splices chunks until the level reaches past the view, so one
+            # that does not extend it would keep the game thread splicing forever.
+            raise ValueError(f"chunk {chunk.index} ends at {chunk.end_x}, not past the level's end at "
+                             f"{self.last_platform_end}; is chunk_width positive?")
+        for x, y, width, height in chunk.blocks:
+            self.add_block(self.block_pool.acquire(x, y, width, height))
+        for x, y in chunk.source_codes:
+            self.add_source_code(x, y)
+        for kind, x, y in chunk.enemies:
+            spawn_enemy(self.world, kind, x, y, self.enemy_params)
+        self.chunks.append(chunk)
+        self.next_chunk = chunk.index + 1
+        self.last_platform_end = max(self.last_platform_end, chunk.end_x)
+
+    def close(self) -> None:
+        """Stop the background chunk worker."""
+        if self.worker is not None:
+            # Detach its finalizer too, or every restart would leave one keeping a stopped worker alive.
+            self.worker_finalizer.detach()
+            self.worker.stop()
+            self.worker = None
+
+    @property
+    def view_right(self) -> int:
+        """World x coordinate of the right edge of the screen."""
+        return math.ceil(self.camera_x) + self.screen_width
 
-        if not any(block.rect.collidepoint(x, y) for block in self.blocks):
-            self.source_codes.append(SourceCode(x, y))
+    def to_world(self, rect: pygame.Rect) -> pygame.Rect:
+        """Convert a screen rect to the smallest world rect that covers it."""
+        left = math.floor(rect.left + self.camera_x)
+        right = math.ceil(rect.right + self.camera_x)
+        return pygame.Rect(left, rect.top, right - left, rect.height)
+
+    def to_screen(self, rect: pygame.Rect) -> pygame.Rect:
+        """Convert a world rect to screen coordinates for drawing."""
+        return rect.move(-int(self.camera_x), 0)
+
+    def add_block(self, block: Block) -> None:
+        self.blocks.add(block)
+        self.index.insert(block)
+
+    def add_source_code(self, x: int, y: int) -> None:
+        self.source_codes.add(self.source_code_pool.acquire(x, y, self.params.source_code_width,
+                                                            self.params.source_code_height))
+
+    def allocation_counts(self) -> dict[str, int]:
+        """How many entity objects the pools have constructed and reused, and how often the stores grew."""
+        return {
+            "blocks_allocated": self.block_pool.allocated,
+            "blocks_reused": self.block_pool.reused,
+            "source_codes_allocated": self.source_code_pool.allocated,
+            "source_codes_reused": self.source_code_pool.reused,
+            "store_grows": sum(store.grows for store in self.world.stores.values()),
+        }
+
+    @property
+    def allocated(self) -> int:
+        """Entity objects constructed so far, across both pools."""
+        return self.block_pool.allocated + self.source_code_pool.allocated
+
+    def blocks_in_rect(self, rect: pygame.Rect) -> list:
+        """Blocks overlapping the given screen rect, with rects in world coordinates."""
+        return self.index.query_rect(self.to_world(rect))
+
+    def blocks_near_x(self, x: float, radius: float) -> list:
+        """Blocks whose centre is within radius of the given world x coordinate."""
+        return self.index.query_x(x, radius)
+
+    def source_codes_in_rect(self, rect: pygame.Rect) -> list:
+        """Source codes overlapping the given screen rect, with rects in world coordinates."""
+        store = self.world.store(SOURCE_CODE)
+        return store.views_of(store.overlapping(self.to_world(rect)))
+
+    def add_new_source_code(self) -> None:
+        x = max(self.view_right, self.last_platform_end + self.rng.randint(50, 100))
+        y = self.rng.randint(50, self.screen_height - self.floor_height - 50)
+
+        if not self.index.query_point(x, y):
+            self.add_source_code(x, y)
         else:
             # If the position is occupied, try to place it above the highest nearby platform
-            nearby_platforms = [b for b in self.blocks if abs(b.rect.centerx - x) < self.max_jump_distance]
+            nearby_platforms = self.blocks_near_x(x, self.max_jump_distance)
             if nearby_platforms:
                 highest_platform = min(nearby_platforms, key=lambda b: b.rect.top)
-                y = highest_platform.rect.top - get_config("source_code", "height") - 10
-                self.source_codes.append(SourceCode(x, y))
+                y = highest_platform.rect.top - self.params.source_code_height - 10
+                self.add_source_code(x, y)
 
     def update(self) -> None:
         self.scroll_level()
+        ai_system(self.world)
+        movement_system(self.world)
         self.remove_offscreen_objects()
         self.add_new_objects()
 
     def scroll_level(self) -> None:
-        for block in self.blocks:
-            block.rect.x -= self.scroll_speed
-        for source_code in self.source_codes:
-            source_code.rect.x -= self.scroll_speed
-        self.last_platform_end -= self.scroll_speed
+        self.prev_camera_x = self.camera_x
+        self.camera_x += self.scroll_speed
+
+    def camera_at(self, alpha: float) -> float:
+        """The camera position interpolated between the last two updates."""
+        return self.prev_camera_x + (self.camera_x - self.prev_camera_x) * alpha
 
     def remove_offscreen_objects(self) -> None:
-        self.blocks = [block for block in self.blocks if block.rect.right > 0]
-        self.source_codes = [sc for sc in self.source_codes if sc.rect.right > 0]
+        culled_blocks = self.blocks.cull(self.camera_x)
+        for block in culled_blocks:
+            self.index.remove(block)
+        self.block_pool.recycle(culled_blocks)
+        self.source_code_pool.recycle(self.source_codes.cull(self.camera_x))
+        self.world.cull(self.camera_x, ENEMIES)
+        while self.chunks and self.chunks[0].right <= self.camera_x:
+            self.chunks.popleft()
 
     def add_new_objects(self) -> None:
-        while self.last_platform_end < self.screen_width * 1.5:
-            if random.random() < self.platform_chance:
-                self.add_new_platform()
+        while self.last_platform_end < self.camera_x + self.screen_width * 1.5:
+            if self.worker is not None:
+                self.splice_chunk(self.worker.next_chunk(self.next_chunk))
             else:
-                self.generate_floor(self.last_platform_end, self.last_platform_end + self.screen_width)
-        while len(self.source_codes) < get_config("level", "min_source_codes"):
+                self.splice_chunk(build_chunk(self.seed, self.next_chunk, self.params))
+        while len(self.source_codes) < self.min_source_codes:
             self.add_new_source_code()
 
+    def visible_rects(self, kind: int, camera_x: Optional[float] = None, margin: float = 0.0) -> list:
+        """Screen rects, as [x, y, w, h] lists, of the entities of a kind that are in view.
+
+        Entities only within margin pixels of either side of the view are left out.
+        """
+        camera_x = self.camera_x if camera_x is None else camera_x
+        store = self.world.stores.get(kind)
+        if store is None:
+            return []
+        rows = store.in_range(camera_x + margin, camera_x + self.screen_width - margin)
+        geometry = store.geometry[:, rows]
+        geometry[0] -= int(camera_x)
+        return geometry.T.tolist()
+
     def draw(self, screen: pygame.Surface) -> None:
-        for block in self.blocks:
-            pygame.draw.rect(screen, get_config("colors", "block") if block.rect.bottom < self.screen_height else get_config("colors", "floor"), block.rect)
-        for source_code in self.source_codes:
-            pygame.draw.rect(screen, get_config("colors", "source_code"), source_code.rect)
-            
+        colors = current_config().colors
+        for rect in self.visible_rects(BLOCK):
+            pygame.draw.rect(screen, colors.block if rect[1] + rect[3] < self.screen_height else colors.floor, rect)
+        for rect in self.visible_rects(SOURCE_CODE):
+            pygame.draw.rect(screen, colors.source_code, rect)
+        for kind, color in zip(ENEMIES, (colors.drm_drone, colors.spyware_spider, colors.patent_troll)):
+            for rect in self.visible_rects(kind):
+                pygame.draw.rect(screen, color, rect)
+
     def remove_source_code(self, source_code: SourceCode) -> None:
         self.source_codes.remove(source_code)
+        self.source_code_pool.recycle([source_code])
         logger.debug("Removed collected source code from the level")
\ No newline at end of file
@@ -0,0 +1,120 @@
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import numpy as np
+from src.config import Config
+from src.core.player import Player
+
+# Ticks a simulated jump may stay in the air. Building the tables takes time quadratic in
+# the length of a jump, so floaty physics are cut off here; at the default settings the
+# longest jump, a late double jump down a whole screen, lasts 126 ticks.
+MAX_JUMP_TICKS = 180
+
+class JumpPhysics(NamedTuple):
+    """The settings that decide how far and how high the player can jump."""
+
+    gravity: float
+    jump_strength: float
+    double_jump_strength: float
+    move_speed: float
+    scroll_speed: float
+    player_width: int
+    max_drop: int
+
+    @classmethod
+    def from_config(cls, config: Config, max_drop: int) -> "JumpPhysics":
+        return cls(
+            gravity=config.game.gravity,
+            jump_strength=config.player.jump_strength,
+            double_jump_strength=config.player.double_jump_strength,
+            move_speed=config.player.move_speed,
+            scroll_speed=config.level.scroll_speed,
+            player_width=config.player.width,
+            max_drop=max_drop,
+        )
+
+class JumpEnvelope:
+    """Lookup tables of how far the player can travel to land at each height.
+
+    For every whole-pixel rise from -max_drop (a drop) up to the highest point a
+    jump reaches, single[rise] and double[rise] hold the greatest horizontal world
+    distance covered before landing on a surface at that rise, or -1 where no jump
+    gets that high. Distances count the level scrolling under the player as well as
+    running at full speed. The tables are built by running Player.update for every
+    moment a double jump could be started, so they follow the real physics. Jumps are
+    followed for at most MAX_JUMP_TICKS, so with very low gravity the deepest drops
+    count as unreachable.
+    """
+
+    def __init__(self, physics: JumpPhysics):
+        """Simulate the jumps allowed by physics and build the tables."""
+        if physics.gravity <= 0:
+            raise ValueError(f"jumps never come down with a gravity of {physics.gravity}")
+        self.physics = physics
+        single = self._simulate(None)
+        trajectories = [single] + [self._simulate(tick) for tick in range(1, len(single[0]) - 1)]
+        self.max_rise = max(int(heights.max()) for heights, _ in trajectories)
+        self.single = self._table(trajectories[:1])
+        self.double = self._table(trajectories)
+
+    def _simulate(self, double_at: Optional[int]) -> tuple[np.ndarray, np.ndarray]:
+        """Heights and distances, tick by tick, of a jump that double jumps at tick double_at."""
+        physics = self.physics
+        player = Player(0, 0)
+        player.speed = physics.move_speed
+        player.jump_strength = physics.jump_strength
+        player.double_jump_strength = physics.double_jump_strength
+        player.on_ground = True
+        heights = [0.0]
+        distances = [0.0]
+        tick = 0
+        while heights[-1] > -physics.max_drop and tick < MAX_JUMP_TICKS:
+            player.move(1, -1 if tick in (0, double_at) else 0)
+            x = player.x
+            player.update(physics.gravity, [])
+            heights.append(-player.y)
+            distances.append(distances[-1] + player.x - x + physics.scroll_speed)
+            tick += 1
+        return np.array(heights), np.array(distances)
+
+    def _table(self, trajectories: list[tuple[np.ndarray, np.ndarray]]) -> np.ndarray:
+        """The furthest distance at which each rise is landed on over a set of trajectories."""
+        table = np.full(self.max_rise + self.physics.max_drop + 1, -1.0)
+        for heights, distances in trajectories:
+            for tick in range(1, len(heights)):
+                high, low = heights[tick - 1], heights[tick]
+                if low >= high:
+                    continue
+                # Descending through (low, high]: a surface there is landed on this tick.
+                first = max(int(np.floor(low)) + 1, -self.physics.max_drop)
+                last = min(int(np.floor(high)), self.max_rise)
+                if first <= last:
+                    rows = slice(first + self.physics.max_drop, last + self.physics.max_drop + 1)
+                    np.maximum(table[rows], distances[tick], out=table[rows])
+        return table
+
+    def max_distance(self, rise: float, double: bool = True) -> float:
+        """Furthest horizontal distance to a landing at the given rise, or -1 if it is too high."""
+        index = int(np.floor(rise)) + self.physics.max_drop
+        if index >= len(self.single):
+            return -1.0
+        table = self.double if double else self.single
+        return float(table[max(index, 0)])
+
+    def reachable(self, gap: float, rise: float, double: bool = True) -> bool:
+        """Whether a surface gap pixels ahead and rise pixels up can be landed on.
+
+        The player only needs to overlap a surface by one pixel to stand on it, so the
+        distance to cover is the gap less the player's width.
+        """
+        return gap - self.physics.player_width <= self.max_distance(rise, double)
+
+    def highest_rise(self, gap: float) -> Optional[int]:
+        """The highest rise at which a surface gap pixels ahead can be reached, or None if none can."""
+        rows = np.flatnonzero(self.double >= gap - self.physics.player_width)
+        return int(rows[-1]) - self.physics.max_drop if len(rows) else None
+
+@lru_cache(maxsize=8)
+def jump_envelope(physics: JumpPhysics) -> JumpEnvelope:
+    """The envelope for a set of physics settings, built once and shared."""
+    return JumpEnvelope(physics)
@@ -0,0 +1,77 @@
+import pygame
+from src.core.blocks import Block
+
+class SpatialIndex:
+    """Uniform grid of fixed-width x columns for looking up level blocks.
+
+    Blocks are bucketed by their world x extent and never move once placed, so the
+    index only changes when blocks are added or culled. All coordinates are world
+    coordinates.
+    """
+
+    def __init__(self, cell_width: int = 64):
+        """Initialize an empty index."""
+        self.cell_width = cell_width
+        self.cells: dict[int, list[Block]] = {}
+        self._entries: dict[Block, tuple[int, int, int]] = {}
+        self._next_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _cell_range(self, left: float, right: float) -> range:
+        """Columns covering the x interval [left, right)."""
+        first = int(left // self.cell_width)
+        last = int((right - 1) // self.cell_width)
+        return range(first, last + 1)
+
+    def insert(self, block: Block) -> None:
+        """Add a block at its position."""
+        cells = self._cell_range(block.rect.left, block.rect.right)
+        self._entries[block] = (cells.start, cells.stop, self._next_seq)
+        self._next_seq += 1
+        for cell in cells:
+            self.cells.setdefault(cell, []).append(block)
+
+    def ordered(self) -> list[Block]:
+        """Every block, in the order they were inserted."""
+        return sorted(self._entries, key=lambda block: self._entries[block][2])
+
+    def clear(self) -> None:
+        """Remove every block."""
+        self.cells.clear()
+        self._entries.clear()
+        self._next_seq = 0
+
+    def remove(self, block: Block) -> None:
+        """Remove a block from the index."""
+        start, stop, _ = self._entries.pop(block)
+        for cell in range(start, stop):
+            bucket = self.cells[cell]
+            bucket.remove(block)
+            if not bucket:
+                del self.cells[cell]
+
+    def _candidates(self, left: float, right: float) -> list[Block]:
+        """Blocks in the columns covering [left, right), in insertion order."""
+        found: dict[Block, int] = {}
+        for cell in self._cell_range(left, right):
+            for block in self.cells.get(cell, ()):
+                found[block] = self._entries[block][2]
+        if len(found) < 2:
+            return list(found)
+        return sorted(found, key=found.__getitem__)
+
+    def query_rect(self, rect: pygame.Rect) -> list[Block]:
+        """Blocks overlapping the given rect."""
+        return [block for block in self._candidates(rect.left, rect.right)
+                if block.rect.colliderect(rect)]
+
+    def query_point(self, x: int, y: int) -> list[Block]:
+        """Blocks containing the given point."""
+        return [block for block in self._candidates(x, x + 1) if block.rect.collidepoint(x, y)]
+
+    def query_x(self, x: float, radius: float) -> list[Block]:
+        """Blocks whose centre lies strictly within radius of the x coordinate."""
+        return [block for block in self._candidates(x - radius, x + radius)
+                if abs(block.rect.centerx - x) < radius]
@@ -0,0 +1,99 @@
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterator, Optional, Sequence
+
+class EntityTrack:
+    """Level entities kept in world coordinates, ordered by the left edge of their rect.
+
+    The camera only ever moves right, so culling is a head pointer that advances over
+    the entities that have scrolled past the left edge of the view. Removing an entity
+    leaves a None tombstone in its slot, found by bisection, so removal never shifts the
+    list. Entities before the head and tombstones are dropped in one pass once enough
+    of them have built up.
+    """
+
+    COMPACT_THRESHOLD = 64
+
+    def __init__(self) -> None:
+        """Initialize an empty track."""
+        self.items: list[Any] = []
+        self._lefts: list[float] = []
+        self.head = 0
+        self.tombstones = 0
+
+    def __len__(self) -> int:
+        return len(self.items) - self.head - self.tombstones
+
+    def __iter__(self) -> Iterator[Any]:
+        items = self.items
+        for i in range(self.head, len(items)):
+            if items[i] is not None:
+                yield items[i]
+
+    def __contains__(self, item: Any) -> bool:
+        return self._find(item) is not None
+
+    def _find(self, item: Any) -> Optional[int]:
+        left = item.left
+        i = bisect_left(self._lefts, left, lo=self.head)
+        while i < len(self.items) and self._lefts[i] == left:
+            if self.items[i] is item:
+                return i
+            i += 1
+        return None
+
+    def add(self, item: Any) -> None:
+        """Insert an entity in order of its left edge."""
+        left = item.left
+        i = bisect_right(self._lefts, left, lo=self.head)
+        self._lefts.insert(i, left)
+        self.items.insert(i, item)
+
+    def remove(self, item: Any) -> None:
+        """Remove an entity, raising ValueError if it is not in the track."""
+        i = self._find(item)
+        if i is None:
+            raise ValueError("entity is not in the track")
+        self.items[i] = None
+        self.tombstones += 1
+        if self.tombstones >= self.COMPACT_THRESHOLD and self.tombstones * 2 >= len(self.items) - self.head:
+            self._compact()
+
+    def cull(self, left: float) -> Sequence[Any]:
+        """Drop entities from the front whose right edge is at or before the world x given.
+
+        Culling stops at the first entity still in view, so a narrow entity behind a wide
+        one is dropped a little later. Returns the culled entities, or an empty tuple if
+        there were none.
+        """
+        items = self.items
+        start = self.head
+        while self.head < len(items) and (items[self.head] is None or items[self.head].right <= left):
+            self.head += 1
+        if self.head == start:
+            return ()
+        culled = [item for item in items[start:self.head] if item is not None]
+        self.tombstones -= self.head - start - len(culled)
+        if self.head >= self.COMPACT_THRESHOLD and self.head * 2 >= len(items):
+            self._compact()
+        return culled
+
+    def _compact(self) -> None:
+        """Drop the entities before the head and the tombstones."""
+        keep = [i for i in range(self.head, len(self.items)) if self.items[i] is not None]
+        self.items = [self.items[i] for i in keep]
+        self._lefts = [self._lefts[i] for i in keep]
+        self.head = 0
+        self.tombstones = 0
+
+    def replace(self, items: list[Any]) -> None:
+        """Hold exactly the given entities, which must already be in order of their left edge."""
+        self.items = items
+        self._lefts = [item.left for item in items]
+        self.head = 0
+        self.tombstones = 0
+
+    def in_range(self, left: float, right: float) -> list[Any]:
+        """Entities overlapping the world x interval (left, right)."""
+        items = self.items
+        end = bisect_left(self._lefts, right, lo=self.head)
+        return [items[i] for i in range(self.head, end) if items[i] is not None and items[i].right > left]
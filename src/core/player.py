@@ -1,29 +1,50 @@
+import math
+from typing import Optional
+
 import pygame
 from src.logging import get_logger
-from src.config import get_config
+from src.config import Config, current_config
+from src.core.entity_store import PLAYER, geometry_of
+from src.core.world import World
 
 logger = get_logger()
 
+# Most blocks the player can hit in a single update.
+MAX_CONTACTS = 4
+# Fraction of a move by which the player may already be past a block's edge and still hit it.
+CONTACT_EPSILON = 1e-9
+
 class Player:
-    def __init__(self, x: float = get_config("player", "initial_x"), y: float = get_config("player", "initial_y")):
-        self.x = x
-        self.y = y
-        self.width = get_config("player", "width")
-        self.height = get_config("player", "height")
-        self.speed = get_config("player", "move_speed")
-        self.jump_strength = get_config("player", "jump_strength")
-        self.double_jump_strength = get_config("player", "double_jump_strength")
+    def __init__(self, x: Optional[float] = None, y: Optional[float] = None, world: Optional[World] = None):
+        """Initialize the player. Given a world, its position is mirrored there for the systems to read."""
+        config = current_config()
+        self.x = x if x is not None else config.player.initial_x
+        self.y = y if y is not None else config.player.initial_y
+        self.prev_x = self.x
+        self.prev_y = self.y
+        self.apply_config(config)
         self.freedom = 0
-        self.liberty_shields = get_config("player", "initial_liberty_shields")
+        self.liberty_shields = config.player.initial_liberty_shields
         self.velocity_x = 0
         self.velocity_y = 0
         self.on_ground = False
         self.can_double_jump = False
         self.invincible = False
         self.invincible_timer = 0
-        self.invincible_duration = get_config("player", "invincible_duration")
-        self.flash_interval = get_config("player", "flash_interval")
         self.visible = True
+        # The player's own physics stay per object; the world only holds a copy of its rect.
+        self.store = world.store(PLAYER) if world is not None else None
+        self.row = self.store.add(self.x, self.y, self.width, self.height) if self.store is not None else -1
+
+    def apply_config(self, config: Config) -> None:
+        """Take the player's tunable values from a config, leaving its state alone."""
+        self.width = config.player.width
+        self.height = config.player.height
+        self.speed = config.player.move_speed
+        self.jump_strength = config.player.jump_strength
+        self.double_jump_strength = config.player.double_jump_strength
+        self.invincible_duration = config.player.invincible_duration
+        self.flash_interval = config.player.flash_interval
 
     def move(self, dx: float, dy: float) -> None:
         self.velocity_x = dx * self.speed
@@ -49,13 +70,20 @@ class Player:
             self.velocity_y *= 0.5  # Reduce upward velocity when jump is released
         logger.debug("Player ended jump")
 
-    def update(self, gravity: float, blocks: list) -> None:
+    def update(self, gravity: float, blocks: list, offset_x: float = 0.0, scroll: float = 0.0) -> None:
+        """Advance one tick, colliding with blocks offset_x ahead of the player's x.
+
+        scroll is how far the level scrolls this tick, which moves the blocks towards
+        the player as it moves.
+        """
+        self.prev_x = self.x
+        self.prev_y = self.y
         self.velocity_y += gravity
-        self.x += self.velocity_x
-        self.y += self.velocity_y
 
         self.on_ground = False
-        self.check_collision(blocks)
+        self.move_and_collide(blocks, offset_x, scroll)
+        if self.store is not None:
+            self.store.geometry[:, self.row] = (self.x + offset_x + scroll, self.y, self.width, self.height)
 
         # Apply friction
         self.velocity_x *= 0.9
@@ -72,45 +100,110 @@ class Player:
                 self.visible = True
                 self.invincible_timer = 0
 
-    def check_collision(self, blocks: list) -> None:
-        for block in blocks:
-            if self.x < block.rect.right and self.x + self.width > block.rect.left and \
-               self.y < block.rect.bottom and self.y + self.height > block.rect.top:
-                
-                # Collision from above
-                if self.velocity_y > 0 and self.y + self.height - self.velocity_y <= block.rect.top:
-                    self.y = block.rect.top - self.height
-                    self.velocity_y = 0
-                    self.on_ground = True
-                # Collision from below
-                elif self.velocity_y < 0 and self.y - self.velocity_y >= block.rect.bottom:
-                    self.y = block.rect.bottom
-                    self.velocity_y = 0
-                # Collision from left
-                elif self.velocity_x > 0 and self.x + self.width - self.velocity_x <= block.rect.left:
-                    self.x = block.rect.left - self.width
-                    self.velocity_x = 0
-                # Collision from right
-                elif self.velocity_x < 0 and self.x - self.velocity_x >= block.rect.right:
-                    self.x = block.rect.right
+    def sweep_rect(self, gravity: float, scroll: float = 0.0) -> pygame.Rect:
+        """Bounds of the player over its next update, for gathering collision candidates."""
+        next_vy = self.velocity_y + gravity
+        dx = self.velocity_x + scroll
+        left = min(self.x, self.x + dx)
+        top = min(self.y, self.y + next_vy)
+        width = self.width + abs(dx)
+        height = self.height + abs(next_vy)
+        return pygame.Rect(int(left) - 1, int(top) - 1, int(width) + 3, int(height) + 3)
+
+    def move_and_collide(self, blocks: list, offset_x: float = 0.0, scroll: float = 0.0) -> None:
+        """Move by the velocity, stopping against blocks whose rects are offset_x ahead of the player's x.
+
+        Relative to the blocks the player moves velocity_x + scroll across, and is then
+        moved back by scroll on screen as the level scrolls. The move is swept: each
+        block is hit at its time of impact however fast the player goes, on the axis
+        whose edge it crossed last, so a corner is landed on rather than snagged on. After
+        a hit the rest of the move carries on along the other axis, up to MAX_CONTACTS
+        hits. Blocks the player already overlaps are ignored so it cannot get stuck.
+        """
+        x, y = self.x, self.y
+        width, height = self.width, self.height
+        dx = self.velocity_x + scroll
+        dy = self.velocity_y
+        boxes = []
+        for left, top, block_width, block_height in geometry_of(blocks):
+            left -= offset_x
+            right = left + block_width
+            bottom = top + block_height
+            if not (x < right and x + width > left and y < bottom and y + height > top):
+                boxes.append((left, top, right, bottom))
+
+        for _ in range(MAX_CONTACTS):
+            if not boxes or (dx == 0 and dy == 0):
+                break
+            hit_time = 1.0
+            hit = None
+            hit_x = False
+            for box in boxes:
+                left, top, right, bottom = box
+                if dx > 0:
+                    x_entry, x_exit = (left - x - width) / dx, (right - x) / dx
+                elif dx < 0:
+                    x_entry, x_exit = (right - x) / dx, (left - x - width) / dx
+                elif x < right and x + width > left:
+                    x_entry, x_exit = -math.inf, math.inf
+                else:
+                    continue
+                if dy > 0:
+                    y_entry, y_exit = (top - y - height) / dy, (bottom - y) / dy
+                elif dy < 0:
+                    y_entry, y_exit = (bottom - y) / dy, (top - y - height) / dy
+                elif y < bottom and y + height > top:
+                    y_entry, y_exit = -math.inf, math.inf
+                else:
+                    continue
+                entry = max(x_entry, y_entry)
+                # Ties go to the vertical edge, so landing wins at a corner.
+                if -CONTACT_EPSILON <= entry < hit_time and entry < min(x_exit, y_exit):
+                    hit_time = max(entry, 0.0)
+                    hit = box
+                    hit_x = x_entry > y_entry
+
+            if hit is None:
+                break
+            boxes.remove(hit)
+            left, top, right, bottom = hit
+            x += dx * hit_time
+            y += dy * hit_time
+            if hit_x:
+                x = left - width if dx > 0 else right
+                if self.velocity_x * dx > 0:
                     self.velocity_x = 0
+                dx = 0
+                dy *= 1 - hit_time
+            else:
+                if dy > 0:
+                    y = top - height
+                    self.on_ground = True
+                else:
+                    y = bottom
+                self.velocity_y = 0
+                dy = 0
+                dx *= 1 - hit_time
+
+        self.x = x + dx - scroll
+        self.y = y + dy
 
-    def collect_source_code(self) -> None:
-        self.freedom += 1
-        logger.info(f"Player collected source code. Freedom: {self.freedom}")
+    def collect_source_code(self, value: int = 1) -> None:
+        self.freedom += value
+        logger.debug("Player collected source code. Freedom: %d", self.freedom)
 
-    def lose_shield(self) -> None:
+    def lose_shield(self, count: int = 1) -> None:
         if not self.invincible:
-            self.liberty_shields -= 1
+            self.liberty_shields -= count
             self.invincible = True
             self.invincible_timer = 0
-            logger.info(f"Player lost a shield. Remaining shields: {self.liberty_shields}")
+            logger.info("Player lost a shield. Remaining shields: %d", self.liberty_shields)
 
     def teleport(self, new_x: float, new_y: float) -> None:
-        self.x = new_x
-        self.y = new_y
+        self.x = self.prev_x = new_x
+        self.y = self.prev_y = new_y
         self.velocity_x = 0
         self.velocity_y = 0
         self.on_ground = False
         self.can_double_jump = False
-        logger.info(f"Player teleported to x={self.x}, y={self.y}")
\ No newline at end of file
+        logger.debug("Player teleported to x=%.1f, y=%.1f", self.x, self.y)
\ No newline at end of file
@@ -1,9 +1,15 @@
-import pygame
-from src.config import get_config
+from typing import Optional
 
-class SourceCode:
-    def __init__(self, x: int, y: int):
-        self.rect = pygame.Rect(x, y, get_config("source_code", "width"), get_config("source_code", "height"))
+from src.config import current_config
+from src.core.entity_store import SOURCE_CODE, EntityView
+from src.core.world import World
 
-    def collide(self, player_rect: pygame.Rect) -> bool:
-        return self.rect.colliderect(player_rect)
\ No newline at end of file
+class SourceCode(EntityView):
+    __slots__ = ()
+
+    KIND = SOURCE_CODE
+    DEFAULTS = {"pickup": 1}
+
+    def __init__(self, x: int, y: int, world: Optional[World] = None):
+        config = current_config()
+        super().__init__(x, y, config.source_code.width, config.source_code.height, world)
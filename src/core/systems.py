@@ -0,0 +1,84 @@
+"""Systems that update the entities of a World in batch, one archetype at a time.
+
+Each system asks the world for the stores with the components it works on and
+updates their columns with array operations, so the cost per frame grows with the
+number of archetypes rather than with the number of entities. Rows of released
+entities are updated along with live ones; that is harmless, because adding an
+entity overwrites every column of its row, and cheaper than masking them out.
+"""
+
+from typing import Any, Optional
+
+import numpy as np
+import pygame
+from src.core.world import World
+
+def player_center(world: World) -> Optional[tuple[float, float]]:
+    """The world position of the centre of the first live entity with the player tag."""
+    for store in world.query("player"):
+        rows = np.flatnonzero(store.alive[:store.size])
+        if rows.size:
+            x, y, w, h = store.geometry[:, rows[0]].tolist()
+            return x + w / 2, y + h / 2
+    return None
+
+def ai_system(world: World) -> None:
+    """Steer enemies: hover around their anchor, patrol to its right, or chase the player."""
+    for store in world.query("hover", "anchor"):
+        size = store.size
+        amplitude, period, phase = store.columns["hover"][:, :size]
+        phase += 1
+        np.remainder(phase, period, out=phase)
+        store.geometry[1, :size] = store.columns["anchor"][1, :size] + amplitude * np.sin(2 * np.pi * phase / period)
+
+    for store in world.query("patrol", "anchor", "velocity"):
+        size = store.size
+        x, _, w, _ = store.geometry[:, :size]
+        left = store.columns["anchor"][0, :size]
+        right = left + store.columns["patrol"][0, :size]
+        vx = store.columns["velocity"][0, :size]
+        turn = ((x <= left) & (vx < 0)) | ((x + w >= right) & (vx > 0))
+        np.negative(vx, out=vx, where=turn)
+
+    chasers = world.query("chase", "velocity")
+    target = player_center(world) if chasers else None
+    if target is None:
+        return
+    for store in chasers:
+        size = store.size
+        x, _, w, _ = store.geometry[:, :size]
+        speed = store.columns["chase"][0, :size]
+        np.clip(target[0] - (x + w / 2), -speed, speed, out=store.columns["velocity"][0, :size])
+
+def movement_system(world: World) -> None:
+    """Move every entity with a velocity by one tick of it."""
+    for store in world.query("velocity"):
+        size = store.size
+        store.geometry[:2, :size] += store.columns["velocity"][:, :size]
+
+def collision_system(world: World, rect: pygame.Rect) -> float:
+    """The total hazard of the live entities overlapping the world rect given."""
+    damage = 0.0
+    for store in world.query("hazard"):
+        rows = store.overlapping(rect)
+        if rows.size:
+            damage += float(store.columns["hazard"][0, rows].sum())
+    return damage
+
+def pickup_system(world: World, rect: pygame.Rect) -> tuple[float, list[Any]]:
+    """Collect the pickups overlapping the world rect given.
+
+    Entities without a view are released here. Those with one are left for the owner
+    of the view to remove. Returns the total value collected and the views.
+    """
+    value = 0.0
+    collected = []
+    for store in world.query("pickup"):
+        rows = store.overlapping(rect)
+        if not rows.size:
+            continue
+        value += float(store.columns["pickup"][0, rows].sum())
+        views = store.views_of(rows)
+        collected.extend(view for view in views if view is not None)
+        store.release([row for row, view in zip(rows.tolist(), views) if view is None])
+    return value, collected
@@ -0,0 +1,66 @@
+from typing import Any, Iterable
+
+import numpy as np
+from src.core.entity_store import EntityStore
+
+class World:
+    """Every entity of a level, stored by archetype.
+
+    Each kind of entity has its own EntityStore, created the first time it is used.
+    Systems ask for the stores holding the components they need with query and work on
+    their columns in batch, so adding a kind of entity means adding an archetype, not
+    another special case in the game loop.
+    """
+
+    def __init__(self, capacity: int = 256):
+        """Initialize an empty world whose stores start with room for capacity entities."""
+        self.capacity = capacity
+        self.stores: dict[int, EntityStore] = {}
+        self._queries: dict[tuple[str, ...], list[EntityStore]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(store) for store in self.stores.values())
+
+    def store(self, kind: int) -> EntityStore:
+        """The store for a kind of entity, creating it if it does not exist yet."""
+        store = self.stores.get(kind)
+        if store is None:
+            store = self.stores[kind] = EntityStore(kind, self.capacity)
+            self._queries.clear()
+        return store
+
+    def spawn(self, kind: int, x: float, y: float, width: float, height: float, **values: Any) -> int:
+        """Add an entity with no view and return its row in its kind's store."""
+        return self.store(kind).add(x, y, width, height, **values)
+
+    def query(self, *components: str) -> list[EntityStore]:
+        """The stores whose entities have all the given components, in order of kind.
+
+        Results are cached until a new store is created, so systems can query every tick.
+        """
+        stores = self._queries.get(components)
+        if stores is None:
+            stores = self._queries[components] = [store for _, store in sorted(self.stores.items())
+                                                  if store.components.issuperset(components)]
+        return stores
+
+    def cull(self, left: float, kinds: Iterable[int]) -> int:
+        """Release the entities of the given kinds whose right edge is at or before the world x given.
+
+        Meant for kinds without views; entities with views are culled by whatever owns
+        the views. Returns the number released.
+        """
+        released = 0
+        for kind in kinds:
+            store = self.stores.get(kind)
+            if store is None or not len(store):
+                continue
+            x, _, w, _ = store.geometry[:, :store.size]
+            rows = np.flatnonzero((x + w <= left) & store.alive[:store.size])
+            store.release(rows)
+            released += rows.size
+        return released
+
+    def counts(self) -> dict[int, int]:
+        """Live entities per kind."""
+        return {kind: len(store) for kind, store in sorted(self.stores.items())}
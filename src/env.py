@@ -0,0 +1,276 @@
+"""Gym-style environments for driving GNU Dash from bots and training code.
+
+GNUDashEnv wraps a single headless game with reset(seed) and step(action). VectorEnv
+steps a batch of them, either in this process or spread over a pool of worker
+processes that write their observations into shared memory.
+"""
+
+import math
+import multiprocessing
+import random
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Optional, Sequence
+
+import numpy as np
+from src.logging import get_logger
+from src.core.entity_store import BLOCK, SOURCE_CODE
+from src.headless import HeadlessGNUDash
+
+logger = get_logger()
+
+# Controls held for each discrete action, as (left, right, jump).
+ACTIONS = (
+    (False, False, False),
+    (True, False, False),
+    (False, True, False),
+    (False, False, True),
+    (True, False, True),
+    (False, True, True),
+)
+# Player x, y, x velocity, y velocity, on ground, can double jump, shields, invincible.
+STATE_SIZE = 8
+
+class GNUDashEnv:
+    """A single game driven by discrete actions, with NumPy observations.
+
+    An observation is a float32 vector: the STATE_SIZE player values, normalised to
+    roughly [-1, 1], followed by a block occupancy grid and a source code occupancy
+    grid, each of grid_shape (rows, columns) flattened row by row. The grids span the
+    screen's height and grid columns of cell_width pixels, starting a quarter of the
+    way behind the player. The reward for a step is the freedom gained less the
+    shields lost. An episode ends at game over, or is truncated after max_steps.
+
+    Each step holds the action's controls for frame_skip simulation ticks. Nothing is
+    drawn and the level is generated on the calling thread.
+    """
+
+    def __init__(self, width: int = 800, height: int = 600, grid_shape: tuple[int, int] = (12, 16),
+                 cell_width: int = 32, max_steps: int = 10_000, frame_skip: int = 1):
+        """Initialize the environment. Call reset before the first step."""
+        self.width = width
+        self.height = height
+        self.grid_shape = grid_shape
+        self.cell_width = cell_width
+        self.max_steps = max_steps
+        self.frame_skip = frame_skip
+        self.action_count = len(ACTIONS)
+        self.observation_size = STATE_SIZE + 2 * grid_shape[0] * grid_shape[1]
+        self.rng = random.Random()
+        self.game: Optional[HeadlessGNUDash] = None
+        self.steps = 0
+
+    def reset(self, seed: Optional[int] = None) -> tuple[np.ndarray, dict[str, Any]]:
+        """Start a new game. A seed reseeds the sequence of level seeds for this and later resets."""
+        if seed is not None:
+            self.rng.seed(seed)
+        self.close()
+        level_seed = self.rng.randrange(2**32)
+        self.game = HeadlessGNUDash(self.width, self.height, restart_on_game_over=False, seed=level_seed,
+                                    level_worker=False)
+        self.steps = 0
+        return self.observe(), {"level_seed": level_seed}
+
+    def step(self, action: int) -> tuple[np.ndarray, float, bool, bool, dict[str, Any]]:
+        """Apply an action and return the observation, reward, terminated, truncated and info."""
+        scene = self.game.current_scene
+        player = scene.player
+        freedom, shields = player.freedom, player.liberty_shields
+        scene.set_input(*ACTIONS[action])
+        for _ in range(self.frame_skip):
+            scene.update()
+            if scene.game_over:
+                break
+        self.steps += 1
+        reward = float(player.freedom - freedom - (shields - player.liberty_shields))
+        terminated = scene.game_over
+        truncated = not terminated and self.steps >= self.max_steps
+        return self.observe(), reward, terminated, truncated, {"freedom": player.freedom, "steps": self.steps}
+
+    def observe(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Write the current observation into out, or a new array, and return it."""
+        if out is None:
+            out = np.empty(self.observation_size, dtype=np.float32)
+        scene = self.game.current_scene
+        player = scene.player
+        out[:STATE_SIZE] = (
+            player.x / self.width, player.y / self.height,
+            player.velocity_x / player.speed, player.velocity_y / player.jump_strength,
+            player.on_ground, player.can_double_jump,
+            player.liberty_shields / scene.config.player.initial_liberty_shields, player.invincible,
+        )
+        level = scene.level_generator
+        left = player.x + level.camera_x - self.grid_shape[1] // 4 * self.cell_width
+        self._rasterize(level.world, left, out[STATE_SIZE:].reshape(2, *self.grid_shape))
+        return out
+
+    def _rasterize(self, world, left: float, out: np.ndarray) -> None:
+        """Mark the grid cells overlapped by blocks and by source codes.
+
+        Only a few dozen entities are ever in range, so looping over them in Python and
+        filling whole cell ranges beats building per-cell masks with array operations.
+        """
+        out.fill(0.0)
+        rows_count, columns = self.grid_shape
+        cell_height = self.height / rows_count
+        cell_width = self.cell_width
+        for kind in (BLOCK, SOURCE_CODE):
+            store = world.store(kind)
+            rows = store.in_range(left, left + columns * cell_width)
+            for x, y, w, h in store.geometry[:, rows].T.tolist():
+                c0 = max(int((x - left) // cell_width), 0)
+                c1 = min(math.ceil((x + w - left) / cell_width), columns)
+                r0 = max(int(y // cell_height), 0)
+                r1 = min(math.ceil((y + h) / cell_height), rows_count)
+                if c0 < c1 and r0 < r1:
+                    out[kind, r0:r1, c0:c1] = 1.0
+
+    def close(self) -> None:
+        """Release the current game."""
+        if self.game is not None:
+            self.game.close()
+            self.game = None
+
+class VectorEnv:
+    """Steps num_envs GNUDashEnv instances as a batch.
+
+    With workers=0 the environments run in this process. Otherwise they are split
+    across that many worker processes, which read the actions from and write the
+    observations, rewards and done flags straight into shared memory, so a batch step
+    costs one short message to and from each worker. Environments that finish an
+    episode are reset automatically; the observation returned for them is the first
+    of the new episode, and the finished episode's info is returned keyed by index.
+    """
+
+    def __init__(self, num_envs: int, workers: int = 0, seed: Optional[int] = None, **env_kwargs: Any):
+        """Create the environments, seeding environment i with seed + i if a seed is given."""
+        self.num_envs = num_envs
+        self.seed = seed
+        probe = GNUDashEnv(**env_kwargs)
+        self.observation_size = probe.observation_size
+        self.action_count = probe.action_count
+
+        self.buffers: list[SharedMemory] = []
+        self.observations = self._array((num_envs, self.observation_size), np.float32)
+        self.rewards = self._array((num_envs,), np.float32)
+        self.terminated = self._array((num_envs,), np.bool_)
+        self.truncated = self._array((num_envs,), np.bool_)
+        self.actions = self._array((num_envs,), np.int64)
+
+        self.envs: list[GNUDashEnv] = []
+        self.processes: list[multiprocessing.process.BaseProcess] = []
+        self.connections: list[Any] = []
+        if workers <= 0:
+            self.envs = [probe] + [GNUDashEnv(**env_kwargs) for _ in range(num_envs - 1)]
+            return
+        context = multiprocessing.get_context("spawn")
+        bounds = np.linspace(0, num_envs, min(workers, num_envs) + 1).astype(int)
+        names = [buffer.name for buffer in self.buffers]
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            parent, child = context.Pipe()
+            process = context.Process(target=_worker, name=f"GNUDash-env-{start}", daemon=True,
+                                      args=(child, names, num_envs, int(start), int(stop), env_kwargs))
+            process.start()
+            child.close()
+            self.processes.append(process)
+            self.connections.append(parent)
+
+    def _array(self, shape: tuple[int, ...], dtype: type) -> np.ndarray:
+        buffer = SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+        self.buffers.append(buffer)
+        return np.ndarray(shape, dtype=dtype, buffer=buffer.buf)
+
+    def _seeds(self, seed: Optional[int]) -> list[Optional[int]]:
+        seed = self.seed if seed is None else seed
+        return [None if seed is None else seed + i for i in range(self.num_envs)]
+
+    def reset(self, seed: Optional[int] = None) -> np.ndarray:
+        """Reset every environment and return the batch of observations."""
+        seeds = self._seeds(seed)
+        if self.envs:
+            for i, env in enumerate(self.envs):
+                env.reset(seeds[i])
+                env.observe(self.observations[i])
+        else:
+            for connection in self.connections:
+                connection.send(("reset", seeds))
+            for connection in self.connections:
+                connection.recv()
+        self.terminated[:] = False
+        self.truncated[:] = False
+        return self.observations
+
+    def step(self, actions: Sequence[int]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict[int, dict]]:
+        """Apply one action per environment.
+
+        Returns the observations, rewards, terminated and truncated flags, and the
+        infos of the episodes that ended. The arrays are reused by the next step.
+        """
+        self.actions[:] = actions
+        if self.envs:
+            infos = _step_envs(self.envs, 0, self.observations, self.rewards, self.terminated, self.truncated,
+                               self.actions)
+        else:
+            for connection in self.connections:
+                connection.send(("step", None))
+            infos = {}
+            for connection in self.connections:
+                infos.update(connection.recv())
+        return self.observations, self.rewards, self.terminated, self.truncated, infos
+
+    def close(self) -> None:
+        """Stop the workers and free the shared memory."""
+        for env in self.envs:
+            env.close()
+        for connection in self.connections:
+            connection.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self.envs = []
+        self.connections = []
+        self.processes = []
+        for buffer in self.buffers:
+            buffer.close()
+            buffer.unlink()
+        self.buffers = []
+
+def _step_envs(envs: list[GNUDashEnv], start: int, observations: np.ndarray, rewards: np.ndarray,
+               terminated: np.ndarray, truncated: np.ndarray, actions: np.ndarray) -> dict[int, dict]:
+    """Step a run of environments whose rows start at start, resetting those that finish."""
+    infos = {}
+    for offset, env in enumerate(envs):
+        i = start + offset
+        _, rewards[i], terminated[i], truncated[i], info = env.step(int(actions[i]))
+        if terminated[i] or truncated[i]:
+            infos[i] = info
+            env.reset()
+        env.observe(observations[i])
+    return infos
+
+def _worker(connection: Any, names: list[str], num_envs: int, start: int, stop: int,
+            env_kwargs: dict[str, Any]) -> None:
+    buffers = [SharedMemory(name=name) for name in names]
+    observation_size = GNUDashEnv(**env_kwargs).observation_size
+    observations = np.ndarray((num_envs, observation_size), dtype=np.float32, buffer=buffers[0].buf)
+    rewards = np.ndarray((num_envs,), dtype=np.float32, buffer=buffers[1].buf)
+    terminated = np.ndarray((num_envs,), dtype=np.bool_, buffer=buffers[2].buf)
+    truncated = np.ndarray((num_envs,), dtype=np.bool_, buffer=buffers[3].buf)
+    actions = np.ndarray((num_envs,), dtype=np.int64, buffer=buffers[4].buf)
+    envs = [GNUDashEnv(**env_kwargs) for _ in range(start, stop)]
+    try:
+        while True:
+            command, seeds = connection.recv()
+            if command == "step":
+                connection.send(_step_envs(envs, start, observations, rewards, terminated, truncated, actions))
+            elif command == "reset":
+                for offset, env in enumerate(envs):
+                    env.reset(seeds[start + offset])
+                    env.observe(observations[start + offset])
+                connection.send(None)
+            else:
+                break
+    finally:
+        for env in envs:
+            env.close()
+        del observations, rewards, terminated, truncated, actions
+        for buffer in buffers:
+            buffer.close()
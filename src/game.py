@@ -1,37 +1,74 @@
 # ./src/game.py
 
+from typing import Optional
+
 import pygame
 from pygame.locals import (
     K_LEFT, K_RIGHT, K_UP, K_DOWN,
     K_a, K_d, K_w, K_s,
-    K_SPACE, K_ESCAPE,
+    K_SPACE, K_ESCAPE, K_BACKSPACE, K_r,
     KEYDOWN, KEYUP, MOUSEBUTTONDOWN, MOUSEBUTTONUP
 )
 from src.logging import get_logger
 from src.core.player import Player
+from src.components.level import LevelComponent
 from src.components.player import PlayerComponent
+from src.components.resources import get_resources
 from src.core.level_generator import LevelGenerator
-from src.config import get_config
+from src.config import Config, current_config
+from src.core.systems import collision_system, pickup_system
+from src.profiler import COLLISIONS, LEVEL, PLAYER, UPDATE, get_profiler
+from src.quality import FULL_QUALITY, QualityLevel
+from src.snapshot import Snapshots
 
 logger = get_logger()
 
 class Game:
-    def __init__(self, game):
+    def __init__(self, game, seed: Optional[int] = None, level_worker: bool = True):
         self.game = game
-        self.player = Player()
+        self.config = current_config()
+        self.level_generator = LevelGenerator(game.width, game.height, seed, level_worker)
+        self.player = Player(world=self.level_generator.world)
         self.player_component = PlayerComponent(self.player)
-        self.level_generator = LevelGenerator(game.width, game.height)
-        self.font = pygame.font.Font(None, get_config("fonts", "hud_size"))
+        self.level_component = LevelComponent(self.level_generator)
+        self.resources = get_resources()
+        self.profiler = get_profiler()
+        self.recorder = getattr(game, "recorder", None)
         self.paused = False
         self.game_over = False
         self.pause_menu = PauseMenu(self)
         self.move_left = False
         self.move_right = False
         self.jump_pressed = False
+        # Jump presses and releases since the last tick, kept so rewinding can play the tick again.
+        self.jump_log: list[bool] = []
+        self.last_dirty: Optional[list[pygame.Rect]] = None
+        self.frozen_drawn = False
+        self.rewinding = False
+        self.low_res: Optional[pygame.Surface] = None
+        self.hud_texts: Optional[tuple[pygame.Surface, pygame.Surface]] = None
+        self.hud_age = 0
+        self.falls = 0
+        rewind_ticks = getattr(game, "rewind_ticks", None)
+        if rewind_ticks is None:
+            rewind_ticks = int(self.config.game.rewind_seconds * self.config.game.tick_rate)
+        self.snapshots = Snapshots(rewind_ticks)
+        self.snapshots.set_checkpoint(self)
+
+    def resume(self, data: bytes) -> None:
+        """Carry on from a saved snapshot, which also becomes the checkpoint to restart from."""
+        self.snapshots.restore(self, data)
+        self.snapshots.set_checkpoint(self)
+        logger.info("Resumed a saved session with level seed %d", self.level_generator.seed)
 
     def handle_event(self, event: pygame.event.Event) -> None:
+        if self.recorder is not None:
+            self.recorder.record(event)
         if self.game_over:
-            if event.type == KEYDOWN or event.type == MOUSEBUTTONDOWN:
+            if event.type == KEYDOWN and event.key == K_r:
+                self.snapshots.restart(self)
+            elif event.type == KEYDOWN or event.type == MOUSEBUTTONDOWN:
+                self.close()
                 self.game.current_scene = Game(self.game)
             return
 
@@ -44,8 +81,11 @@ class Game:
                 elif event.key in (K_RIGHT, K_d):
                     self.move_right = True
                 elif event.key in (K_UP, K_w, K_SPACE):
-                    self.jump_pressed = True
-                    self.player.start_jump()
+                    self.set_jump(True)
+                elif event.key == K_BACKSPACE:
+                    self.rewinding = True
+                elif event.key == K_r:
+                    self.snapshots.restart(self)
                 elif event.key == K_ESCAPE:
                     self.toggle_pause()
             elif event.type == KEYUP:
@@ -54,21 +94,61 @@ class Game:
                 elif event.key in (K_RIGHT, K_d):
                     self.move_right = False
                 elif event.key in (K_UP, K_w, K_SPACE):
-                    self.jump_pressed = False
-                    self.player.end_jump()
+                    self.set_jump(False)
+                elif event.key == K_BACKSPACE:
+                    self.rewinding = False
             elif event.type == MOUSEBUTTONDOWN:
                 if event.button == 1:  # Left mouse button
-                    self.jump_pressed = True
-                    self.player.start_jump()
+                    self.set_jump(True)
             elif event.type == MOUSEBUTTONUP:
                 if event.button == 1:  # Left mouse button
-                    self.jump_pressed = False
-                    self.player.end_jump()
+                    self.set_jump(False)
+
+    def set_input(self, left: bool, right: bool, jump: bool) -> None:
+        """Hold or release the controls directly, as the key events would."""
+        self.move_left = left
+        self.move_right = right
+        if jump != self.jump_pressed:
+            self.set_jump(jump)
+
+    def set_jump(self, pressed: bool) -> None:
+        """Press or release jump."""
+        self.jump_pressed = pressed
+        self.jump_log.append(pressed)
+        if pressed:
+            self.player.start_jump()
+        else:
+            self.player.end_jump()
+
+    def apply_config(self, config: Config) -> None:
+        """Switch the scene to a reloaded config."""
+        self.config = config
+        self.player.apply_config(config)
+        self.level_generator.apply_config(config)
+        logger.info("Applied config version %d", config.version)
 
     def update(self) -> None:
+        if self.recorder is not None:
+            self.recorder.step(self)
+        config = current_config()
+        if config is not self.config:
+            self.apply_config(config)
+
         if self.game_over or self.paused:
             return
+        if self.rewinding:
+            self.snapshots.rewind(self)
+            self.jump_log.clear()
+            return
+
+        inputs = (self.move_left, self.move_right, tuple(self.jump_log))
+        self.jump_log.clear()
+        self.step(config)
+        if self.snapshots.capacity:
+            self.snapshots.save(self, inputs)
 
+    def step(self, config: Config) -> None:
+        """Advance the simulation one tick with the controls as they are held."""
         dx = 0
         if self.move_left:
             dx -= 1
@@ -76,70 +156,140 @@ class Game:
             dx += 1
         
         self.player.move(dx, -1 if self.jump_pressed else 0)
-        self.player.update(get_config("game", "gravity"), self.level_generator.blocks)
+        gravity = config.game.gravity
+        scroll = self.level_generator.scroll_speed
+        candidates = self.level_generator.blocks_in_rect(self.player.sweep_rect(gravity, scroll))
+        self.profiler.mark(UPDATE)
+        self.player.update(gravity, candidates, self.level_generator.camera_x, scroll)
+        self.profiler.mark(PLAYER)
         self.level_generator.update()
+        self.profiler.mark(LEVEL)
         self.check_collisions()
+        self.profiler.mark(COLLISIONS)
         self.keep_player_on_screen()
 
         if self.player.liberty_shields <= 0:
             self.game_over = True
-            logger.info(f"Game Over. Final Freedom Score: {self.player.freedom}")
+            logger.info("Game Over. Final Freedom Score: %d", self.player.freedom)
 
-    def draw(self, screen: pygame.Surface) -> None:
-        screen.fill(get_config("colors", "background"))
-        self.level_generator.draw(screen)
-        self.player_component.draw(screen)
-        self.draw_hud(screen)
+    def replay_tick(self, inputs: tuple[bool, bool, tuple[bool, ...]]) -> None:
+        """Play a tick again from the inputs Snapshots.save was given for it."""
+        self.move_left, self.move_right, jumps = inputs
+        for pressed in jumps:
+            self.jump_pressed = pressed
+            if pressed:
+                self.player.start_jump()
+            else:
+                self.player.end_jump()
+        self.step(self.config)
+
+    def draw(self, screen: pygame.Surface, alpha: float = 1.0) -> Optional[list[pygame.Rect]]:
+        """Draw the scene, returning the screen areas that changed or None if all of it did.
+
+        Moving objects are drawn alpha of the way between their last two updates. While
+        paused or game over nothing moves, so after the first frame the screen is left
+        as it is. How much is drawn follows the game's quality level, if it has one.
+        """
+        frozen = self.paused or self.game_over
+        if frozen and self.frozen_drawn:
+            return []
+
+        quality = self.quality_level()
+        scale = quality.render_scale
+        target = screen if scale == 1.0 else self.low_res_target(screen, scale)
+        target.fill(self.config.colors.background)
+        dirty = self.level_component.draw(target, alpha, quality.cull_margin, scale)
+        player_rect = self.player_component.draw(target, alpha, scale)
+        if player_rect is not None:
+            dirty.append(player_rect)
+        if target is not screen:
+            pygame.transform.scale(target, screen.get_size(), screen)
+        dirty.extend(self.draw_hud(screen, quality.hud_interval))
 
         if self.paused:
-            self.pause_menu.draw(screen)
+            self.pause_menu.draw(screen, quality.overlays)
         elif self.game_over:
-            self.draw_game_over(screen)
+            self.draw_game_over(screen, quality.overlays)
+
+        # Areas drawn last frame must be updated too, to clear what has moved away.
+        changed = None if frozen or self.frozen_drawn or self.last_dirty is None or target is not screen \
+            else dirty + self.last_dirty
+        self.frozen_drawn = frozen
+        self.last_dirty = dirty if target is screen else None
+        return changed
+
+    def invalidate(self) -> None:
+        """Draw the whole scene again on the next frame, over whatever was drawn on top of it."""
+        self.last_dirty = None
+        self.frozen_drawn = False
 
-    def draw_hud(self, screen: pygame.Surface) -> None:
-        freedom_text = self.font.render(f"Freedom: {self.player.freedom}", True, get_config("colors", "text"))
-        shields_text = self.font.render(f"Liberty Shields: {self.player.liberty_shields}", True, get_config("colors", "text"))
-        screen.blit(freedom_text, (10, 10))
-        screen.blit(shields_text, (10, 40))
+    def quality_level(self) -> QualityLevel:
+        """The level of detail to draw at, set by the game's quality governor."""
+        governor = getattr(self.game, "quality", None)
+        return governor.level if governor is not None else FULL_QUALITY
 
-    def draw_game_over(self, screen: pygame.Surface) -> None:
-        overlay = pygame.Surface((screen.get_width(), screen.get_height()), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 128))
-        screen.blit(overlay, (0, 0))
+    def low_res_target(self, screen: pygame.Surface, scale: float) -> pygame.Surface:
+        """The surface the level is drawn to at a scale below 1, before it is scaled up to the screen."""
+        size = (round(screen.get_width() * scale), round(screen.get_height() * scale))
+        if self.low_res is None or self.low_res.get_size() != size:
+            self.low_res = pygame.Surface(size).convert(screen)
+        return self.low_res
 
-        game_over_font = pygame.font.Font(None, get_config("fonts", "game_over_size"))
-        game_over_text = game_over_font.render("GAME OVER", True, get_config("colors", "text"))
-        score_text = self.font.render(f"Final Freedom Score: {self.player.freedom}", True, get_config("colors", "text"))
-        restart_text = self.font.render("Press any key to restart", True, get_config("colors", "text"))
+    def draw_hud(self, screen: pygame.Surface, interval: int = 1) -> list[pygame.Rect]:
+        """Draw the score and shields, refreshing their text only every interval frames."""
+        self.hud_age += 1
+        if self.hud_texts is None or self.hud_age >= interval:
+            size = self.config.fonts.hud_size
+            color = self.config.colors.text
+            self.hud_texts = (self.resources.text(size, f"Freedom: {self.player.freedom}", color),
+                              self.resources.text(size, f"Liberty Shields: {self.player.liberty_shields}", color))
+            self.hud_age = 0
+        freedom_text, shields_text = self.hud_texts
+        return [screen.blit(freedom_text, (10, 10)), screen.blit(shields_text, (10, 40))]
+
+    def draw_game_over(self, screen: pygame.Surface, overlay: bool = True) -> None:
+        if overlay:
+            screen.blit(self.resources.overlay(screen.get_size(), (0, 0, 0, 128)), (0, 0))
+
+        size = self.config.fonts.hud_size
+        color = self.config.colors.text
+        game_over_text = self.resources.text(self.config.fonts.game_over_size, "GAME OVER", color)
+        score_text = self.resources.text(size, f"Final Freedom Score: {self.player.freedom}", color)
+        restart_text = self.resources.text(size, "Press R to retry this level, or any other key for a new one", color)
 
         screen.blit(game_over_text, game_over_text.get_rect(center=(self.game.width // 2, self.game.height // 2 - 50)))
         screen.blit(score_text, score_text.get_rect(center=(self.game.width // 2, self.game.height // 2 + 20)))
         screen.blit(restart_text, restart_text.get_rect(center=(self.game.width // 2, self.game.height // 2 + 70)))
 
     def check_collisions(self) -> None:
-        player_rect = pygame.Rect(self.player.x, self.player.y, self.player.width, self.player.height)
-        for source_code in self.level_generator.source_codes:
-            if player_rect.colliderect(source_code.rect):
-                self.player.collect_source_code()
-                self.level_generator.remove_source_code(source_code)
-                logger.info(f"Player collected source code. Freedom: {self.player.freedom}")
+        level = self.level_generator
+        player_rect = level.to_world(pygame.Rect(self.player.x, self.player.y, self.player.width, self.player.height))
+        value, collected = pickup_system(level.world, player_rect)
+        for source_code in collected:
+            level.remove_source_code(source_code)
+        if value:
+            self.player.collect_source_code(int(value))
+        damage = collision_system(level.world, player_rect)
+        if damage:
+            self.player.lose_shield(int(damage))
 
         if self.player.y > self.game.height:
             self.player.lose_shield()
             self.teleport_player_to_safe_area()
+            self.falls += 1
             logger.info("Player fell off the screen")
 
     def teleport_player_to_safe_area(self) -> None:
         safe_y = self.find_safe_y_position()
-        self.player.teleport(get_config("player", "initial_x"), safe_y)
+        self.player.teleport(self.config.player.initial_x, safe_y)
 
     def find_safe_y_position(self) -> float:
         player_height = self.player.height
-        screen_height = get_config("game", "screen_height")
+        screen_height = self.config.game.screen_height
         
         for y in range(0, screen_height - player_height, player_height):
-            rect = pygame.Rect(get_config("player", "initial_x"), y, self.player.width, player_height)
-            if not any(block.rect.colliderect(rect) for block in self.level_generator.blocks):
+            rect = pygame.Rect(self.config.player.initial_x, y, self.player.width, player_height)
+            if not self.level_generator.blocks_in_rect(rect):
                 return y
         
         # If no safe position is found, return the top of the screen
@@ -154,14 +304,25 @@ class Game:
             self.player.y = 0
             self.player.velocity_y = 0
 
+    def entity_counts(self) -> tuple[int, int, int]:
+        """The number of blocks and source codes in the level, and the entity objects allocated so far."""
+        level = self.level_generator
+        return len(level.blocks), len(level.source_codes), level.allocated
+
+    def close(self) -> None:
+        """Release resources held by the scene, such as the level's worker thread."""
+        self.level_generator.close()
+        logger.debug("Level entity allocations: %s", self.level_generator.allocation_counts())
+        logger.debug("Snapshots: %s", self.snapshots.stats())
+
     def toggle_pause(self) -> None:
         self.paused = not self.paused
-        logger.info(f"Game {'paused' if self.paused else 'resumed'}")
+        logger.info("Game %s", "paused" if self.paused else "resumed")
 
 class PauseMenu:
     def __init__(self, game_scene):
         self.game_scene = game_scene
-        self.font = pygame.font.Font(None, get_config("fonts", "main_size"))
+        self.resources = get_resources()
         self.continue_button = pygame.Rect(300, 200, 200, 50)
         self.exit_button = pygame.Rect(300, 300, 200, 50)
 
@@ -172,16 +333,16 @@ class PauseMenu:
             elif self.exit_button.collidepoint(event.pos):
                 self.game_scene.game.running = False
 
-    def draw(self, screen: pygame.Surface) -> None:
-        overlay = pygame.Surface((screen.get_width(), screen.get_height()), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 128))
-        screen.blit(overlay, (0, 0))
+    def draw(self, screen: pygame.Surface, overlay: bool = True) -> None:
+        if overlay:
+            screen.blit(self.resources.overlay(screen.get_size(), (0, 0, 0, 128)), (0, 0))
 
         pygame.draw.rect(screen, (0, 255, 0), self.continue_button)
         pygame.draw.rect(screen, (255, 0, 0), self.exit_button)
 
-        continue_text = self.font.render("Continue", True, get_config("colors", "text"))
-        exit_text = self.font.render("Exit", True, get_config("colors", "text"))
+        config = self.game_scene.config
+        continue_text = self.resources.text(config.fonts.main_size, "Continue", config.colors.text)
+        exit_text = self.resources.text(config.fonts.main_size, "Exit", config.colors.text)
 
         screen.blit(continue_text, continue_text.get_rect(center=self.continue_button.center))
         screen.blit(exit_text, exit_text.get_rect(center=self.exit_button.center))
\ No newline at end of file
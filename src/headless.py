@@ -0,0 +1,115 @@
+import random
+import time
+from typing import Callable, Iterable, Optional
+
+import pygame
+from src.logging import get_logger, next_log_frame, setup_logging
+from src.game import Game
+from src.profiler import EVENTS, UPDATE, get_profiler
+from src.replay import InputRecorder
+
+logger = get_logger()
+
+# A script receives the frame number and the current Game scene and returns the
+# events to feed into Game.handle_event before that frame's update.
+InputScript = Callable[[int, Game], Iterable[pygame.event.Event]]
+
+class HeadlessResult:
+    """Summary of a headless simulation run."""
+
+    def __init__(self, frames: int, elapsed: float, restarts: int, freedom: int):
+        """Initialize the result."""
+        self.frames = frames
+        self.elapsed = elapsed
+        self.restarts = restarts
+        self.freedom = freedom
+
+    @property
+    def fps(self) -> float:
+        """Simulated frames per second."""
+        return self.frames / self.elapsed if self.elapsed > 0 else float("inf")
+
+    def __repr__(self) -> str:
+        return (f"HeadlessResult(frames={self.frames}, elapsed={self.elapsed:.3f}s, "
+                f"fps={self.fps:.1f}, restarts={self.restarts}, freedom={self.freedom})")
+
+class HeadlessGNUDash:
+    """Windowless stand-in for GNUDash that steps the Game scene as fast as possible.
+
+    Nothing is drawn and no pygame subsystem is initialised.
+    """
+
+    def __init__(self, width: int = 800, height: int = 600, script: Optional[InputScript] = None,
+                 restart_on_game_over: bool = True, stop_on_game_over: bool = True,
+                 recorder: Optional[InputRecorder] = None, seed: Optional[int] = None, level_worker: bool = True,
+                 rewind: bool = False):
+        """Initialize the headless game.
+
+        With neither restart_on_game_over nor stop_on_game_over, the game over screen
+        stays up until the script sends the input that restarts the game. The seed and
+        level_worker arguments are passed to the first Game scene. Scenes only keep a
+        rewind history when rewind is set, as even with a snapshot every few ticks it
+        slows a headless tick down.
+        """
+        self.width = width
+        self.height = height
+        self.script = script
+        self.restart_on_game_over = restart_on_game_over
+        self.stop_on_game_over = stop_on_game_over
+        self.recorder = recorder
+        self.rewind_ticks = None if rewind else 0
+        self.running = True
+        self.frame = 0
+        self.restarts = 0
+        self.level_worker = level_worker
+        self.profiler = get_profiler()
+        self.current_scene = Game(self, seed, level_worker)
+
+    def step(self) -> None:
+        """Advance the simulation by a single frame."""
+        next_log_frame()
+        self.profiler.begin_frame()
+        scene = self.current_scene
+        if self.script is not None:
+            for event in self.script(self.frame, scene):
+                scene.handle_event(event)
+            scene = self.current_scene
+        self.profiler.mark(EVENTS)
+        scene.update()
+        self.profiler.mark(UPDATE)
+        if self.profiler.enabled:
+            self.profiler.end_frame(*scene.entity_counts())
+        if scene.game_over:
+            if self.restart_on_game_over:
+                scene.close()
+                self.current_scene = Game(self, level_worker=self.level_worker)
+                self.restarts += 1
+            elif self.stop_on_game_over:
+                self.running = False
+        self.frame += 1
+
+    def run(self, frames: int) -> HeadlessResult:
+        """Run up to the given number of frames without a frame cap."""
+        start_frame = self.frame
+        start = time.perf_counter()
+        while self.running and self.frame - start_frame < frames:
+            self.step()
+        elapsed = time.perf_counter() - start
+        return HeadlessResult(self.frame - start_frame, elapsed, self.restarts,
+                              self.current_scene.player.freedom)
+
+    def close(self) -> None:
+        """Release the current scene's resources."""
+        self.current_scene.close()
+
+def run_headless(frames: int, script: Optional[InputScript] = None, seed: Optional[int] = None,
+                 restart_on_game_over: bool = True) -> HeadlessResult:
+    """Simulate the game for a number of frames with no window and report the results."""
+    setup_logging()
+    if seed is not None:
+        random.seed(seed)
+    game = HeadlessGNUDash(script=script, restart_on_game_over=restart_on_game_over)
+    result = game.run(frames)
+    game.close()
+    logger.info("Headless run finished: %s", result)
+    return result
@@ -1,44 +1,129 @@
 import os
 import sys
+import queue
+import atexit
 import logging
-from datetime import datetime
+import logging.handlers
+import threading
 from typing import Optional
 
-from dotenv import load_dotenv
-from appdirs import user_log_dir
-import coloredlogs
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s - [%(filename)s:%(lineno)d]"
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that leaves formatting to the listener thread.
+
+    The stock QueueHandler formats each record before queueing it, which would put the
+    cost back on the game thread. Records are queued as they are instead, so arguments
+    should be values that will not change before they are written out.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class RateLimitFilter(logging.Filter):
+    """Lets at most `limit` records with the same message template through per frame.
+
+    Call next_frame once per frame. The count of records dropped for a template is
+    appended to the next one that gets through.
+    """
+
+    def __init__(self, limit: int = 5):
+        super().__init__()
+        self.limit = limit
+        self.counts: dict[tuple[int, str], int] = {}
+        self.suppressed: dict[tuple[int, str], int] = {}
+
+    def next_frame(self) -> None:
+        self.counts.clear()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.levelno, str(record.msg))
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+        if count > self.limit:
+            self.suppressed[key] = self.suppressed.get(key, 0) + 1
+            return False
+        dropped = self.suppressed.pop(key, 0)
+        if dropped and isinstance(record.args, tuple):
+            record.msg = f"{record.msg} (%d similar messages suppressed)"
+            record.args = record.args + (dropped,)
+        return True
+
+def _start_listener(log_queue: queue.SimpleQueue, log_file: str, max_bytes: int, backup_count: int) -> None:
+    import coloredlogs
+
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes,
+                                                        backupCount=backup_count, delay=True)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(coloredlogs.ColoredFormatter(LOG_FORMAT))
+
+    global listener
+    listener = logging.handlers.QueueListener(log_queue, file_handler, stream_handler,
+                                              respect_handler_level=True)
+    listener.start()
+
+def _stop_listener(starter: threading.Thread) -> None:
+    starter.join()
+    if listener is not None:
+        listener.stop()
 
 def setup_logging(app_name: str = "GNUDash") -> logging.Logger:
+    """Route log records to the terminal and a rotated log file. Safe to call more than once.
+
+    Only the queue the game thread logs to is set up here. The handlers, which import
+    coloredlogs and create the log directory, are built on a background thread that
+    then starts draining the queue, so nothing logged in the meantime is lost.
+    """
+    global log_queue
+    logger = get_logger(app_name)
+    if log_queue is not None:
+        return logger
+
+    from dotenv import load_dotenv
+    from appdirs import user_log_dir
+
     load_dotenv()
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
-    LOG_DIR = user_log_dir(app_name)
-    os.makedirs(LOG_DIR, exist_ok=True)
-    LOG_FILE = os.path.join(LOG_DIR, f"{app_name.lower()}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.log")
-
-    logging.basicConfig(
-        level=LOG_LEVEL,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s - [%(filename)s:%(lineno)d]",
-        handlers=[
-            logging.FileHandler(LOG_FILE),
-            logging.StreamHandler(sys.stdout)
-        ]
-    )
-
-    logger = logging.getLogger(app_name)
-    coloredlogs.install(level=LOG_LEVEL, logger=logger)
-
-    # Add TRACE log level
-    TRACE = 5
-    logging.addLevelName(TRACE, "TRACE")
-    setattr(logger, "trace", lambda message, *args: logger.log(TRACE, message, *args))
+    LOG_FILE = os.path.join(user_log_dir(app_name), f"{app_name.lower()}.log")
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 1024 * 1024))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+    LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", 5))
 
+    # Writing and formatting happen on the listener's thread; the game thread only
+    # puts records on an unbounded queue, so a slow disk or terminal never stalls a frame.
+    log_queue = queue.SimpleQueue()
+    starter = threading.Thread(target=_start_listener, name="GNUDash-log-setup", daemon=True,
+                               args=(log_queue, LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT))
+    starter.start()
+    atexit.register(_stop_listener, starter)
+
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(rate_limiter)
+    rate_limiter.limit = LOG_RATE_LIMIT
+    logging.basicConfig(level=LOG_LEVEL, handlers=[queue_handler])
+    logger.setLevel(LOG_LEVEL)
     return logger
 
 # Global logger instance
 logger: Optional[logging.Logger] = None
+log_queue: Optional[queue.SimpleQueue] = None
+listener: Optional[logging.handlers.QueueListener] = None
+rate_limiter = RateLimitFilter()
 
-def get_logger() -> logging.Logger:
+def get_logger(app_name: str = "GNUDash") -> logging.Logger:
+    """The game's logger. Records are only written out once setup_logging has been called."""
     global logger
     if logger is None:
-        logger = setup_logging()
-    return logger
\ No newline at end of file
+        logger = logging.getLogger(app_name)
+
+        # Add TRACE log level
+        TRACE = 5
+        logging.addLevelName(TRACE, "TRACE")
+        setattr(logger, "trace", lambda message, *args: logger.log(TRACE, message, *args))
+    return logger
+
+def next_log_frame() -> None:
+    """Start a new rate limiting window. Call once per frame from the game loop."""
+    rate_limiter.next_frame()
@@ -1,51 +1,287 @@
+import time
+
+# Taken before anything else is imported, so the startup profile covers imports too.
+STARTED = time.perf_counter()
+
+import argparse
+import random
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
 import pygame
-from pygame.locals import QUIT, KEYDOWN, K_ESCAPE
-from src.logging import get_logger
+from pygame.locals import QUIT, KEYDOWN, K_ESCAPE, K_F3
+from appdirs import user_data_dir, user_log_dir
+from src.logging import get_logger, next_log_frame, setup_logging
+from src.config import Config, ConfigWatcher, add_config_files, apply_pending_config, current_config
+from src.components.profiler_overlay import ProfilerOverlay
+from src.components.resources import get_resources
 from src.main_menu import MainMenu
-from src.game import Game
+from src.profiler import DRAW, EVENTS, FLIP, UPDATE, WAIT, get_profiler
+from src.quality import QualityGovernor
+from src.replay import InputRecorder
+from src.startup import StartupProfile
+from src.timestep import FixedTimestep
+
+if TYPE_CHECKING:
+    from src.spectator import SpectatorServer
 
 logger = get_logger()
 
 class GNUDash:
     """Main game class for GNU Dash."""
 
-    def __init__(self, width: int = 800, height: int = 600):
+    def __init__(self, width: int = 800, height: int = 600, startup: Optional[StartupProfile] = None):
         """Initialize the game."""
-        pygame.init()
+        self.startup = startup if startup is not None else StartupProfile()
+        self.profile_startup = False
+        # Only the subsystems the game uses; pygame.init() would also bring up audio,
+        # joysticks and the rest.
+        pygame.display.init()
+        pygame.font.init()
+        self.startup.mark("pygame init")
         self.width = width
         self.height = height
         self.screen = pygame.display.set_mode((width, height))
         pygame.display.set_caption("GNU Dash")
+        self.startup.mark("display")
         self.clock = pygame.time.Clock()
+        self.timestep = FixedTimestep(current_config().game.tick_rate, current_config().game.max_catch_up_steps)
+        self.dirty_rects = current_config().game.dirty_rects
+        self.config_watcher: Optional[ConfigWatcher] = None
+        self.profiler = get_profiler()
+        self.profiler_overlay: Optional[ProfilerOverlay] = None
+        self.profile_path: Optional[Path] = None
+        self.recorder: Optional[InputRecorder] = None
+        self.session_path = Path(user_data_dir("GNUDash")) / "last_session.snapshot"
+        self.full_redraw = False
+        self.quality = QualityGovernor.from_config(current_config())
+        self.spectator_server: Optional["SpectatorServer"] = None
+        if current_config().game.hot_reload:
+            self.watch_config()
+        if current_config().spectator.enabled:
+            self.serve_spectators(current_config().spectator.address)
         self.running = True
         self.current_scene = MainMenu(self)
+        self.startup.mark("main menu")
+
+    def watch_config(self) -> None:
+        """Reload the config files while the game runs whenever they change."""
+        if self.config_watcher is None:
+            self.config_watcher = ConfigWatcher(on_error=lambda e: logger.error("Config not reloaded: %s", e))
+            logger.info("Watching config files for changes")
+
+    def serve_spectators(self, address: str) -> None:
+        """Broadcast the game to spectators connecting to address, a host:port or a UNIX socket path."""
+        if self.spectator_server is not None:
+            return
+        from src.spectator import SpectatorServer, parse_address
+        try:
+            server = SpectatorServer(parse_address(address), current_config().spectator.keyframe_interval)
+        except ValueError as e:
+            logger.error("Not serving spectators: %s", e)
+            return
+        if server.start():
+            self.spectator_server = server
+
+    def reload_quality(self, config: Config) -> None:
+        """Take the [quality] settings from a reloaded config, staying at the current level if adaptive."""
+        index = self.quality.index
+        self.quality = QualityGovernor.from_config(config)
+        if self.quality.adaptive:
+            self.quality.index = min(index, len(self.quality.levels) - 1)
+        if self.profiler_overlay is not None:
+            self.profiler_overlay.quality = self.quality
+        self.full_redraw = True
+
+    def toggle_profiler_overlay(self) -> None:
+        """Show or hide the frame profiler graph, starting the profiler if it is off."""
+        if self.profiler_overlay is None:
+            self.profiler.enable()
+            self.profiler_overlay = ProfilerOverlay(self.profiler, quality=self.quality)
+        else:
+            self.profiler_overlay = None
+            self.full_redraw = True
+            # A paused or finished game only draws once, so it has to be told to cover the graph.
+            invalidate = getattr(self.current_scene, "invalidate", None)
+            if invalidate is not None:
+                invalidate()
 
     def run(self) -> None:
-        """Main game loop."""
+        """Main game loop.
+
+        The simulation advances in fixed ticks, as many per frame as the time elapsed
+        calls for, and rendering interpolates between the last two ticks, so gameplay
+        does not depend on the frame rate.
+
+        With profile_startup set, the loop ends after the first frame.
+        """
+        first_frame = True
+        profiler = self.profiler
+        last_time = time.perf_counter()
         while self.running:
+            frame_start = time.perf_counter()
+            next_log_frame()
+            profiler.begin_frame()
+            # A reloaded config only takes effect here, between frames.
+            if apply_pending_config():
+                config = current_config()
+                self.dirty_rects = config.game.dirty_rects
+                self.timestep.set_rate(config.game.tick_rate, config.game.max_catch_up_steps)
+                self.reload_quality(config)
+                logger.info("Reloaded config version %d", config.version)
+
             for event in pygame.event.get():
                 if event.type == QUIT:
                     self.running = False
                 elif event.type == KEYDOWN and event.key == K_ESCAPE:
-                    if isinstance(self.current_scene, Game):
-                        self.current_scene.toggle_pause()
+                    # Only the Game scene can be paused; it is not imported until a game starts.
+                    toggle_pause = getattr(self.current_scene, "toggle_pause", None)
+                    if toggle_pause is not None:
+                        toggle_pause()
                     else:
                         self.running = False
+                elif event.type == KEYDOWN and event.key == K_F3:
+                    self.toggle_profiler_overlay()
                 self.current_scene.handle_event(event)
+            profiler.mark(EVENTS)
 
-            self.current_scene.update()
-            self.current_scene.draw(self.screen)
+            now = time.perf_counter()
+            ticks = self.timestep.advance(now - last_time)
+            for _ in range(ticks):
+                self.current_scene.update()
+            last_time = now
+            if ticks and self.spectator_server is not None and hasattr(self.current_scene, "level_generator"):
+                self.spectator_server.publish(self.current_scene)
+            profiler.mark(UPDATE)
+            dirty = self.current_scene.draw(self.screen, self.timestep.alpha)
+            if self.profiler_overlay is not None:
+                overlay_rect = self.profiler_overlay.draw(self.screen)
+                if dirty is not None:
+                    dirty.append(overlay_rect)
+            profiler.mark(DRAW)
 
-            pygame.display.flip()
-            self.clock.tick(60)
+            if self.dirty_rects and dirty is not None and not self.full_redraw:
+                pygame.display.update(dirty)
+            else:
+                pygame.display.flip()
+                self.full_redraw = False
+            profiler.mark(FLIP)
+            if self.quality.record(time.perf_counter() - frame_start):
+                self.full_redraw = True
+            if first_frame:
+                first_frame = False
+                self.startup.mark("first frame")
+                logger.info("First frame after %.1f ms", self.startup.total * 1000)
+                if self.profile_startup:
+                    self.running = False
+            self.clock.tick(current_config().game.fps)
+            profiler.mark(WAIT)
+            if profiler.enabled:
+                entity_counts = getattr(self.current_scene, "entity_counts", None)
+                profiler.end_frame(*(entity_counts() if entity_counts is not None else ()))
 
+        self.save_session()
+        close = getattr(self.current_scene, "close", None)
+        if close is not None:
+            close()
+        logger.debug("Render resource cache: %s", get_resources().stats())
+        if profiler.frames:
+            path = self.profile_path or Path(user_log_dir("GNUDash")) / "frame_profile.json"
+            profiler.export(path)
+            logger.info("Frame profile written to %s", path)
+        if self.config_watcher is not None:
+            self.config_watcher.stop()
+        if self.spectator_server is not None:
+            self.spectator_server.close()
         pygame.quit()
 
-def main() -> None:
+    def save_session(self) -> None:
+        """Keep a game in progress to resume on the next launch, or forget the last one once it is over."""
+        scene = self.current_scene
+        if getattr(scene, "snapshots", None) is None:
+            return
+        if scene.game_over:
+            self.session_path.unlink(missing_ok=True)
+        else:
+            from src.snapshot import save_session
+            save_session(scene, self.session_path)
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(prog="gnudash", description="GNU Dash platformer")
+    parser.add_argument("--headless", action="store_true",
+                        help="simulate the game without a window or frame cap")
+    parser.add_argument("--frames", type=int, default=100_000,
+                        help="number of frames to simulate in headless mode")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for the level")
+    parser.add_argument("--config", action="append", default=[], metavar="PATH",
+                        help="config file to apply over the defaults, may be given more than once")
+    parser.add_argument("--watch-config", action="store_true",
+                        help="apply changes to the config files while the game is running")
+    parser.add_argument("--profile", type=Path, default=None, metavar="PATH",
+                        help="record per-phase frame timings and write them to a .json or .csv file on exit")
+    parser.add_argument("--record", type=Path, default=None, metavar="PATH",
+                        help="record the seed and every input of the session to a replay file")
+    parser.add_argument("--replay", type=Path, default=None, metavar="PATH",
+                        help="replay a recorded session headless at full speed and check it for divergence")
+    parser.add_argument("--spectators", default=None, metavar="ADDRESS",
+                        help="broadcast the game to spectators on host:port or a UNIX socket path")
+    parser.add_argument("--resume", action="store_true",
+                        help="carry on from where the last session was left instead of showing the menu")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="show the first frame, print where the startup time went and exit")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[list[str]] = None) -> None:
     """Entry point for the game."""
+    startup = StartupProfile(STARTED)
+    startup.mark("imports")
+    setup_logging()
+    startup.mark("logging")
+    args = parse_args(argv)
+    if args.config:
+        add_config_files(args.config)
+    current_config()
+    startup.mark("config")
+    if args.profile is not None:
+        get_profiler().enable()
+    if args.replay is not None:
+        from src.replay import replay
+        result = replay(args.replay)
+        if args.profile is not None:
+            get_profiler().export(args.profile)
+        if result.divergence is not None:
+            raise SystemExit(f"Replay diverged from the recording at tick {result.divergence}")
+        return
+    if args.headless:
+        from src.headless import run_headless
+        logger.info("Starting GNU Dash headless for %d frames", args.frames)
+        run_headless(args.frames, seed=args.seed)
+        if args.profile is not None:
+            get_profiler().export(args.profile)
+        return
+    seed = args.seed
+    if args.record is not None and seed is None:
+        seed = random.randrange(2**32)
+    if seed is not None:
+        random.seed(seed)
     logger.info("Starting GNU Dash")
-    game = GNUDash()
+    game = GNUDash(startup=startup)
+    if args.record is not None:
+        game.recorder = InputRecorder(seed)
+    game.profile_startup = args.startup_profile
+    game.profile_path = args.profile
+    if args.watch_config:
+        game.watch_config()
+    if args.spectators is not None:
+        game.serve_spectators(args.spectators)
+    if args.resume:
+        game.current_scene.resume()
     game.run()
+    if game.recorder is not None:
+        game.recorder.save(args.record)
+    if args.startup_profile:
+        print(game.startup.report())
     logger.info("Exiting GNU Dash")
 
 if __name__ == "__main__":
@@ -1,6 +1,9 @@
+import struct
+
 import pygame
 from pygame.locals import MOUSEBUTTONDOWN
 from src.logging import get_logger
+from src.components.resources import get_resources
 
 logger = get_logger()
 
@@ -10,8 +13,11 @@ class MainMenu:
     def __init__(self, game):
         """Initialize the main menu."""
         self.game = game
-        self.font = pygame.font.Font(None, 36)
+        self.resources = get_resources()
         self.play_button = pygame.Rect(300, 250, 200, 50)
+        self.resume_button = pygame.Rect(300, 320, 200, 50)
+        session_path = getattr(game, "session_path", None)
+        self.can_resume = session_path is not None and session_path.is_file()
 
     def handle_event(self, event: pygame.event.Event) -> None:
         """Handle events for the main menu."""
@@ -20,15 +26,38 @@ class MainMenu:
                 logger.info("Starting new game")
                 from src.game import Game  # Import here to avoid circular import
                 self.game.current_scene = Game(self.game)
+            elif self.can_resume and self.resume_button.collidepoint(event.pos):
+                self.resume()
+
+    def resume(self) -> None:
+        """Carry on from the game saved when the last session was closed, if there is one."""
+        from src.game import Game  # Import here to avoid circular import
+        from src.snapshot import load_session
+        data = load_session(self.game.session_path)
+        if data is None:
+            logger.warning("There is no saved session to resume")
+            return
+        scene = Game(self.game)
+        try:
+            scene.resume(data)
+        except (ValueError, struct.error) as e:
+            logger.warning("Could not resume the saved session: %s", e)
+            scene.close()
+            return
+        self.game.current_scene = scene
 
     def update(self) -> None:
         """Update the main menu."""
         pass
 
-    def draw(self, screen: pygame.Surface) -> None:
+    def draw(self, screen: pygame.Surface, alpha: float = 1.0) -> None:
         """Draw the main menu."""
         screen.fill((0, 0, 0))
         pygame.draw.rect(screen, (0, 255, 0), self.play_button)
-        text = self.font.render("Play", True, (255, 255, 255))
+        text = self.resources.text(36, "Play", (255, 255, 255))
         text_rect = text.get_rect(center=self.play_button.center)
-        screen.blit(text, text_rect)
\ No newline at end of file
+        screen.blit(text, text_rect)
+        if self.can_resume:
+            pygame.draw.rect(screen, (0, 0, 255), self.resume_button)
+            text = self.resources.text(36, "Resume", (255, 255, 255))
+            screen.blit(text, text.get_rect(center=self.resume_button.center))
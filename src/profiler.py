@@ -0,0 +1,110 @@
+import csv
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+# Frame phases, in the order they happen. Each mark charges the time since the
+# previous mark to a phase, so work between two hooks lands in the later one.
+EVENTS, UPDATE, PLAYER, LEVEL, COLLISIONS, DRAW, FLIP, WAIT = range(8)
+PHASES = ("events", "update", "player", "level", "collisions", "draw", "flip", "wait")
+COUNTS = ("blocks", "source_codes", "allocations")
+
+class FrameProfiler:
+    """Per-phase frame timings kept in a ring buffer of the last `capacity` frames.
+
+    While disabled, mark and end_frame are no-op methods, so the hooks left in the
+    game loop and scenes cost one call each.
+    """
+
+    def __init__(self, capacity: int = 600):
+        """Initialize a disabled profiler."""
+        self.capacity = capacity
+        self.timings = np.zeros((capacity, len(PHASES)))
+        self.counts = np.zeros((capacity, len(COUNTS)), dtype=np.int64)
+        self.head = 0
+        self.size = 0
+        self.frames = 0
+        self.current = [0.0] * len(PHASES)
+        self.last = 0.0
+        self.enabled = False
+        self.disable()
+
+    def enable(self) -> None:
+        """Start recording, from the current point in the frame."""
+        self.enabled = True
+        self.last = time.perf_counter()
+        self.begin_frame = self._begin_frame
+        self.mark = self._mark
+        self.end_frame = self._end_frame
+
+    def disable(self) -> None:
+        """Stop recording, keeping what has been recorded so far."""
+        self.enabled = False
+        self.begin_frame = self._skip
+        self.mark = self._skip
+        self.end_frame = self._skip
+
+    def _skip(self, *args: object) -> None:
+        pass
+
+    def _begin_frame(self) -> None:
+        self.last = time.perf_counter()
+
+    def _mark(self, phase: int) -> None:
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def _end_frame(self, blocks: int = 0, source_codes: int = 0, allocations: int = 0) -> None:
+        self.timings[self.head] = self.current
+        self.counts[self.head] = (blocks, source_codes, allocations)
+        self.current = [0.0] * len(PHASES)
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        self.frames += 1
+
+    def recent(self) -> tuple[np.ndarray, np.ndarray]:
+        """Timings in seconds and entity counts of the recorded frames, oldest first."""
+        order = (np.arange(self.size) + self.head - self.size) % self.capacity
+        return self.timings[order], self.counts[order]
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """p50, p95 and p99 in milliseconds for each phase and for the whole frame."""
+        timings, _ = self.recent()
+        if not len(timings):
+            return {}
+        columns = {name: timings[:, i] for i, name in enumerate(PHASES)}
+        columns["total"] = timings.sum(axis=1)
+        return {name: dict(zip(("p50", "p95", "p99"), (np.percentile(values, (50, 95, 99)) * 1000).tolist()))
+                for name, values in columns.items()}
+
+    def export(self, path: Path) -> None:
+        """Write the recorded frames to a .csv file, or a .json file with a summary."""
+        path = Path(path)
+        timings, counts = self.recent()
+        first = self.frames - self.size
+        if path.suffix.lower() == ".csv":
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(("frame",) + tuple(f"{name}_ms" for name in PHASES) + ("total_ms",) + COUNTS)
+                for i, (row, row_counts) in enumerate(zip(timings * 1000, counts)):
+                    writer.writerow([first + i] + [f"{ms:.4f}" for ms in row] + [f"{row.sum():.4f}"]
+                                    + row_counts.tolist())
+            return
+        frames = [dict(frame=first + i, **{f"{name}_ms": ms for name, ms in zip(PHASES, row.tolist())},
+                       **dict(zip(COUNTS, row_counts.tolist())))
+                  for i, (row, row_counts) in enumerate(zip(timings * 1000, counts))]
+        with open(path, "w") as f:
+            json.dump({"phases": PHASES, "summary": self.summary(), "frames": frames}, f, indent=1)
+
+# Global profiler instance
+profiler: Optional[FrameProfiler] = None
+
+def get_profiler() -> FrameProfiler:
+    global profiler
+    if profiler is None:
+        profiler = FrameProfiler()
+    return profiler
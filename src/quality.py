@@ -0,0 +1,123 @@
+from collections import deque
+from typing import NamedTuple, Optional
+
+from src.logging import get_logger
+from src.config import Config
+
+logger = get_logger()
+
+class QualityLevel(NamedTuple):
+    """How much drawing a frame does. Each level down gives up a little more than the one above."""
+
+    name: str
+    cull_margin: int  # Pixels at each side of the view in which entities and chunks are not drawn
+    overlays: bool  # Whether translucent overlays are blended over the scene
+    hud_interval: int  # Frames the HUD text is kept for before it is refreshed
+    render_scale: float  # Resolution the level is drawn at before being scaled up to the screen
+
+FULL_QUALITY = QualityLevel("full", 0, True, 1, 1.0)
+
+def quality_levels(config: Config) -> tuple[QualityLevel, ...]:
+    """The quality levels from full down to lowest, with the settings from the [quality] section."""
+    quality = config.quality
+    return (
+        FULL_QUALITY,
+        QualityLevel("tight culling", quality.cull_margin, True, 1, 1.0),
+        QualityLevel("no overlays", quality.cull_margin, False, 1, 1.0),
+        QualityLevel("slow HUD", quality.cull_margin, False, quality.hud_interval, 1.0),
+        QualityLevel("low resolution", quality.cull_margin, False, quality.hud_interval, quality.render_scale),
+    )
+
+class QualityGovernor:
+    """Steps the render quality down when frames miss their budget and back up when there is headroom.
+
+    Decisions look at the 90th percentile of the busy time of the last window frames,
+    that is the time spent handling events, updating, drawing and flipping but not
+    waiting for the frame cap. Over degrade_at of the budget steps down one level. Back
+    up takes the percentile staying under restore_at for RECOVERY_WINDOWS windows in a
+    row. The window starts over after every change, so each level gets judged on
+    frames drawn at it and the quality does not flicker between two levels.
+
+    Not every level is cheaper on every machine; scaling a low resolution frame up can
+    cost more than it saves. If the first window at a lower level is no faster than
+    the one that led to it, the governor steps back up and skips that level from then on.
+    """
+
+    RECOVERY_WINDOWS = 3
+
+    def __init__(self, levels: tuple[QualityLevel, ...], target_fps: float, window: int,
+                 degrade_at: float, restore_at: float, adaptive: bool = True, index: int = 0):
+        """Initialize the governor at levels[index]."""
+        self.levels = levels
+        self.budget = 1.0 / target_fps
+        self.samples: deque[float] = deque(maxlen=window)
+        self.degrade_at = degrade_at
+        self.restore_at = restore_at
+        self.adaptive = adaptive
+        self.index = min(max(index, 0), len(levels) - 1)
+        self.skipped: set[int] = set()
+        self.headroom = 0
+        self.changes = 0
+        # The level and busy time of the last step down, until the new level has been judged.
+        self.stepped_down_from: Optional[tuple[int, float]] = None
+
+    @classmethod
+    def from_config(cls, config: Config) -> "QualityGovernor":
+        quality = config.quality
+        return cls(quality_levels(config), quality.target_fps, quality.window, quality.degrade_at,
+                   quality.restore_at, quality.adaptive, quality.level)
+
+    @property
+    def level(self) -> QualityLevel:
+        """The quality level frames are currently drawn at."""
+        return self.levels[self.index]
+
+    def percentile(self) -> Optional[float]:
+        """The 90th percentile busy time of the current window in seconds, or None until it is full."""
+        if len(self.samples) < self.samples.maxlen:
+            return None
+        return sorted(self.samples)[len(self.samples) * 9 // 10]
+
+    def record(self, busy: float) -> bool:
+        """Add a frame's busy time in seconds, returning whether the quality level changed."""
+        if not self.adaptive:
+            return False
+        self.samples.append(busy)
+        busy = self.percentile()
+        if busy is None:
+            return False
+        if self.stepped_down_from is not None:
+            previous, previous_busy = self.stepped_down_from
+            self.stepped_down_from = None
+            if busy >= previous_busy:
+                self.skipped.add(self.index)
+                self.set_level(previous, busy, "did not help, stepped back up to")
+                return True
+        if busy > self.budget * self.degrade_at:
+            self.headroom = 0
+            lower = next((i for i in range(self.index + 1, len(self.levels)) if i not in self.skipped), None)
+            if lower is not None:
+                previous = self.index
+                self.set_level(lower, busy, "stepped down to")
+                self.stepped_down_from = (previous, busy)
+                return True
+            return False
+        self.headroom = self.headroom + 1 if busy < self.budget * self.restore_at else 0
+        higher = next((i for i in range(self.index - 1, -1, -1) if i not in self.skipped), None)
+        if self.headroom >= self.samples.maxlen * self.RECOVERY_WINDOWS and higher is not None:
+            self.set_level(higher, busy, "stepped up to")
+            return True
+        return False
+
+    def set_level(self, index: int, busy: Optional[float] = None, change: str = "set to") -> None:
+        """Switch to levels[index] and start a new window."""
+        self.index = index
+        self.samples.clear()
+        self.headroom = 0
+        self.stepped_down_from = None
+        self.changes += 1
+        if busy is None:
+            logger.info("Render quality %s %s (level %d)", change, self.level.name, index)
+        else:
+            logger.info("Render quality %s %s (level %d): frames busy for %.1f of %.1f ms",
+                        change, self.level.name, index, busy * 1000, self.budget * 1000)
@@ -0,0 +1,132 @@
+import json
+import random
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Iterable, Optional
+
+import pygame
+from pygame.locals import KEYDOWN, KEYUP, MOUSEBUTTONDOWN, MOUSEBUTTONUP
+from src.logging import get_logger
+
+logger = get_logger()
+
+REPLAY_VERSION = 1
+# Ticks between state checksums.
+CHECKSUM_INTERVAL = 60
+RECORDED_EVENTS = (KEYDOWN, KEYUP, MOUSEBUTTONDOWN, MOUSEBUTTONUP)
+
+def state_checksum(scene) -> int:
+    """CRC of the simulation state that a divergent run would show first."""
+    player = scene.player
+    return zlib.crc32(struct.pack("<5d2i", player.x, player.y, player.velocity_x, player.velocity_y,
+                                  scene.level_generator.camera_x, player.freedom, player.liberty_shields))
+
+class InputRecorder:
+    """Records the input a Game scene receives, tick by tick, with periodic state checksums.
+
+    Game scenes report each event they handle with record and call step at the start
+    of every update, so inputs are logged against the number of simulation ticks that
+    came before them and a replay can deliver them at the same point. Inputs are kept
+    as (tick, event type, key or button, x, y) rows.
+
+    Given the checksums of an earlier recording as expected, the first tick at which
+    the state differs is kept in divergence.
+    """
+
+    def __init__(self, seed: int, expected: Optional[dict[int, int]] = None):
+        """Initialize an empty recording of a run seeded with seed."""
+        self.seed = seed
+        self.tick = 0
+        self.inputs: list[tuple[int, int, int, int, int]] = []
+        self.checksums: list[tuple[int, int]] = []
+        self.expected = expected
+        self.divergence: Optional[int] = None
+
+    def record(self, event: pygame.event.Event) -> None:
+        """Log an event delivered to the Game scene before the next tick."""
+        if event.type in (KEYDOWN, KEYUP):
+            self.inputs.append((self.tick, event.type, event.key, 0, 0))
+        elif event.type in (MOUSEBUTTONDOWN, MOUSEBUTTONUP):
+            x, y = event.pos
+            self.inputs.append((self.tick, event.type, event.button, x, y))
+
+    def step(self, scene) -> None:
+        """Count a tick of the scene, checksumming its state every CHECKSUM_INTERVAL ticks."""
+        if self.tick % CHECKSUM_INTERVAL == 0:
+            checksum = state_checksum(scene)
+            self.checksums.append((self.tick, checksum))
+            if (self.expected is not None and self.divergence is None
+                    and self.expected.get(self.tick, checksum) != checksum):
+                self.divergence = self.tick
+                logger.warning("Replay diverged from the recording by tick %d", self.tick)
+        self.tick += 1
+
+    def save(self, path: Path) -> None:
+        """Write the recording to a JSON file."""
+        data = {"version": REPLAY_VERSION, "seed": self.seed, "ticks": self.tick,
+                "inputs": self.inputs, "checksums": self.checksums}
+        with open(path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        logger.info("Recorded %d inputs over %d ticks to %s", len(self.inputs), self.tick, path)
+
+class Recording:
+    """A recording loaded back from disk."""
+
+    def __init__(self, path: Path):
+        """Load the recording at path."""
+        with open(path) as f:
+            data = json.load(f)
+        if data.get("version") != REPLAY_VERSION:
+            raise ValueError(f"{path}: unsupported recording version {data.get('version')!r}")
+        self.seed: int = data["seed"]
+        self.ticks: int = data["ticks"]
+        self.inputs: dict[int, list[pygame.event.Event]] = {}
+        for tick, event_type, code, x, y in data["inputs"]:
+            if event_type in (KEYDOWN, KEYUP):
+                event = pygame.event.Event(event_type, key=code)
+            else:
+                event = pygame.event.Event(event_type, button=code, pos=(x, y))
+            self.inputs.setdefault(tick, []).append(event)
+        self.checksums: dict[int, int] = {tick: checksum for tick, checksum in data["checksums"]}
+
+    def script(self, frame: int, scene) -> Iterable[pygame.event.Event]:
+        """Headless input script feeding back the events recorded for a tick."""
+        return self.inputs.get(frame, ())
+
+class ReplayResult:
+    """Outcome of replaying a recording."""
+
+    def __init__(self, ticks: int, elapsed: float, divergence: Optional[int]):
+        """Initialize the result."""
+        self.ticks = ticks
+        self.elapsed = elapsed
+        self.divergence = divergence
+
+    @property
+    def fps(self) -> float:
+        """Replayed ticks per second."""
+        return self.ticks / self.elapsed if self.elapsed > 0 else float("inf")
+
+    def __repr__(self) -> str:
+        return (f"ReplayResult(ticks={self.ticks}, elapsed={self.elapsed:.3f}s, fps={self.fps:.1f}, "
+                f"divergence={self.divergence})")
+
+def replay(path: Path) -> ReplayResult:
+    """Replay a recording headless and as fast as possible, checking it against its checksums."""
+    from src.headless import HeadlessGNUDash
+
+    recording = Recording(path)
+    random.seed(recording.seed)
+    checker = InputRecorder(recording.seed, expected=recording.checksums)
+    game = HeadlessGNUDash(script=recording.script, restart_on_game_over=False, stop_on_game_over=False,
+                           recorder=checker, rewind=True)
+    start = time.perf_counter()
+    while game.running and game.frame < recording.ticks:
+        game.step()
+    elapsed = time.perf_counter() - start
+    game.close()
+    result = ReplayResult(game.frame, elapsed, checker.divergence)
+    logger.info("Replay finished: %s", result)
+    return result
@@ -0,0 +1,246 @@
+"""Compact binary snapshots of a Game scene, for rewinding, restarting and resuming.
+
+A snapshot holds the player, the input state, the scroll position, the level's random
+stream and the raw component arrays of every entity store, along with the order of the
+level's tracks and spatial index, so a restored scene carries on exactly as the saved
+one would have. Chunks are not stored; they are rebuilt from the level seed when they
+are not already in memory.
+"""
+
+import struct
+import time
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from src.logging import get_logger
+from src.core.entity_store import ARCHETYPES, COMPONENTS
+from src.core.level_generator.chunks import build_chunk
+
+logger = get_logger()
+
+SNAPSHOT_MAGIC = b"GDSS"
+SNAPSHOT_VERSION = 2
+
+# The level seed is signed 64-bit, the range LevelGenerator keeps seeds in.
+HEADER = struct.Struct("<4sHq")
+# Level scroll and chunk range, player position and state, then two sets of bit flags.
+SCENE = struct.Struct("<2d2iq6d3i2B")
+RNG = struct.Struct("<i625I?d")
+STORE = struct.Struct("<BII")
+COUNT = struct.Struct("<I")
+
+def _flags(*values: bool) -> int:
+    return sum(1 << i for i, value in enumerate(values) if value)
+
+def _bits(flags: int, count: int) -> list[bool]:
+    return [bool(flags >> i & 1) for i in range(count)]
+
+def _rows(rows: list[int]) -> bytes:
+    return COUNT.pack(len(rows)) + np.asarray(rows, dtype=np.int32).tobytes()
+
+def save_snapshot(scene) -> bytes:
+    """Serialize the simulation state of a Game scene."""
+    level = scene.level_generator
+    player = scene.player
+    first_chunk = level.chunks[0].index if level.chunks else level.next_chunk
+    rng_version, rng_state, gauss = level.rng.getstate()
+    parts = [
+        HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, level.seed),
+        SCENE.pack(level.camera_x, level.prev_camera_x, level.next_chunk, first_chunk, level.last_platform_end,
+                   player.x, player.y, player.prev_x, player.prev_y, player.velocity_x, player.velocity_y,
+                   player.freedom, player.liberty_shields, player.invincible_timer,
+                   _flags(player.on_ground, player.can_double_jump, player.invincible, player.visible),
+                   _flags(scene.move_left, scene.move_right, scene.jump_pressed, scene.game_over)),
+        RNG.pack(rng_version, *rng_state, gauss is not None, gauss or 0.0),
+        COUNT.pack(len(level.world.stores)),
+    ]
+    for kind, store in level.world.stores.items():
+        size = store.size
+        free = store.free_rows()
+        parts.append(STORE.pack(kind, size, len(free)))
+        parts.append(store.alive[:size].tobytes())
+        for column in store.columns.values():
+            parts.append(column[:, :size].tobytes())
+        parts.append(np.asarray(free, dtype=np.int32).tobytes())
+    parts.append(_rows([block.row for block in level.blocks]))
+    parts.append(_rows([source_code.row for source_code in level.source_codes]))
+    parts.append(_rows([block.row for block in level.index.ordered()]))
+    return b"".join(parts)
+
+class _Reader:
+    """Sequential reads from a snapshot's bytes."""
+
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.offset = 0
+
+    def unpack(self, layout: struct.Struct) -> tuple:
+        values = layout.unpack_from(self.data, self.offset)
+        self.offset += layout.size
+        return values
+
+    def array(self, dtype: type, count: int) -> np.ndarray:
+        array = np.frombuffer(self.data, dtype=dtype, count=count, offset=self.offset)
+        self.offset += array.nbytes
+        return array
+
+    def rows(self) -> list[int]:
+        count, = self.unpack(COUNT)
+        return self.array(np.int32, count).tolist()
+
+def restore_snapshot(scene, data: bytes) -> None:
+    """Put a Game scene back into the state a snapshot was saved from."""
+    reader = _Reader(data)
+    magic, version, seed = reader.unpack(HEADER)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"not a version {SNAPSHOT_VERSION} snapshot")
+    level = scene.level_generator
+    player = scene.player
+    (level.camera_x, level.prev_camera_x, next_chunk, first_chunk, level.last_platform_end,
+     player.x, player.y, player.prev_x, player.prev_y, player.velocity_x, player.velocity_y,
+     player.freedom, player.liberty_shields, player.invincible_timer,
+     player_flags, input_flags) = reader.unpack(SCENE)
+    player.on_ground, player.can_double_jump, player.invincible, player.visible = _bits(player_flags, 4)
+    scene.move_left, scene.move_right, scene.jump_pressed, scene.game_over = _bits(input_flags, 4)
+    rng_state = reader.unpack(RNG)
+    level.rng.setstate((rng_state[0], rng_state[1:626], rng_state[627] if rng_state[626] else None))
+
+    # The views of the current entities go back to the pools to be bound to the restored rows.
+    level.block_pool.reclaim(list(level.blocks))
+    level.source_code_pool.reclaim(list(level.source_codes))
+    world = level.world
+    restored = set()
+    store_count, = reader.unpack(COUNT)
+    for _ in range(store_count):
+        kind, size, free_count = reader.unpack(STORE)
+        alive = reader.array(np.bool_, size)
+        columns = {name: reader.array(np.float64, COMPONENTS[name] * size).reshape(COMPONENTS[name], size)
+                   for name in ARCHETYPES[kind] if COMPONENTS[name]}
+        world.store(kind).load(size, alive, columns, reader.array(np.int32, free_count).tolist())
+        restored.add(kind)
+    for kind, store in world.stores.items():
+        if kind not in restored:
+            store.load(0, store.alive[:0], {name: column[:, :0] for name, column in store.columns.items()}, [])
+
+    level.blocks.replace([level.block_pool.bind(row) for row in reader.rows()])
+    level.source_codes.replace([level.source_code_pool.bind(row) for row in reader.rows()])
+    blocks = world.store(level.block_pool.cls.KIND)
+    level.index.clear()
+    for row in reader.rows():
+        level.index.insert(blocks.views[row])
+
+    # Chunks only depend on the seed and their index, so any still in memory are reused.
+    reseeded = seed != level.seed
+    existing = {} if reseeded else {chunk.index: chunk for chunk in level.chunks}
+    if reseeded:
+        level.seed = seed
+        scene.level_component.chunk_surfaces.clear()
+    level.chunks = deque(existing.get(index) or build_chunk(seed, index, level.params)
+                         for index in range(first_chunk, next_chunk))
+    if reseeded or next_chunk != level.next_chunk:
+        level.next_chunk = next_chunk
+        level.close()
+        level.start_worker()
+    scene.invalidate()
+
+# Ticks between the snapshots kept for rewinding. Saving a snapshot costs more than a tick,
+# so the ticks in between are kept as their inputs and played again when rewound to.
+KEYFRAME_INTERVAL = 10
+
+# The inputs a tick was played with: left and right held, then each jump press or release.
+TickInputs = tuple[bool, bool, tuple[bool, ...]]
+
+class Snapshots:
+    """A scene's rewind history, and a checkpoint for restarting.
+
+    The history is a run of segments, each a snapshot and the inputs of up to
+    KEYFRAME_INTERVAL ticks played after it. Rewinding restores the segment's snapshot
+    and plays its inputs again but for the last, which ends up exactly where the game
+    was a tick earlier since the simulation is deterministic. Times and sizes are kept
+    for stats.
+    """
+
+    def __init__(self, capacity: int):
+        """Initialize with room to rewind capacity ticks."""
+        self.capacity = capacity
+        self.segments: deque[tuple[bytes, list[TickInputs]]] = deque(
+            maxlen=capacity // KEYFRAME_INTERVAL + 2 if capacity else 0)
+        self.checkpoint: Optional[bytes] = None
+        self.saves = 0
+        self.restores = 0
+        self.save_seconds = 0.0
+        self.restore_seconds = 0.0
+        self.last_size = 0
+
+    def save(self, scene, inputs: TickInputs) -> None:
+        """Record a tick the scene has just played with inputs, snapshotting it every KEYFRAME_INTERVAL ticks."""
+        segments = self.segments
+        if segments:
+            played = segments[-1][1]
+            played.append(inputs)
+            if len(played) < KEYFRAME_INTERVAL:
+                return
+        start = time.perf_counter()
+        data = save_snapshot(scene)
+        self.save_seconds += time.perf_counter() - start
+        self.saves += 1
+        self.last_size = len(data)
+        segments.append((data, []))
+
+    def restore(self, scene, data: bytes) -> None:
+        """Restore the scene from a snapshot."""
+        start = time.perf_counter()
+        restore_snapshot(scene, data)
+        self.restore_seconds += time.perf_counter() - start
+        self.restores += 1
+
+    def set_checkpoint(self, scene) -> None:
+        """Remember the scene's current state as the one restart returns to."""
+        self.checkpoint = save_snapshot(scene)
+
+    def rewind(self, scene) -> bool:
+        """Step the scene back one tick. Returns False once there is nothing older to go back to."""
+        segments = self.segments
+        if segments and not segments[-1][1]:
+            if len(segments) < 2:
+                return False
+            segments.pop()
+        if not segments:
+            return False
+        data, played = segments[-1]
+        played.pop()
+        # Playing the ticks again must not count the falls in them twice.
+        falls = scene.falls
+        self.restore(scene, data)
+        for inputs in played:
+            scene.replay_tick(inputs)
+        scene.falls = falls
+        return True
+
+    def restart(self, scene) -> None:
+        """Return the scene to its checkpoint and forget the ticks since."""
+        self.restore(scene, self.checkpoint)
+        self.segments.clear()
+        logger.info("Restarted from the checkpoint")
+
+    def stats(self) -> dict[str, float]:
+        """Snapshot counts, the size of the last one, and mean save and restore times in microseconds."""
+        return {
+            "saves": self.saves,
+            "restores": self.restores,
+            "last_size": self.last_size,
+            "mean_save_us": self.save_seconds / self.saves * 1e6 if self.saves else 0.0,
+            "mean_restore_us": self.restore_seconds / self.restores * 1e6 if self.restores else 0.0,
+        }
+
+def save_session(scene, path: Path) -> None:
+    """Write a snapshot of the scene for load_session to pick up on the next launch."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(save_snapshot(scene))
+    logger.info("Saved the session to %s", path)
+
+def load_session(path: Path) -> Optional[bytes]:
+    """The snapshot saved by save_session, or None if there is none."""
+    return path.read_bytes() if path.is_file() else None
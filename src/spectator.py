@@ -0,0 +1,319 @@
+"""Live spectator stream of a running game, for other screens to watch.
+
+A SpectatorServer runs an asyncio event loop on its own thread and broadcasts a frame
+per rendered frame to every subscriber connected over TCP or a UNIX socket. A frame
+holds the camera, the player and the blocks, source codes and enemies in view.
+
+Every keyframe_interval frames a keyframe lists everything in view. The frames in
+between are deltas against that keyframe, listing only entities that came into view
+or moved since it and the rows that left the view. Any delta can be skipped, so a
+subscriber that cannot keep up is sent the newest keyframe and delta once its socket
+drains rather than everything it missed, and the game loop only ever hands frames to
+the event loop.
+"""
+
+import asyncio
+import struct
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+from src.logging import get_logger
+from src.core.entity_store import BLOCK, ENEMIES, SOURCE_CODE
+
+logger = get_logger()
+
+KEYFRAME = 0
+DELTA = 1
+
+# The kinds of entity streamed.
+STREAM_KINDS = (BLOCK, SOURCE_CODE, *ENEMIES)
+
+LENGTH = struct.Struct("<I")
+# Frame type, frame number, keyframe number, camera x, player world x and y, freedom, shields.
+HEADER = struct.Struct("<BIIdddii")
+COUNT = struct.Struct("<I")
+# Entities are identified by their kind and their row in the kind's store.
+ENTITY = np.dtype([("kind", "u1"), ("row", "<u4"), ("geometry", "<f4", 4)])
+REMOVED = np.dtype([("kind", "u1"), ("row", "<u4")])
+
+# Bytes queued on a subscriber's socket before it stops being sent new frames until it drains.
+WRITE_BUFFER_HIGH = 64 * 1024
+
+Address = Union[tuple[str, int], Path]
+
+def parse_address(address: str) -> Address:
+    """A (host, port) pair from "host:port", or the path of a UNIX socket from anything with a slash."""
+    if "/" in address:
+        return Path(address)
+    host, _, port = address.rpartition(":")
+    if not port.isdigit():
+        raise ValueError(f"expected host:port or a socket path, got {address!r}")
+    return host or "127.0.0.1", int(port)
+
+def _records(kind: int, rows: np.ndarray, geometry: np.ndarray) -> np.ndarray:
+    records = np.empty(len(rows), dtype=ENTITY)
+    records["kind"] = kind
+    records["row"] = rows
+    records["geometry"] = geometry[:, rows].T
+    return records
+
+def _removed(kind: int, rows: np.ndarray) -> np.ndarray:
+    records = np.empty(len(rows), dtype=REMOVED)
+    records["kind"] = kind
+    records["row"] = rows
+    return records
+
+class FrameEncoder:
+    """Turns the state of a Game scene into length-prefixed keyframes and deltas."""
+
+    def __init__(self, keyframe_interval: int):
+        """Initialize with a keyframe every keyframe_interval frames."""
+        self.keyframe_interval = max(keyframe_interval, 1)
+        self.frame = 0
+        self.keyframe = 0
+        self.scene = None
+        # Per kind, which rows were in view at the keyframe and their geometry.
+        self.reference: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+
+    def encode(self, scene) -> tuple[bytes, bool]:
+        """The next frame of the scene, and whether it is a keyframe."""
+        level = scene.level_generator
+        key = scene is not self.scene or self.frame - self.keyframe >= self.keyframe_interval
+        if key:
+            self.scene = scene
+            self.keyframe = self.frame
+        left = level.camera_x
+        right = left + level.screen_width
+        entities = []
+        removed = []
+        for kind in STREAM_KINDS:
+            store = level.world.stores.get(kind)
+            size = store.size if store is not None else 0
+            reference = None if key else self.reference.get(kind)
+            if not size and reference is None:
+                self.reference.pop(kind, None)
+                continue
+            geometry = store.geometry[:, :size]
+            x, _, w, _ = geometry
+            visible = store.alive[:size] & (x < right) & (x + w > left)
+            if key:
+                self.reference[kind] = (visible, geometry.copy())
+                changed = visible
+            else:
+                # A kind without a reference had nothing in view at the keyframe.
+                reference_visible, reference_geometry = reference or (np.zeros(0, dtype=bool), geometry[:, :0])
+                shared = min(size, len(reference_visible))
+                changed = visible.copy()
+                changed[:shared] &= ~reference_visible[:shared] | (
+                    geometry[:, :shared] != reference_geometry[:, :shared]).any(axis=0)
+                gone = reference_visible.copy()
+                gone[:shared] &= ~visible[:shared]
+                if gone.any():
+                    removed.append(_removed(kind, np.flatnonzero(gone)))
+            if changed.any():
+                entities.append(_records(kind, np.flatnonzero(changed), geometry))
+
+        player = scene.player
+        body = b"".join((
+            HEADER.pack(KEYFRAME if key else DELTA, self.frame, self.keyframe, left, player.x + left, player.y,
+                        player.freedom, player.liberty_shields),
+            COUNT.pack(sum(map(len, entities))), *(records.tobytes() for records in entities),
+            COUNT.pack(sum(map(len, removed))), *(records.tobytes() for records in removed),
+        ))
+        self.frame += 1
+        return LENGTH.pack(len(body)) + body, key
+
+def _fields(entities: np.ndarray) -> zip:
+    return zip(entities["kind"].tolist(), entities["row"].tolist(), entities["geometry"].tolist())
+
+class FrameDecoder:
+    """Rebuilds the streamed state from frames, as a spectator sees it.
+
+    Applying a delta first undoes the previous delta, so it costs time in proportion
+    to the changes in the two rather than to the entities in view.
+    """
+
+    def __init__(self) -> None:
+        """Initialize with nothing received yet."""
+        self.keyframe: Optional[int] = None
+        self.frame = -1
+        self.camera_x = 0.0
+        self.player = (0.0, 0.0)
+        self.freedom = 0
+        self.shields = 0
+        # (kind, row) to (x, y, width, height) in world coordinates.
+        self.entities: dict[tuple[int, int], tuple[float, ...]] = {}
+        self.reference: dict[tuple[int, int], tuple[float, ...]] = {}
+        self.overridden: list[tuple[int, int]] = []
+
+    def apply(self, body: bytes) -> bool:
+        """Apply a frame without its length prefix. Returns False for a delta against a keyframe not seen."""
+        kind, frame, keyframe, self.camera_x, x, y, self.freedom, self.shields = HEADER.unpack_from(body)
+        offset = HEADER.size
+        count, = COUNT.unpack_from(body, offset)
+        offset += COUNT.size
+        entities = np.frombuffer(body, dtype=ENTITY, count=count, offset=offset)
+        offset += entities.nbytes
+        count, = COUNT.unpack_from(body, offset)
+        removed = np.frombuffer(body, dtype=REMOVED, count=count, offset=offset + COUNT.size)
+
+        if kind == KEYFRAME:
+            self.keyframe = keyframe
+            self.entities = {(k, row): tuple(geometry) for k, row, geometry in _fields(entities)}
+            self.reference = dict(self.entities)
+            self.overridden = []
+        elif keyframe != self.keyframe:
+            return False
+        else:
+            for key in self.overridden:
+                if key in self.reference:
+                    self.entities[key] = self.reference[key]
+                else:
+                    self.entities.pop(key, None)
+            self.overridden = []
+            for k, row, geometry in _fields(entities):
+                self.entities[k, row] = tuple(geometry)
+                self.overridden.append((k, row))
+            for key in removed.tolist():
+                self.entities.pop(key, None)
+                self.overridden.append(key)
+        self.frame = frame
+        self.player = (x, y)
+        return True
+
+class _Subscriber:
+    """One connected spectator, holding at most the newest keyframe and delta not yet written."""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_HIGH)
+        self.keyframe: Optional[bytes] = None
+        self.delta: Optional[bytes] = None
+        self.wake = asyncio.Event()
+        self.dropped = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def offer(self, message: bytes, key: bool) -> None:
+        """Queue a frame, replacing any that have not been written yet and that it supersedes."""
+        if key:
+            self.dropped += (self.keyframe is not None) + (self.delta is not None)
+            self.keyframe = message
+            self.delta = None
+        else:
+            self.dropped += self.delta is not None
+            self.delta = message
+        self.wake.set()
+
+    async def run(self) -> None:
+        while True:
+            await self.wake.wait()
+            self.wake.clear()
+            for message in (self.keyframe, self.delta):
+                if message is not None:
+                    self.writer.write(message)
+            self.keyframe = self.delta = None
+            await self.writer.drain()
+
+class SpectatorServer:
+    """Broadcasts the game to spectators from an asyncio event loop on a background thread."""
+
+    def __init__(self, address: Address, keyframe_interval: int = 60):
+        """Initialize the server. It listens once started."""
+        self.address = address
+        self.encoder = FrameEncoder(keyframe_interval)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name="GNUDash-spectators", daemon=True)
+        self.listening = threading.Event()
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.subscribers: set[_Subscriber] = set()
+        self.keyframe: Optional[bytes] = None
+        self.delta: Optional[bytes] = None
+        self.frames = 0
+        self.bytes = 0
+        self.dropped = 0
+
+    def start(self) -> bool:
+        """Start listening, returning False if the address could not be bound."""
+        self.thread.start()
+        self.listening.wait()
+        return self.server is not None
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._listen())
+        except OSError as e:
+            logger.warning("Could not serve spectators on %s: %s", self.address, e)
+        self.listening.set()
+        if self.server is not None:
+            self.loop.run_forever()
+        self.loop.close()
+
+    async def _listen(self) -> None:
+        if isinstance(self.address, Path):
+            self.server = await asyncio.start_unix_server(self._subscribe, path=str(self.address))
+        else:
+            host, port = self.address
+            self.server = await asyncio.start_server(self._subscribe, host, port)
+        logger.info("Serving spectators on %s", self.address)
+
+    async def _subscribe(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        subscriber = _Subscriber(writer)
+        subscriber.task = asyncio.current_task()
+        if self.keyframe is not None:
+            subscriber.offer(self.keyframe, True)
+        if self.delta is not None:
+            subscriber.offer(self.delta, False)
+        self.subscribers.add(subscriber)
+        logger.info("Spectator connected, %d watching", len(self.subscribers))
+        try:
+            await subscriber.run()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+            self.dropped += subscriber.dropped
+            writer.close()
+            logger.info("Spectator disconnected after %d skipped frames, %d watching",
+                        subscriber.dropped, len(self.subscribers))
+
+    def publish(self, scene) -> None:
+        """Encode the scene's state and hand it to the event loop to send. Never waits on the network."""
+        message, key = self.encoder.encode(scene)
+        self.loop.call_soon_threadsafe(self._broadcast, message, key)
+
+    def _broadcast(self, message: bytes, key: bool) -> None:
+        if key:
+            self.keyframe, self.delta = message, None
+        else:
+            self.delta = message
+        self.frames += 1
+        self.bytes += len(message)
+        for subscriber in self.subscribers:
+            subscriber.offer(message, key)
+
+    def stats(self) -> dict[str, int]:
+        """Frames and bytes published, spectators connected and frames skipped for slow ones."""
+        return {"frames": self.frames, "bytes": self.bytes, "subscribers": len(self.subscribers),
+                "dropped": self.dropped + sum(subscriber.dropped for subscriber in self.subscribers)}
+
+    def close(self) -> None:
+        """Disconnect every spectator and stop the server."""
+        if self.server is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=1.0)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=1.0)
+        if isinstance(self.address, Path):
+            self.address.unlink(missing_ok=True)
+        logger.debug("Spectator stream: %s", self.stats())
+
+    async def _shutdown(self) -> None:
+        self.server.close()
+        tasks = [subscriber.task for subscriber in self.subscribers]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.server.wait_closed()
@@ -0,0 +1,145 @@
+"""Lightweight window that watches a game broadcast with --spectators.
+
+It only draws the rects the stream describes, so it needs none of the game's
+simulation. A stream can also be saved and played back later, to show a recorded run
+next to a live one.
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Optional
+
+import pygame
+from pygame.locals import KEYDOWN, K_ESCAPE, QUIT
+from src.logging import get_logger, setup_logging
+from src.config import current_config
+from src.components.resources import get_resources
+from src.core.entity_store import BLOCK, DRM_DRONE, PATENT_TROLL, SOURCE_CODE, SPYWARE_SPIDER
+from src.spectator import LENGTH, FrameDecoder, parse_address
+
+logger = get_logger()
+
+# The [colors] key for each kind of entity in the stream.
+KIND_COLORS = {
+    BLOCK: "block",
+    SOURCE_CODE: "source_code",
+    DRM_DRONE: "drm_drone",
+    SPYWARE_SPIDER: "spyware_spider",
+    PATENT_TROLL: "patent_troll",
+}
+
+async def read_socket(address: str) -> AsyncIterator[bytes]:
+    """Frames received from a game serving spectators on address, until it disconnects."""
+    target = parse_address(address)
+    if isinstance(target, Path):
+        reader, writer = await asyncio.open_unix_connection(str(target))
+    else:
+        reader, writer = await asyncio.open_connection(*target)
+    logger.info("Watching %s", address)
+    try:
+        while True:
+            length, = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+            yield await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        logger.info("The game stopped broadcasting")
+    finally:
+        writer.close()
+
+async def read_file(path: Path, rate: float) -> AsyncIterator[bytes]:
+    """Frames from a saved stream, at rate frames per second."""
+    with open(path, "rb") as f:
+        while header := f.read(LENGTH.size):
+            length, = LENGTH.unpack(header)
+            yield f.read(length)
+            await asyncio.sleep(1 / rate)
+
+class SpectatorView:
+    """Draws the state rebuilt from a stream."""
+
+    def __init__(self, decoder: FrameDecoder):
+        """Initialize the view of decoder's state."""
+        self.decoder = decoder
+        self.config = current_config()
+        self.resources = get_resources()
+
+    def draw(self, screen: pygame.Surface) -> None:
+        """Draw the latest frame received."""
+        colors = self.config.colors
+        screen.fill(colors.background)
+        decoder = self.decoder
+        offset = decoder.camera_x
+        height = screen.get_height()
+        for (kind, _), (x, y, w, h) in decoder.entities.items():
+            color = colors.floor if kind == BLOCK and y + h >= height else colors[KIND_COLORS[kind]]
+            pygame.draw.rect(screen, color, (x - offset, y, w, h))
+        player = self.config.player
+        x, y = decoder.player
+        pygame.draw.rect(screen, colors.player, (x - offset, y, player.width, player.height))
+        size = self.config.fonts.hud_size
+        screen.blit(self.resources.text(size, f"Freedom: {decoder.freedom}", colors.text), (10, 10))
+        screen.blit(self.resources.text(size, f"Liberty Shields: {decoder.shields}", colors.text), (10, 40))
+
+async def _receive(frames: AsyncIterator[bytes], decoder: FrameDecoder, save: Optional[BinaryIO]) -> None:
+    async for body in frames:
+        decoder.apply(body)
+        if save is not None:
+            save.write(LENGTH.pack(len(body)) + body)
+
+async def watch(frames: AsyncIterator[bytes], save: Optional[BinaryIO] = None) -> None:
+    """Show frames in a window until it is closed or the stream ends."""
+    config = current_config()
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((config.game.screen_width, config.game.screen_height))
+    pygame.display.set_caption("GNU Dash spectator")
+    decoder = FrameDecoder()
+    view = SpectatorView(decoder)
+    receiving = asyncio.create_task(_receive(frames, decoder, save))
+    frame = -1
+    try:
+        while not receiving.done():
+            if any(event.type == QUIT or (event.type == KEYDOWN and event.key == K_ESCAPE)
+                   for event in pygame.event.get()):
+                break
+            if decoder.frame != frame:
+                frame = decoder.frame
+                view.draw(screen)
+                pygame.display.flip()
+            await asyncio.sleep(1 / max(config.game.fps, 30))
+    finally:
+        finished = receiving.done()
+        receiving.cancel()
+        # Cancelling only asks the task to stop, so wait for it before looking at how it ended.
+        await asyncio.gather(receiving, return_exceptions=True)
+        pygame.quit()
+    if finished and not receiving.cancelled() and receiving.exception() is not None:
+        raise receiving.exception()
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Entry point for the spectator viewer."""
+    parser = argparse.ArgumentParser(prog="gnudash-spectate", description="Watch a GNU Dash game")
+    parser.add_argument("address", nargs="?", default=None,
+                        help="host:port or UNIX socket path of the game, defaults to [spectator] address")
+    parser.add_argument("--save", type=Path, default=None, metavar="PATH", help="also save the stream to a file")
+    parser.add_argument("--play", type=Path, default=None, metavar="PATH",
+                        help="play back a saved stream instead of connecting to a game")
+    args = parser.parse_args(argv)
+    setup_logging()
+
+    config = current_config()
+    if args.play is not None:
+        frames = read_file(args.play, config.game.tick_rate)
+    else:
+        frames = read_socket(args.address or config.spectator.address)
+    save = open(args.save, "wb") if args.save is not None else None
+    try:
+        asyncio.run(watch(frames, save))
+    except (ConnectionError, FileNotFoundError) as e:
+        raise SystemExit(f"Could not watch the game: {e}")
+    finally:
+        if save is not None:
+            save.close()
+
+if __name__ == "__main__":
+    main()
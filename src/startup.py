@@ -0,0 +1,35 @@
+import time
+from typing import Optional
+
+class StartupProfile:
+    """Wall-clock time spent in each phase of startup, up to the first frame.
+
+    Each call to mark ends the current phase and starts the next one.
+    """
+
+    def __init__(self, start: Optional[float] = None):
+        """Start timing from the given perf_counter value, or from now."""
+        self.start = start if start is not None else time.perf_counter()
+        self.last = self.start
+        self.phases: list[tuple[str, float]] = []
+
+    def mark(self, name: str) -> None:
+        """Record the time since the previous mark as the named phase."""
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    @property
+    def total(self) -> float:
+        """Seconds from the start to the latest mark."""
+        return self.last - self.start
+
+    def report(self) -> str:
+        """A table of the phases with their times and share of the total."""
+        total = self.total or 1.0
+        width = max([len(name) for name, _ in self.phases] + [len("total")])
+        lines = [f"{'phase':<{width}}  {'ms':>8}  {'%':>5}"]
+        for name, seconds in self.phases:
+            lines.append(f"{name:<{width}}  {seconds * 1000:8.1f}  {seconds / total * 100:5.1f}")
+        lines.append(f"{'total':<{width}}  {self.total * 1000:8.1f}  {100.0:5.1f}")
+        return "\n".join(lines)
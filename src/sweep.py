@@ -0,0 +1,254 @@
+"""Sweep config values over a grid, scoring each setting with a bot across many seeded runs.
+
+Run with `python -m src.sweep` (or `gnudash-sweep`), for example:
+
+    gnudash-sweep --param level.hole_chance=0.05,0.1,0.2 --param level.scroll_speed=2,3 --runs 1000
+
+Every combination of the values is played by HeuristicBot once per seed, with the same
+seeds for every combination so they are compared on the same levels. Runs are spread
+over a pool of worker processes that each import the game once and then play run after
+run without a window, so a run costs only its own ticks.
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import statistics
+import time
+import tomllib
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from src.logging import get_logger, setup_logging
+from src.config import Config, ConfigError, compile_config, config_paths, read_config, use_config
+from src.core.entity_store import BLOCK, ENEMIES
+from src.game import Game
+from src.headless import HeadlessGNUDash
+
+logger = get_logger()
+
+# A setting to sweep, as ((section, key), values).
+Param = tuple[tuple[str, str], list[Any]]
+
+class HeuristicBot:
+    """Plays by running right and jumping at gaps, walls and enemies.
+
+    On the ground it keeps the player about position of the way across the screen, so
+    there is room to see what is coming. Jumps carry on right until it lands, and jump
+    is held until the top of the jump, since letting go early cuts it short.
+    """
+
+    def __init__(self, lookahead: int = 60, position: float = 0.2):
+        """Initialize the bot, keeping the player at position of the way across the screen."""
+        self.lookahead = lookahead
+        self.position = position
+
+    def __call__(self, scene: Game) -> tuple[bool, bool, bool]:
+        """The (left, right, jump) controls to hold for the next tick."""
+        player = scene.player
+        level = scene.level_generator
+        front = player.x + player.width
+        feet = player.y + player.height
+        if not player.on_ground:
+            right = front + self.lookahead < level.screen_width
+            if scene.jump_pressed and player.velocity_y < 0:
+                return False, right, True
+            if player.can_double_jump and player.velocity_y > 0:
+                # Falling with nothing underneath: use the second jump.
+                below = any(x < front and x + w > player.x and y >= feet for x, y, w, _ in level.visible_rects(BLOCK))
+                return False, right, not below
+            return False, right, False
+        ahead = front + self.lookahead
+        blocks = level.visible_rects(BLOCK)
+        gap = not any(x <= ahead < x + w and y >= feet - 1 for x, y, w, _ in blocks)
+        wall = any(x < ahead and x + w > front and y < feet - 1 and y + h > player.y for x, y, w, h in blocks)
+        if gap or wall or self.enemy_ahead(scene, front):
+            return False, True, True
+        return False, player.x < level.screen_width * self.position, False
+
+    def enemy_ahead(self, scene: Game, front: float) -> bool:
+        """Whether an enemy is within lookahead pixels in front of the player and in its way."""
+        player = scene.player
+        level = scene.level_generator
+        for kind in ENEMIES:
+            for x, y, w, h in level.visible_rects(kind):
+                if x + w > player.x and x < front + self.lookahead and y < player.y + player.height and y + h > player.y:
+                    return True
+        return False
+
+class RunResult(NamedTuple):
+    """How one seeded run of one setting went."""
+
+    setting: int
+    seed: int
+    ticks: int
+    game_over: bool
+    freedom: int
+    falls: int
+    shields_lost: int
+    elapsed: float
+
+def parse_param(text: str) -> Param:
+    """Parse SECTION.KEY=VALUE,VALUE,... with each value written as in TOML."""
+    name, _, values = text.partition("=")
+    section, _, key = name.strip().partition(".")
+    if not key or not values:
+        raise ValueError(f"expected SECTION.KEY=VALUE,..., got {text!r}")
+    try:
+        parsed = [tomllib.loads(f"value = {value.strip()}")["value"] for value in values.split(",")]
+    except tomllib.TOMLDecodeError as e:
+        raise ValueError(f"{text!r}: {e}") from None
+    return (section, key), parsed
+
+def settings(params: list[Param]) -> list[dict[tuple[str, str], Any]]:
+    """Every combination of the parameter values, in order."""
+    names = [name for name, _ in params]
+    return [dict(zip(names, values)) for values in itertools.product(*(values for _, values in params))]
+
+def build_config(raw: dict[str, dict[str, Any]], setting: dict[tuple[str, str], Any]) -> Config:
+    """The config of the parsed config files with a setting's values in place of theirs."""
+    raw = {section: dict(table) for section, table in raw.items()}
+    for (section, key), value in setting.items():
+        raw.setdefault(section, {})[key] = value
+    return compile_config(raw)
+
+def play(config: Config, setting: int, seed: int, max_ticks: int, bot: Optional[HeuristicBot] = None) -> RunResult:
+    """Play one seeded game with a config until game over or max_ticks."""
+    use_config(config)
+    bot = bot or HeuristicBot()
+    game = HeadlessGNUDash(config.game.screen_width, config.game.screen_height, restart_on_game_over=False,
+                           seed=seed, level_worker=False)
+    scene = game.current_scene
+    player = scene.player
+    ticks = 0
+    start = time.perf_counter()
+    while not scene.game_over and ticks < max_ticks:
+        scene.set_input(*bot(scene))
+        scene.update()
+        ticks += 1
+    elapsed = time.perf_counter() - start
+    game.close()
+    shields_lost = config.player.initial_liberty_shields - player.liberty_shields
+    return RunResult(setting, seed, ticks, scene.game_over, player.freedom, scene.falls, shields_lost, elapsed)
+
+# Compiled configs of the settings, built once per worker process.
+_configs: list[Config] = []
+
+def _init_worker(raw: dict[str, dict[str, Any]], setting_values: list[dict[tuple[str, str], Any]]) -> None:
+    _configs[:] = [build_config(raw, setting) for setting in setting_values]
+
+def _play_task(task: tuple[int, int, float]) -> RunResult:
+    setting, seed, seconds = task
+    config = _configs[setting]
+    # Each setting's own tick rate, so a sweep over tick_rate still plays the same simulated time.
+    return play(config, setting, seed, int(seconds * config.game.tick_rate))
+
+def run_sweep(setting_values: list[dict[tuple[str, str], Any]], runs: int, seconds: float, seed: int = 0,
+              workers: Optional[int] = None, raw: Optional[dict[str, dict[str, Any]]] = None) -> list[RunResult]:
+    """Play every setting once for each of seeds seed to seed + runs - 1, returning the runs in order.
+
+    A run lasts at most seconds of simulated time at its setting's tick rate. With
+    workers=0 the runs are played in this process, otherwise across that many worker
+    processes, by default one per CPU.
+    """
+    raw = raw if raw is not None else read_config(config_paths())
+    tasks = [(setting, seed + run, seconds) for setting in range(len(setting_values)) for run in range(runs)]
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    results = []
+    progress_step = max(len(tasks) // 10, 1)
+    if workers <= 0:
+        _init_worker(raw, setting_values)
+        completed = map(_play_task, tasks)
+        pool = None
+    else:
+        context = multiprocessing.get_context("spawn")
+        pool = context.Pool(workers, _init_worker, (raw, setting_values))
+        # Big enough chunks to keep messaging cheap, small enough for the workers to finish together.
+        completed = pool.imap_unordered(_play_task, tasks, chunksize=max(len(tasks) // (workers * 16), 1))
+    try:
+        for result in completed:
+            results.append(result)
+            if len(results) % progress_step == 0:
+                logger.info("Played %d of %d runs", len(results), len(tasks))
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    return sorted(results, key=lambda result: (result.setting, result.seed))
+
+def summarize(setting: dict[tuple[str, str], Any], results: list[RunResult], tick_rate: float) -> dict[str, Any]:
+    """Aggregate the runs of one setting."""
+    seconds = [result.ticks / tick_rate for result in results]
+    minutes = sum(seconds) / 60
+    elapsed = sum(result.elapsed for result in results)
+    summary: dict[str, Any] = {f"{section}.{key}": value for (section, key), value in setting.items()}
+    summary.update({
+        "runs": len(results),
+        "survival_mean": statistics.fmean(seconds),
+        "survival_median": statistics.median(seconds),
+        "game_over_rate": sum(result.game_over for result in results) / len(results),
+        "freedom_per_minute": sum(result.freedom for result in results) / minutes if minutes else 0.0,
+        "falls_mean": statistics.fmean(result.falls for result in results),
+        "falls_per_minute": sum(result.falls for result in results) / minutes if minutes else 0.0,
+        "shields_lost_mean": statistics.fmean(result.shields_lost for result in results),
+        "fps": sum(result.ticks for result in results) / elapsed if elapsed else float("inf"),
+    })
+    return summary
+
+def write_results(output: Path, summaries: list[dict[str, Any]], results: list[RunResult],
+                  options: dict[str, Any]) -> None:
+    """Write the summaries to output.csv, and them with every run to output.json."""
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output.with_suffix(".csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(summaries[0]))
+        writer.writeheader()
+        writer.writerows(summaries)
+    with open(output.with_suffix(".json"), "w") as f:
+        json.dump({"options": options, "settings": summaries, "runs": [result._asdict() for result in results]},
+                  f, indent=1)
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Entry point for the config sweep."""
+    parser = argparse.ArgumentParser(prog="gnudash-sweep", description="Score GNU Dash config values with a bot")
+    parser.add_argument("--param", action="append", default=[], metavar="SECTION.KEY=VALUES",
+                        help="comma separated values to try for a config key, may be repeated")
+    parser.add_argument("--runs", type=int, default=100, help="seeded runs of each combination of values")
+    parser.add_argument("--seconds", type=float, default=120.0, help="most simulated seconds a run lasts")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first run, the rest count up from it")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, 0 to play in this process")
+    parser.add_argument("--output", type=Path, default=Path("sweep"),
+                        help="results are written to this path with .csv and .json suffixes")
+    args = parser.parse_args(argv)
+    setup_logging()
+
+    try:
+        params = [parse_param(text) for text in args.param]
+    except ValueError as e:
+        parser.error(str(e))
+    raw = read_config(config_paths())
+    setting_values = settings(params)
+    try:
+        configs = [build_config(raw, setting) for setting in setting_values]
+    except ConfigError as e:
+        raise SystemExit(f"Invalid sweep values: {e}")
+
+    start = time.perf_counter()
+    results = run_sweep(setting_values, args.runs, args.seconds, args.seed, args.workers, raw)
+    elapsed = time.perf_counter() - start
+    summaries = [summarize(setting_values[i], [result for result in results if result.setting == i],
+                           configs[i].game.tick_rate) for i in range(len(setting_values))]
+    options = {"params": args.param, "runs": args.runs, "seconds": args.seconds, "seed": args.seed}
+    write_results(args.output, summaries, results, options)
+    logger.info("Played %d runs of %d settings in %.1fs", len(results), len(setting_values), elapsed)
+    for summary in summaries:
+        values = " ".join(f"{name}={value}" for name, value in summary.items() if "." in name)
+        print(f"{values or 'defaults'}: survived {summary['survival_mean']:.1f}s, "
+              f"{summary['freedom_per_minute']:.1f} freedom/min, {summary['falls_mean']:.2f} falls, "
+              f"{summary['fps']:.0f} fps")
+    print(f"Results written to {args.output.with_suffix('.csv')} and {args.output.with_suffix('.json')}")
+
+if __name__ == "__main__":
+    main()
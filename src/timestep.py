@@ -0,0 +1,46 @@
+from src.logging import get_logger
+
+logger = get_logger()
+
+class FixedTimestep:
+    """Turns variable frame times into a whole number of fixed-length simulation ticks.
+
+    Frame time is added to an accumulator and spent in steps of 1 / tick_rate seconds.
+    Whatever is left over is the fraction of the next tick already elapsed, which the
+    renderer uses to interpolate between the last two simulated states. If a frame
+    would need more than max_steps ticks to catch up, the excess is dropped, so a long
+    stall slows the game down rather than making every later frame longer still.
+    """
+
+    def __init__(self, tick_rate: float, max_steps: int):
+        """Initialize an empty accumulator."""
+        self.tick = 1.0 / tick_rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self.dropped_ticks = 0
+
+    def set_rate(self, tick_rate: float, max_steps: int) -> None:
+        """Change the tick rate, keeping the elapsed fraction of the current tick."""
+        fraction = self.alpha
+        self.tick = 1.0 / tick_rate
+        self.max_steps = max_steps
+        self.accumulator = fraction * self.tick
+
+    def advance(self, frame_time: float) -> int:
+        """Add a frame's elapsed time and return the number of ticks to simulate."""
+        self.accumulator += frame_time
+        steps = int(self.accumulator // self.tick)
+        if steps > self.max_steps:
+            dropped = steps - self.max_steps
+            self.dropped_ticks += dropped
+            logger.debug("Simulation fell behind, dropping %d ticks", dropped)
+            steps = self.max_steps
+            self.accumulator %= self.tick
+        else:
+            self.accumulator -= steps * self.tick
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        """How far the current time is between the last tick and the next, from 0 to 1."""
+        return min(self.accumulator / self.tick, 1.0)
@@ -0,0 +1,46 @@
+import pytest
+from src.config import DEFAULT_CONFIG_PATH, ConfigError, compile_config, read_config
+
+def _with(section: str, key: str, value) -> dict:
+    raw = read_config([DEFAULT_CONFIG_PATH])
+    raw[section][key] = value
+    return raw
+
+def test_defaults_compile():
+    config = compile_config(read_config([DEFAULT_CONFIG_PATH]))
+    assert config.game.gravity > 0
+
+@pytest.mark.parametrize("section, key, value", [
+    ("game", "tick_rate", 0),
+    ("game", "max_catch_up_steps", 0),
+    ("game", "gravity", 0),
+    ("game", "gravity", -0.5),
+    ("player", "flash_interval", 0),
+    ("level", "scroll_speed", -1),
+    ("level", "chunk_width", 0),
+    ("enemies", "drone_period", 0),
+    ("quality", "target_fps", 0),
+    ("quality", "window", 0),
+    ("quality", "render_scale", 1.5),
+])
+def test_out_of_range_values_are_rejected(section, key, value):
+    with pytest.raises(ConfigError, match=rf"\[{section}\] {key}"):
+        compile_config(_with(section, key, value))
+
+def test_hole_wider_than_half_a_jump_is_rejected():
+    raw = _with("level", "max_jump_distance", 40)
+    with pytest.raises(ConfigError, match="hole_min_width must not be greater than half of max_jump_distance"):
+        compile_config(raw)
+
+def test_unordered_range_is_rejected():
+    raw = _with("level", "block_min_width", 500)
+    with pytest.raises(ConfigError, match="block_min_width must not be greater than block_max_width"):
+        compile_config(raw)
+
+def test_unknown_and_missing_keys_are_rejected():
+    with pytest.raises(ConfigError, match="unknown keys in \\[game\\]: gravityy"):
+        compile_config(_with("game", "gravityy", 0.5))
+    raw = read_config([DEFAULT_CONFIG_PATH])
+    del raw["player"]["width"]
+    with pytest.raises(ConfigError, match="missing value \\[player\\] width"):
+        compile_config(raw)
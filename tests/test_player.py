@@ -0,0 +1,28 @@
+from src.core.blocks import Block
+from src.core.player import Player
+
+def test_fast_fall_lands_on_a_thin_block():
+    player = Player(100, 0)
+    player.velocity_y = 400
+    player.update(0.5, [Block(90, 200, 100, 2)])
+    assert player.y == 200 - player.height
+    assert player.on_ground
+    assert player.velocity_y == 0
+
+def test_corner_hit_on_both_axes_at_once_lands():
+    player = Player(0, 0)
+    player.velocity_x = 20
+    player.velocity_y = 20
+    # The block's left and top edges are both reached halfway through the move.
+    player.move_and_collide([Block(40, 60, 100, 20)])
+    assert player.on_ground
+    assert (player.x, player.y) == (20, 10)
+    assert player.velocity_x == 20
+
+def test_scrolling_wall_pushes_the_player_back():
+    player = Player(100, 0)
+    wall = Block(140, -100, 50, 300)
+    player.move_and_collide([wall], offset_x=0, scroll=20)
+    # The wall scrolls 20 to the left and the player ends up against it on screen.
+    assert player.x + player.width == wall.left - 20
+    assert not player.on_ground
@@ -0,0 +1,14 @@
+import pytest
+from src.headless import HeadlessGNUDash
+from src.snapshot import restore_snapshot, save_snapshot
+
+@pytest.mark.parametrize("seed", [0, -3, 2**32 + 5, 2**70])
+def test_snapshot_round_trip_for_any_seed(seed):
+    game = HeadlessGNUDash(seed=seed, level_worker=False)
+    game.run(30)
+    scene = game.current_scene
+    data = save_snapshot(scene)
+    game.run(30)
+    restore_snapshot(scene, data)
+    assert save_snapshot(scene) == data
+    game.close()
@@ -0,0 +1,47 @@
+import numpy as np
+from src.headless import HeadlessGNUDash
+from src.spectator import LENGTH, STREAM_KINDS, FrameDecoder, FrameEncoder
+
+def _in_view(scene) -> dict[tuple[int, int], tuple[float, ...]]:
+    """What a spectator should see of the scene, at the precision frames carry."""
+    level = scene.level_generator
+    left = level.camera_x
+    right = left + level.screen_width
+    expected = {}
+    for kind in STREAM_KINDS:
+        store = level.world.stores.get(kind)
+        if store is None:
+            continue
+        for row in range(store.size):
+            x, y, w, h = store.geometry[:, row]
+            if store.alive[row] and x < right and x + w > left:
+                expected[kind, row] = tuple(np.float32([x, y, w, h]).tolist())
+    return expected
+
+def test_deltas_rebuild_the_scene_even_when_some_are_dropped():
+    game = HeadlessGNUDash(seed=5, level_worker=False)
+    encoder = FrameEncoder(keyframe_interval=20)
+    decoder = FrameDecoder()
+    keyframes = 0
+    for frame in range(90):
+        game.run(5)
+        scene = game.current_scene
+        message, key = encoder.encode(scene)
+        keyframes += key
+        # Spectators that fall behind skip deltas, which each only build on their keyframe.
+        if key or frame % 3:
+            assert decoder.apply(message[LENGTH.size:])
+            assert decoder.entities == _in_view(scene)
+            assert decoder.camera_x == scene.level_generator.camera_x
+    assert keyframes == 5
+    game.close()
+
+def test_delta_against_an_unseen_keyframe_is_refused():
+    game = HeadlessGNUDash(seed=5, level_worker=False)
+    encoder = FrameEncoder(keyframe_interval=20)
+    encoder.encode(game.current_scene)
+    game.run(5)
+    message, key = encoder.encode(game.current_scene)
+    assert not key
+    assert not FrameDecoder().apply(message[LENGTH.size:])
+    game.close()